@@ -0,0 +1,249 @@
+'''
+- 에이전트의 한 턴(사용자 질문 → 함수 호출 → 최종 답변)을 처리하는 대화 흐름
+- LLM이 여러 함수 호출(toolCalls)을 반환하면 공유 스레드 풀에서 모두 동시에 실행하고, 결과를 toolCallId와 함께 붙여 최종 답변을 한 번만 요청
+- 다중 질문("삼성전자 종가랑 코스피 지수 알려줘")의 응답 시간이 함수 실행 시간의 합이 아닌 가장 느린 함수의 실행 시간에 가까워짐
+- 함수 실행 결과는 공유 캐시(tool_cache.TOOL_CACHE)를 거치므로 같은 호출이 반복되면 데이터 조회 없이 응답
+- 같은 질문이 반복되면 답변 캐시(answer_cache.ANSWER_CACHE)에서 바로 답하거나, 저장된 함수 호출로 첫 번째 LLM 호출을 생략
+- 단순 조회 질문은 규칙 기반 해석기(intent_router.route)가 함수 호출을 바로 만들어 첫 번째 LLM 호출을 생략
+- 값 하나를 반환하는 함수의 결과는 문장 템플릿(answer_templates)으로 답변하여 두 번째 LLM 호출을 생략
+- 첫 번째 LLM 호출에는 질문과 관련된 함수 명세만(tool_selector.select_tools) 보내 프롬프트 크기를 줄임
+'''
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_cache import ANSWER_CACHE, is_context_dependent, normalize_query
+from answer_templates import is_unreliable, render_all
+from config import Config
+from function_caller import aget_llm_function_call, astream_llm_function_call
+from intent_router import route
+from llm_client import run_sync
+from metrics import REGISTRY
+from skillset import SKILL_HANDLERS
+from tool_cache import TOOL_CACHE
+from tool_selector import select_tools
+from tracing import bind, current_span, span
+
+# 모든 턴이 공유하는 함수(Tool) 실행용 스레드 풀
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=Config.TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+# 함수 호출 수와 스레드 풀 사용량 (active가 workers에 붙어 있고 queued가 쌓이면 풀이 포화 상태)
+TOOL_CALLS = REGISTRY.counter("tool_calls_total", "함수(Tool) 호출 수 (cached: 결과 캐시 적중, result: ok, error)", ("tool", "cached", "result"))
+TOOL_POOL_WORKERS = REGISTRY.gauge("tool_pool_workers", "함수 실행 스레드 풀 크기")
+TOOL_POOL_WORKERS.set(Config.TOOL_MAX_WORKERS)
+TOOL_POOL_ACTIVE = REGISTRY.gauge("tool_pool_active", "함수 실행 스레드 풀에서 실행 중인 함수 수")
+TOOL_POOL_QUEUED = REGISTRY.gauge("tool_pool_queued", "함수 실행 스레드 풀에서 대기 중인 함수 수")
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "캐시 조회 수 (result: hit, miss)", ("cache", "result"))
+
+
+def _parse_arguments(arguments):
+    # 함수 인자가 JSON 문자열로 오는 경우도 처리
+    if isinstance(arguments, str):
+        return json.loads(arguments) if arguments.strip() else {}
+    return arguments or {}
+
+
+def execute_tool_call(tool_call):
+    '''
+    - 함수 호출 하나를 실행하고 (tool 메시지, 실행 정보) 반환
+    - 실행 정보의 error는 알 수 없는 함수이거나 실행 중 예외가 발생했을 때의 오류 메시지, cached는 캐시 적중 여부
+    '''
+    function_name = tool_call["function"]["name"]
+    started = time.perf_counter()
+    error = None
+    cached = False
+    with span("tool", function=function_name) as tool_span:
+        try:
+            function_args = _parse_arguments(tool_call["function"].get("arguments"))
+            tool_span.set(arguments=function_args)
+            if function_name in SKILL_HANDLERS:
+                result, cached = TOOL_CACHE.call(function_name, SKILL_HANDLERS[function_name], function_args)
+                content = str(result) # 결과를 문자열로 변환
+            else:
+                error = content = f"Error: LLM이 알 수 없는 함수({function_name})를 호출"
+        except Exception as e:
+            function_args = tool_call["function"].get("arguments")
+            error = content = f"Function Execution Error: {function_name} 실행 중 오류 발생: {e}"
+        tool_span.set(cached=cached, error=error, result_chars=len(content))
+    TOOL_CALLS.inc(tool=function_name, cached=str(cached).lower(), result="error" if error else "ok")
+    CACHE_REQUESTS.inc(cache="tool", result="hit" if cached else "miss")
+
+    message = {"role": "tool", "content": content, "toolCallId": tool_call["id"]}
+    info = {
+        "name": function_name,
+        "arguments": function_args,
+        "elapsed": time.perf_counter() - started,
+        "cached": cached,
+        "error": error,
+    }
+    return message, info
+
+
+async def arun_tool_calls(tool_calls):
+    '''
+    - 모든 함수 호출을 공유 스레드 풀에서 동시에 실행하고, 요청 순서대로 (tool 메시지 목록, 실행 정보 목록) 반환
+    - 추적 중이면 현재 구간을 스레드 풀의 함수 실행에 이어 줌
+    '''
+    loop = asyncio.get_running_loop()
+    traced_execute = bind(execute_tool_call)
+
+    def run_in_pool(tool_call):
+        TOOL_POOL_QUEUED.dec()
+        with TOOL_POOL_ACTIVE.track_inprogress():
+            return traced_execute(tool_call)
+
+    TOOL_POOL_QUEUED.inc(len(tool_calls))
+    results = await asyncio.gather(*[
+        loop.run_in_executor(TOOL_EXECUTOR, run_in_pool, tool_call) for tool_call in tool_calls
+    ])
+    return [message for message, _ in results], [info for _, info in results]
+
+
+def summarize_tool_calls(tool_infos):
+    '''
+    - 실행 정보 목록을 출력/저장용으로 정리 (함수 이름, 인자, 소요 시간, 캐시 적중 여부, 오류)
+    '''
+    return [
+        {
+            "name": info["name"],
+            "arguments": info["arguments"],
+            "elapsed": round(info["elapsed"], 4),
+            "cached": info["cached"],
+            "error": info["error"],
+        }
+        for info in tool_infos
+    ]
+
+
+# 답변 캐시에 저장하지 않는 함수 (되묻기 등 질문 자체에 대한 응답)
+UNCACHED_ANSWER_TOOLS = {"ask_for_clarification"}
+
+
+async def arun_turn(query, chat_history=None, stream=False, on_token=None, previous_tools=None):
+    '''
+    - 한 턴을 처리하고 {"answer", "tool_calls", "timings", "cache"} 반환
+    - stream이 True이면 최종 답변을 스트리밍으로 받아 토큰마다 on_token(토큰)을 호출
+    - previous_tools: 직전 턴에서 호출한 함수 이름 (ChatHistory.last_tool_names(), 후속 질문의 함수 명세 선택용)
+    - timings: 첫 번째 LLM 호출, 함수 실행, 두 번째 LLM 호출(또는 템플릿 답변), 첫 토큰, 전체 소요 시간(초)
+    - cache: 답변 캐시 사용 결과 ("answer": 답변 적중, "plan": 함수 호출 목록만 적중, None: 사용 안 함/실패)
+    - routed: 규칙 기반 해석기로 함수 호출을 만들었는지 여부
+    '''
+    chat_history = chat_history or []
+    started = time.perf_counter()
+    timings = {}
+    loop = asyncio.get_running_loop()
+
+    # 이전 대화에 기대지 않는 질문이면 답변 캐시를 먼저 확인
+    # 정규화(거래일 달력)와 규칙 기반 해석(종목 인덱스)은 처음 호출하거나 하루에 한 번 다시 만들 때 수 초가 걸리므로
+    # 서버의 다른 세션이 멈추지 않도록 이벤트 루프가 아닌 함수 실행 스레드 풀에서 실행
+    cache_key = None
+    if not is_context_dependent(query, chat_history):
+        cache_key = await loop.run_in_executor(TOOL_EXECUTOR, normalize_query, query)
+    cached_answer, cached_tool_calls = ANSWER_CACHE.lookup(cache_key) if cache_key else (None, None)
+    if cache_key:
+        CACHE_REQUESTS.inc(cache="answer", result="miss" if cached_answer is None and not cached_tool_calls else "hit")
+    current = current_span()
+    if current is not None:
+        current.set(answer_cache="answer" if cached_answer is not None else "plan" if cached_tool_calls else "miss")
+    if cached_answer is not None:
+        if stream and on_token:
+            timings["first_token"] = time.perf_counter() - started
+            on_token(cached_answer)
+        timings["total"] = time.perf_counter() - started
+        return {"answer": cached_answer, "tool_calls": [], "timings": timings, "cache": "answer", "routed": False}
+
+    # 현재 턴의 메시지 기록 (대화 기록과 별도 관리)
+    current_messages = [{"role": "user", "content": query}]
+
+    routed_tool_calls = None
+    if cache_key and not cached_tool_calls:
+        with span("route") as route_span:
+            try:
+                routed_tool_calls = await loop.run_in_executor(TOOL_EXECUTOR, bind(route), query)
+            except Exception as e:
+                print(f"질문 해석 오류: {e}")
+            route_span.set(routed=bool(routed_tool_calls))
+        timings["route"] = time.perf_counter() - started
+
+    if cached_tool_calls or routed_tool_calls:
+        # 같은 질문에 대해 LLM이 골랐던 함수 호출, 또는 규칙으로 만든 함수 호출을 그대로 사용하여 첫 번째 LLM 호출을 생략
+        message = {"role": "assistant", "content": "", "toolCalls": cached_tool_calls or routed_tool_calls}
+    else:
+        # 1. 사용자 질문을 LLM에게 보내 함수 호출 정보를 얻음
+        # 이전 대화 기록(chat_history)을 함께 전달하여 맥락 유지
+        # 질문과 관련된 함수 명세만 골라서 보냄
+        llm_response = await aget_llm_function_call(None, chat_history + current_messages, select_tools(query, previous_tools))
+        timings["first_llm"] = time.perf_counter() - started
+
+        message = llm_response.get("result", {}).get("message", {})
+
+    # LLM의 응답(tool_calls 포함 가능)을 현재 턴의 기록에 추가
+    current_messages.append(message)
+    tool_calls = message.get("toolCalls") or []
+    tool_infos = []
+
+    # 2. LLM이 함수 호출을 결정했으면 모든 함수를 동시에 실행
+    if tool_calls:
+        tool_started = time.perf_counter()
+        tool_messages, tool_infos = await arun_tool_calls(tool_calls)
+        timings["tools"] = time.perf_counter() - tool_started
+
+        templated = render_all(tool_infos, tool_messages) if Config.TEMPLATE_ANSWERS else None
+
+        if all(info["error"] for info in tool_infos):
+            # 모든 함수가 실패하면 LLM을 다시 호출하지 않고 오류를 그대로 전달
+            answer = "\n".join(info["error"] for info in tool_infos)
+        elif templated is not None:
+            # 값 하나짜리 결과는 템플릿 문장으로 바로 답변
+            answer = templated
+            timings["template"] = time.perf_counter() - tool_started - timings["tools"]
+            if stream and on_token:
+                timings["first_token"] = time.perf_counter() - started
+                on_token(answer)
+            # "데이터 없음"/오류 결과는 일시적인 조회 실패일 수 있으므로 캐시하지 않음
+            if cache_key and not any(is_unreliable(message["content"]) for message in tool_messages):
+                ANSWER_CACHE.store(cache_key, answer, tool_calls)
+        else:
+            current_messages.extend(tool_messages)
+
+            # 3. 전체 대화 흐름(이전 기록 + 현재 턴)을 포함하여 다시 LLM을 호출
+            second_started = time.perf_counter()
+            if stream:
+                def record_token(token):
+                    if "first_token" not in timings:
+                        timings["first_token"] = time.perf_counter() - started
+                    if on_token:
+                        on_token(token)
+
+                second_response = await astream_llm_function_call(None, chat_history + current_messages, on_token=record_token)
+            else:
+                second_response = await aget_llm_function_call(None, chat_history + current_messages)
+            timings["second_llm"] = time.perf_counter() - second_started
+            second_message = second_response.get("result", {}).get("message", {})
+            answer = second_message.get("content", "최종 답변 생성에 실패")
+
+            # 모든 함수가 정상 실행되고 LLM 호출이 성공하여 답변이 생성된 경우에만 캐시
+            if cache_key and not second_response.get("error") and second_message.get("content") \
+                    and not any(info["error"] for info in tool_infos) \
+                    and not any(is_unreliable(message["content"]) for message in tool_messages) \
+                    and not any(info["name"] in UNCACHED_ANSWER_TOOLS for info in tool_infos):
+                ANSWER_CACHE.store(cache_key, answer, tool_calls)
+    else:
+        answer = message.get("content", "응답을 생성하지 못했습니다.")
+
+    timings["total"] = time.perf_counter() - started
+    return {
+        "answer": answer,
+        "tool_calls": tool_infos,
+        "timings": timings,
+        "cache": "plan" if cached_tool_calls else None,
+        "routed": bool(routed_tool_calls),
+    }
+
+
+def run_turn(query, chat_history=None, stream=False, on_token=None, previous_tools=None):
+    '''
+    - arun_turn의 동기 버전 (LLM 클라이언트의 백그라운드 이벤트 루프에서 실행)
+    '''
+    return run_sync(arun_turn(query, chat_history, stream=stream, on_token=on_token, previous_tools=previous_tools))
@@ -0,0 +1,159 @@
+'''
+- 질문 단위 답변 캐시
+- 사용자 질문을 정규화(공백/문장부호 제거, 날짜 표기 통일)하고 "오늘", "어제" 같은 상대 날짜를 실제 날짜로 바꾼 문자열을 키로 사용
+- 같은 질문이 다시 들어오면 저장된 최종 답변을 바로 반환하여 LLM 호출 두 번을 모두 생략
+- 답변이 만료되어도(당일 데이터) LLM이 골랐던 함수 호출(toolCalls)은 남겨 두어 첫 번째 LLM 호출을 생략
+    - 함수 호출 인자의 날짜가 모두 질문(키)에 들어 있는 날짜일 때만 남김 (날짜 없는 질문의 호출은 어제 날짜를 계속 조회하게 되므로 답변과 함께 만료)
+- 질문 속 날짜가 모두 장이 끝난 과거 날짜이면 답변은 만료되지 않고, 당일/날짜 없는 질문은 live_ttl초 동안만 유지
+- 이전 대화에 기대는 질문("그럼 거기는?", "그 종목 거래량은?")은 캐시하지 않음
+'''
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import Config
+from ohlcv_store import is_closed_date
+from trading_calendar import get_trading_calendar
+
+# 이전 대화 맥락에 기대는 질문의 표지
+ANAPHORA_MARKERS = ("그럼", "그러면", "그거", "그것", "그건", "그 종목", "그종목", "거기", "이 종목", "이종목", "해당 종목", "아까", "방금", "위 종목", "위에", "둘 중", "둘중", "나머지")
+
+# 상대 날짜 표현 → 오늘로부터의 일수 (긴 표현을 먼저 치환)
+RELATIVE_DAYS = [("엊그제", -2), ("그저께", -2), ("그제", -2), ("어제", -1), ("오늘", 0), ("금일", 0), ("당일", 0)]
+
+# 직전 거래일로 해석하는 표현 (월요일의 "전일"은 일요일이 아닌 금요일)
+PREVIOUS_SESSION_WORDS = ("전일",)
+
+# 가장 최근 거래일로 해석하는 표현
+LATEST_SESSION_WORDS = ("최근", "요즘", "요새", "현재", "지금")
+
+_DATE_PATTERNS = [
+    re.compile(r"(\d{4})\s*[-./]\s*(\d{1,2})\s*[-./]\s*(\d{1,2})"),
+    re.compile(r"(\d{4})\s*년\s*(\d{1,2})\s*월\s*(\d{1,2})\s*일"),
+]
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_PUNCTUATION = re.compile(r"[\s?!.,~…'\"“”‘’]+")
+
+
+def is_context_dependent(query, chat_history=None):
+    '''이전 대화가 있고, 질문이 그 맥락에 기대는 표현을 포함하는지'''
+    if not chat_history:
+        return False
+    return any(marker in query for marker in ANAPHORA_MARKERS)
+
+
+def normalize_query(query, today=None):
+    '''
+    - 캐시 키로 쓸 정규화된 질문 문자열을 반환
+    - 날짜 표기는 YYYY-MM-DD로 통일하고, 상대 날짜는 today(기본값: 오늘) 기준 실제 날짜로 치환
+    '''
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    text = unicodedata.normalize("NFKC", query).lower().strip()
+
+    for pattern in _DATE_PATTERNS:
+        text = pattern.sub(lambda m: f" {int(m.group(1)):04d}-{int(m.group(2)):02d}-{int(m.group(3)):02d} ", text)
+
+    today_obj = datetime.strptime(today, "%Y-%m-%d")
+    for word, days in RELATIVE_DAYS:
+        if word in text:
+            text = text.replace(word, f" {(today_obj + timedelta(days=days)).strftime('%Y-%m-%d')} ")
+    for word in PREVIOUS_SESSION_WORDS:
+        if word in text:
+            previous = get_trading_calendar().previous(today) or (today_obj - timedelta(days=1)).strftime("%Y-%m-%d")
+            text = text.replace(word, f" {previous} ")
+    for word in LATEST_SESSION_WORDS:
+        if word in text:
+            latest = get_trading_calendar().latest(today) or today
+            text = text.replace(word, f" {word}:{latest} ")
+
+    return _PUNCTUATION.sub("", text)
+
+
+def query_dates(normalized_query):
+    '''정규화된 질문에 들어 있는 날짜 목록'''
+    return sorted(set(_ISO_DATE.findall(normalized_query)))
+
+
+def _plan_dates(tool_calls):
+    # 함수 호출 인자에 들어 있는 날짜 (인자가 JSON 문자열이어도 찾음)
+    return set(_ISO_DATE.findall(json.dumps(tool_calls, ensure_ascii=False, default=str)))
+
+
+class AnswerCache:
+    '''
+    - 정규화된 질문 → (최종 답변, 함수 호출 목록) LRU 캐시
+    '''
+    def __init__(self, max_entries=None, live_ttl=None):
+        self.max_entries = max_entries or Config.ANSWER_CACHE_MAX_ENTRIES
+        self.live_ttl = live_ttl or Config.ANSWER_CACHE_LIVE_TTL
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.answer_hits = 0
+        self.plan_hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        '''
+        - (답변, 함수 호출 목록) 반환
+        - 답변이 만료되었으면 답변은 None, 함수 호출 목록만 반환 (다시 쓸 수 있는 함수 호출 목록이 없거나 캐시에 없으면 (None, None))
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            if entry["answer"] is not None and (entry["expires_at"] is None or time.time() <= entry["expires_at"]):
+                self._entries.move_to_end(key)
+                self.answer_hits += 1
+                return entry["answer"], entry["tool_calls"]
+            if not entry["reusable_plan"]:
+                del self._entries[key]
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            entry["answer"] = None
+            self.plan_hits += 1
+            return None, entry["tool_calls"]
+
+    def store(self, key, answer, tool_calls):
+        dates = query_dates(key)
+        if dates and all(is_closed_date(date) for date in dates):
+            expires_at = None
+        else:
+            expires_at = time.time() + self.live_ttl
+
+        with self._lock:
+            self._entries[key] = {
+                "answer": answer,
+                "tool_calls": tool_calls,
+                "dates": dates,
+                "expires_at": expires_at,
+                # 호출 인자의 날짜가 모두 질문에서 온 것이면 답변이 만료된 뒤에도 함수 호출 목록을 다시 씀
+                "reusable_plan": _plan_dates(tool_calls) <= set(dates),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.answer_hits = self.plan_hits = self.misses = 0
+
+    def stats(self):
+        '''답변 적중, 함수 호출 목록만 적중, 실패 횟수와 현재 항목 수'''
+        with self._lock:
+            return {
+                "answer_hits": self.answer_hits,
+                "plan_hits": self.plan_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+# 모든 턴(사용자)이 공유하는 기본 캐시
+ANSWER_CACHE = AnswerCache()
@@ -0,0 +1,221 @@
+'''
+- 값 하나를 반환하는 함수(Tool)의 결과를 문장 템플릿으로 바로 최종 답변으로 만드는 모듈
+- "786.29" 같은 결과를 "2025년 3월 5일 KOSDAQ 지수는 786.29입니다."로 바꾸는 일에 두 번째 LLM 호출을 쓰지 않음
+- 템플릿이 없는 함수(목록/분석 결과)나 예상한 형식이 아닌 결과는 None을 반환하여 LLM이 답변을 생성하도록 함
+- "데이터가 없습니다" 류의 결과는 LLM도 그대로 전달하므로 템플릿 없이 그대로 답변으로 사용
+- 함수가 실패를 문자열로 반환한 결과("종목 비교 중 오류 발생: ...")는 템플릿에 넣지 않고 LLM이 답변하도록 함
+'''
+import re
+from datetime import datetime
+
+# 결과 형식 (함수가 정상적으로 값을 반환했을 때의 모양)
+_NUMBER = r"[+-]?\d[\d,]*(?:\.\d+)?"
+_VALUE_FORMATS = {
+    "percent": re.compile(rf"^{_NUMBER}%$"),
+    "won": re.compile(rf"^{_NUMBER}원$"),
+    "shares": re.compile(rf"^{_NUMBER}주$"),
+    "count": re.compile(rf"^{_NUMBER}개$"),
+    "number": re.compile(rf"^{_NUMBER}$"),
+    "market_cap": re.compile(rf"^{_NUMBER}(?:조원|억원)$"),
+    "rank": re.compile(r"^\d+위 \(총 [\d,]+개 종목 중 .+\)$"),
+}
+_WINNER = re.compile(r"^(?P<winner>.+?) \((?P<value>.+)\)$")
+_VERDICT = re.compile(r"^(?P<verdict>높습니다|낮습니다) \((?P<detail>.+)\)$")
+
+# LLM도 그대로 전달하는 "데이터 없음" 류 결과
+_NO_DATA = re.compile(r"(데이터가 없습니다|찾을 수 없습니다|계산할 수 없습니다|가져올 수 없습니다)\.?$")
+# 함수가 예외를 잡아 문자열로 반환한 실패 결과의 표지
+_ERROR_MARKER = "오류"
+
+STAT_LABELS = {
+    "rising_count": "상승 종목 수",
+    "falling_count": "하락 종목 수",
+    "total_trading_value": "거래대금",
+    "market_rising_count": "상승 종목 수",
+    "market_traded_count": "거래된 종목 수",
+}
+
+
+def _has_batchim(word):
+    '''마지막 글자에 받침이 있는지 (숫자와 영문자는 읽는 소리 기준, 그 외 문자는 받침 없음으로 처리)'''
+    last = word.strip()[-1:] if word else ""
+    if "가" <= last <= "힣":
+        return (ord(last) - ord("가")) % 28 != 0
+    return last in "0136781lmnLMN"
+
+
+def _topic(word):
+    return f"{word}{'은' if _has_batchim(word) else '는'}"
+
+
+def _subject(word):
+    return f"{word}{'이' if _has_batchim(word) else '가'}"
+
+
+def _and(word):
+    return f"{word}{'과' if _has_batchim(word) else '와'}"
+
+
+def _korean_date(date_str):
+    try:
+        date = datetime.strptime(date_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return date_str or ""
+    return f"{date.year}년 {date.month}월 {date.day}일"
+
+
+def _is(value):
+    '''값 + 서술격 조사 ("786.29입니다")'''
+    return f"{value}입니다."
+
+
+def _stock_metric(args, result):
+    metric = args.get("metric")
+    if metric == "등락률":
+        fmt = "percent"
+    elif metric == "거래량":
+        fmt = "shares"
+    else:
+        fmt = "won"
+    if not _VALUE_FORMATS[fmt].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('stock_name')}의 {_topic(metric)} {_is(result)}"
+
+
+def _market_index(args, result):
+    if not _VALUE_FORMATS["number"].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('market')} {_topic('지수')} {_is(result)}"
+
+
+def _compare_stocks(args, result):
+    match = _WINNER.match(result)
+    if not match:
+        return None
+    direction = "낮은" if args.get("comparison") == "lower" else "높은"
+    return (f"{_korean_date(args.get('date'))} {_and(args.get('stock1'))} {args.get('stock2')} 중 "
+            f"{_subject(args.get('metric'))} 더 {direction} 종목은 {match['winner']}({match['value']})입니다.")
+
+
+def _compare_market_indices(args, result):
+    match = _WINNER.match(result)
+    if not match:
+        return None
+    direction = "낮은" if args.get("comparison") == "lower" else "높은"
+    return f"{_korean_date(args.get('date'))} KOSPI와 KOSDAQ 중 지수가 더 {direction} 시장은 {match['winner']}({match['value']})입니다."
+
+
+def _market_cap(args, result):
+    if not _VALUE_FORMATS["market_cap"].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('stock_name')}의 시가총액은 {_is(result)}"
+
+
+def _compare_market_caps(args, result):
+    match = _WINNER.match(result)
+    if not match:
+        return None
+    direction = "작은" if args.get("comparison") == "lower" else "큰"
+    return (f"{_korean_date(args.get('date'))} {_and(args.get('stock1'))} {args.get('stock2')} 중 "
+            f"시가총액이 더 {direction} 종목은 {match['winner']}({match['value']})입니다.")
+
+
+def _market_statistics(args, result):
+    label = STAT_LABELS.get(args.get("stat_type"))
+    if label is None or not (_VALUE_FORMATS["count"].match(result) or _VALUE_FORMATS["won"].match(result)):
+        return None
+    market = args.get("market")
+    scope = f"{market} 시장의 " if market and args.get("stat_type", "").startswith("market_") else "전체 시장의 "
+    return f"{_korean_date(args.get('date'))} {scope}{_topic(label)} {_is(result)}"
+
+
+def _market_average_change(args, result):
+    if not _VALUE_FORMATS["percent"].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('market', 'KOSPI')} 시장의 평균 등락률은 {_is(result)}"
+
+
+def _stock_to_market(args, result):
+    match = _VERDICT.match(result)
+    if not match:
+        return None
+    return (f"{_korean_date(args.get('date'))} {args.get('stock_name')}의 등락률은 "
+            f"{args.get('market', 'KOSPI')} 시장 평균보다 {match['verdict']} ({match['detail']})")
+
+
+def _volume_share(args, result):
+    if not _VALUE_FORMATS["percent"].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('stock_name')}의 거래량은 전체 시장 거래량의 {_is(result)}"
+
+
+def _volume_rank(args, result):
+    if not _VALUE_FORMATS["rank"].match(result):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('stock_name')}의 거래량 순위는 {_is(result)}"
+
+
+def _top_volume_stock(args, result):
+    match = _WINNER.match(result)
+    if not match or not _VALUE_FORMATS["shares"].match(match["value"]):
+        return None
+    return f"{_korean_date(args.get('date'))} {args.get('market')} 시장의 거래량 1위 종목은 {match['winner']}({match['value']})입니다."
+
+
+# 함수 이름 → 템플릿
+TEMPLATES = {
+    "get_stock_metric": _stock_metric,
+    "get_market_index": _market_index,
+    "compare_stocks": _compare_stocks,
+    "compare_market_indices": _compare_market_indices,
+    "calculate_market_cap": _market_cap,
+    "compare_market_caps": _compare_market_caps,
+    "get_market_statistics": _market_statistics,
+    "calculate_market_average_change": _market_average_change,
+    "compare_stock_to_market": _stock_to_market,
+    "calculate_stock_volume_share": _volume_share,
+    "get_stock_volume_rank": _volume_rank,
+    "get_top_volume_stock_with_count": _top_volume_stock,
+}
+
+
+def render(function_name, arguments, result):
+    '''
+    - 함수 결과를 최종 답변 문장으로 만들어 반환 (템플릿으로 만들 수 없으면 None)
+    '''
+    template = TEMPLATES.get(function_name)
+    if template is None or not isinstance(arguments, dict):
+        return None
+    result = str(result).strip()
+    if _ERROR_MARKER in result:
+        return None
+    if _NO_DATA.search(result):
+        return result
+    try:
+        return template(arguments, result)
+    except Exception:
+        return None
+
+
+def is_unreliable(result):
+    '''
+    - "데이터 없음"이나 오류를 알리는 결과인지
+    - 조회 실패(네트워크 오류 등)도 이런 결과가 되므로 이 결과로 만든 답변은 답변 캐시에 저장하지 않음
+    '''
+    result = str(result).strip()
+    return _ERROR_MARKER in result or bool(_NO_DATA.search(result))
+
+
+def render_all(tool_infos, tool_messages):
+    '''
+    - 한 턴의 모든 함수 결과를 템플릿으로 답변할 수 있으면 문장들을 이어 붙여 반환 (하나라도 안 되면 None)
+    '''
+    sentences = []
+    for info, message in zip(tool_infos, tool_messages):
+        if info.get("error"):
+            return None
+        sentence = render(info["name"], info["arguments"], message["content"])
+        if sentence is None:
+            return None
+        sentences.append(sentence)
+    return " ".join(sentences) if sentences else None
@@ -0,0 +1,180 @@
+'''
+- 질문 목록(JSONL)을 에이전트 전체 흐름(agent.arun_turn)으로 한꺼번에 처리하는 배치 실행기
+- 입력 한 줄: {"query": "..."} (선택: "id", "session_id" - 같은 session_id의 질문은 순서대로 처리하며 대화 기록을 이어 감)
+- 출력 한 줄: {"index", "id", "session_id", "query", "answer", "tool_calls", "timings", "cache", "routed", "error"}
+    - tool_calls: 함수 이름, 인자, 소요 시간, 캐시 적중 여부, 오류
+    - timings: 단계별 소요 시간(초) (route, first_llm, tools, template, second_llm, total)
+- 세션들을 concurrency개까지 동시에 처리하여 데이터 조회/LLM 호출을 병렬로 사용 (함수 실행은 agent.TOOL_EXECUTOR 크기로 제한)
+- 결과는 끝나는 순서대로 바로 기록하고, 마지막에 처리량과 단계별 지연 시간 요약을 출력
+- 결과를 표준 출력에 쓰는 동안에는 함수들의 진행 메시지(print)를 표준 오류로 돌려 JSONL이 섞이지 않도록 함
+'''
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from contextlib import nullcontext, redirect_stdout
+
+from agent import arun_turn, summarize_tool_calls
+from config import Config
+from history import ChatHistory
+from llm_client import LLM_CLIENT
+from metrics import start_exporters
+
+
+def read_questions(path):
+    '''
+    - JSONL 파일에서 질문 목록을 읽어 [{"index", "id", "session_id", "query"}] 반환 (빈 줄, query가 없는 줄은 건너뜀)
+    '''
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ {line_no}번째 줄을 읽을 수 없습니다: {e}", file=sys.stderr)
+                continue
+            query = (item.get("query") or item.get("question")) if isinstance(item, dict) else None
+            if not query:
+                print(f"⚠️ {line_no}번째 줄에 query가 없습니다.", file=sys.stderr)
+                continue
+            index = len(questions)
+            questions.append({
+                "index": index,
+                "id": item.get("id", index),
+                "session_id": item.get("session_id"),
+                "query": query,
+            })
+    return questions
+
+
+def percentile(values, q):
+    '''값 목록의 q 백분위 (가장 가까운 순위 값, 빈 목록은 0)'''
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def summarize(records, elapsed):
+    '''처리 건수, 오류 건수, 처리량(건/초), 전체 지연 시간 백분위, 단계별 평균 소요 시간'''
+    totals = [r["timings"].get("total", 0.0) for r in records if r["timings"]]
+    stages = {}
+    for record in records:
+        for stage, seconds in record["timings"].items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "questions": len(records),
+        "errors": sum(1 for r in records if r["error"]),
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(records) / elapsed, 3) if elapsed else 0.0,
+        "total_p50": round(percentile(totals, 50), 4),
+        "total_p95": round(percentile(totals, 95), 4),
+        "total_max": round(max(totals, default=0.0), 4),
+        "stage_mean": {stage: round(sum(v) / len(v), 4) for stage, v in stages.items()},
+    }
+
+
+async def _run_question(question, history):
+    record = {
+        "index": question["index"],
+        "id": question["id"],
+        "session_id": question["session_id"],
+        "query": question["query"],
+        "answer": None,
+        "tool_calls": [],
+        "timings": {},
+        "cache": None,
+        "routed": False,
+        "error": None,
+    }
+    try:
+        if history is not None:
+            turn = await arun_turn(question["query"], history.messages(), previous_tools=history.last_tool_names())
+        else:
+            turn = await arun_turn(question["query"])
+        record.update({
+            "answer": turn["answer"],
+            "tool_calls": summarize_tool_calls(turn["tool_calls"]),
+            "timings": {k: round(v, 4) for k, v in turn["timings"].items()},
+            "cache": turn["cache"],
+            "routed": turn["routed"],
+        })
+        if history is not None:
+            history.append(question["query"], turn["answer"], turn["tool_calls"])
+    except Exception as e:
+        record["error"] = f"질문 처리 중 오류 발생: {e}"
+    return record
+
+
+async def arun_batch(questions, output, concurrency=None):
+    '''
+    - 질문 목록을 처리하여 결과를 output(파일 객체)에 JSONL로 기록하고, 결과 목록을 반환
+    - session_id가 같은 질문끼리 묶어 순서대로 처리하고, 묶음들은 concurrency개까지 동시에 처리
+    - output이 표준 출력이면 처리하는 동안 다른 print 출력은 표준 오류로 보냄
+    '''
+    concurrency = concurrency or Config.BATCH_CONCURRENCY
+    groups = OrderedDict()
+    for question in questions:
+        key = question["session_id"] if question["session_id"] is not None else ("__single__", question["index"])
+        groups.setdefault(key, []).append(question)
+
+    slots = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def run_group(group):
+        history = ChatHistory() if group[0]["session_id"] is not None else None
+        async with slots:
+            for question in group:
+                record = await _run_question(question, history)
+                records.append(record)
+                output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                output.flush()
+
+    try:
+        with redirect_stdout(sys.stderr) if output is sys.stdout else nullcontext():
+            await asyncio.gather(*[run_group(group) for group in groups.values()])
+    finally:
+        await LLM_CLIENT.aclose()
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 목록(JSONL) 배치 실행기")
+    parser.add_argument("input", help="질문 JSONL 파일 (한 줄에 {\"query\": ...})")
+    parser.add_argument("-o", "--output", default="-", help="결과 JSONL 파일 (기본값: 표준 출력)")
+    parser.add_argument("-c", "--concurrency", type=int, default=Config.BATCH_CONCURRENCY, help="동시에 처리할 질문(세션) 수")
+    args = parser.parse_args()
+
+    start_exporters()
+    questions = read_questions(args.input)
+    if not questions:
+        print("처리할 질문이 없습니다.", file=sys.stderr)
+        return
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        records = asyncio.run(arun_batch(questions, output, args.concurrency))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary = summarize(records, time.perf_counter() - started)
+    print(f"✅ {summary['questions']}개 질문 처리 (오류 {summary['errors']}개), {summary['elapsed']}초, {summary['throughput']}건/초", file=sys.stderr)
+    print(f"⏳ 전체 지연 시간 p50 {summary['total_p50']}초 / p95 {summary['total_p95']}초 / 최대 {summary['total_max']}초", file=sys.stderr)
+    print("📊 단계별 평균: " + ", ".join(f"{k} {v}초" for k, v in summary["stage_mean"].items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
+
+
+'''
+실행 예시
+python batch.py questions.jsonl -o answers.jsonl
+python batch.py questions.jsonl -o answers.jsonl --concurrency 16
+'''
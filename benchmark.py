@@ -0,0 +1,290 @@
+'''
+- 스킬(SKILL_HANDLERS)별 지연 시간 벤치마크 (네트워크 없이 합성 시세 fixture로 실행)
+- 모든 스킬과 기술적 분석 핸들러(handle_bollinger 등)를 KRX 전체 규모, 1년치 거래일 fixture(market_fixture.py) 위에서 실행하고 스킬마다 아래를 측정
+    - cold: 시세 저장소/스냅샷/결과 캐시를 모두 비운 상태의 실행 시간(초)
+    - warm: 캐시가 채워진 상태의 평균 실행 시간(초)과 처리량(회/초)
+    - calls: cold 실행 중 데이터 공급자 호출 횟수 (호출 이름별)
+    - peak_mb: cold 실행 중 최대 메모리 할당량(MB, tracemalloc)
+- 결과를 기준값(baseline) JSON으로 저장하거나, 저장된 기준값과 비교하여 느려진 스킬이 있으면 종료 코드 1을 반환 (성능 회귀 검사)
+- 조건 검색/기술적 분석 스킬(query_by_condition, query_by_technical_signal)은 질문 해석에 LLM을 쓰므로, 해석이 끝난 조건으로 실행 단계만 측정
+'''
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# 시세 저장소, 종목 인덱스, 거래일 달력은 항상 벤치마크 전용 임시 디렉터리를 사용하고 종료 시 삭제 (config import 전에 설정)
+# reset_caches가 저장소 디렉터리를 지우므로 환경 변수로 지정된 FIN_DATA_DIR(실제 저장소)은 쓰지 않음
+BENCH_DATA_DIR = tempfile.mkdtemp(prefix="fin-bench-")
+os.environ["FIN_DATA_DIR"] = BENCH_DATA_DIR
+atexit.register(shutil.rmtree, BENCH_DATA_DIR, ignore_errors=True)
+
+from config import Config
+from market_fixture import DEFAULT_END_DATE, FixtureProvider, build_fixture, fixture_exists
+from providers import set_provider
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "benchmark_baseline.json")
+
+# 기준값 대비 이 비율 이상 느려지거나 메모리를 더 쓰면 회귀로 판단 (절대 차이가 NOISE_FLOOR_SECONDS 미만이면 무시)
+DEFAULT_TOLERANCE = 0.2
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def benchmark_cases(date):
+    '''
+    - 벤치마크 이름 → (실행 함수 이름, 인자) 목록 (date는 fixture의 마지막 거래일)
+    - 인자가 {"parsed": ...}이면 skillset 모듈의 함수를 해석이 끝난 조건 하나로 호출
+    '''
+    start = "2025-04-01"
+    return {
+        "get_stock_metric": ("get_stock_metric", {"date": date, "stock_name": "삼성전자", "metric": "등락률"}),
+        "get_market_index": ("get_market_index", {"date": date, "market": "KOSPI"}),
+        "get_top_stocks_by_metric": ("get_top_stocks_by_metric", {"date": date, "market": "KOSPI", "metric": "상승률", "n": 5}),
+        "get_market_statistics": ("get_market_statistics", {"date": date, "stat_type": "rising_count"}),
+        "get_all_market_volume_ranking": ("get_all_market_volume_ranking", {"date": date, "n": 10}),
+        "get_top_volume_stock_with_count": ("get_top_volume_stock_with_count", {"date": date, "market": "KOSDAQ"}),
+        "ask_for_clarification": ("ask_for_clarification", {"question_type": "general_inquiry", "missing_info": ["date", "market"]}),
+        "get_recent_rising_stocks": ("get_recent_rising_stocks", {"date": date, "market": "ALL", "n": 5}),
+        "get_stocks_down_from_high": ("get_stocks_down_from_high", {"date": date, "market": "ALL", "n": 5, "weeks": 52}),
+        "compare_stocks": ("compare_stocks", {"date": date, "stock1": "삼성전자", "stock2": "SK하이닉스", "metric": "종가"}),
+        "compare_market_indices": ("compare_market_indices", {"date": date}),
+        "calculate_market_average_change": ("calculate_market_average_change", {"date": date, "market": "KOSDAQ"}),
+        "compare_stock_to_market": ("compare_stock_to_market", {"date": date, "stock_name": "셀트리온", "market": "KOSPI"}),
+        "calculate_stock_volume_share": ("calculate_stock_volume_share", {"date": date, "stock_name": "SK하이닉스"}),
+        "get_stock_volume_rank": ("get_stock_volume_rank", {"date": date, "stock_name": "카카오", "market": "ALL"}),
+        "calculate_market_cap": ("calculate_market_cap", {"date": date, "stock_name": "삼성전자"}),
+        "compare_market_caps": ("compare_market_caps", {"date": date, "stock1": "카카오", "stock2": "LG화학"}),
+        "query_by_condition": ("dispatch", {"parsed": {
+            "date": date, "market": "KOSDAQ", "volume_ratio": {"operator": ">=", "value": 200},
+        }}),
+        "query_by_technical_signal": ("dispatch_technical", {"parsed": {
+            "indicator": "bollinger_band", "date": date, "signal_type": "touch_upper", "market": "KOSPI",
+        }}),
+        "handle_bollinger": ("handle_bollinger", {"parsed": {"date": date, "signal_type": "touch_lower", "market": "ALL"}}),
+        "handle_rsi": ("handle_rsi", {"parsed": {"date": date, "signal_type": "above", "threshold": 70, "market": "ALL"}}),
+        "handle_ma_breakout": ("handle_ma_breakout", {"parsed": {"date": date, "threshold": 10, "market": "ALL"}}),
+        "handle_volume_ratio_signal": ("handle_volume_ratio_signal", {"parsed": {"date": date, "threshold": 300, "market": "KOSDAQ"}}),
+        "handle_cross": ("handle_cross", {"parsed": {
+            "start_date": start, "end_date": date, "signal_type": ["golden_cross", "death_cross"], "market": "KOSPI",
+        }}),
+    }
+
+
+class CountingProvider:
+    '''데이터 공급자 호출 횟수를 호출 이름별로 세는 래퍼'''
+    def __init__(self, inner):
+        self.inner = inner
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            counts, self.counts = self.counts, {}
+        return counts
+
+    def __getattr__(self, method):
+        function = getattr(self.inner, method)
+
+        def counted(*args):
+            with self._lock:
+                self.counts[method] = self.counts.get(method, 0) + 1
+            return function(*args)
+        return counted
+
+
+def reset_caches():
+    '''시세 저장소(메모리+디스크), 지표 저장소, 시장 스냅샷, 함수 결과 캐시를 모두 비움'''
+    from indicator_engine import INDICATOR_STORE
+    from market_snapshot import SNAPSHOT_CACHE
+    from ohlcv_store import OHLCV_STORE
+    from tool_cache import TOOL_CACHE
+
+    for store in (OHLCV_STORE, INDICATOR_STORE):
+        # config가 먼저 import되어 저장소가 실제 경로를 가리키면 지우지 않고 중단
+        if os.path.commonpath([os.path.abspath(store.root), BENCH_DATA_DIR]) != BENCH_DATA_DIR:
+            raise RuntimeError(f"벤치마크 임시 디렉터리 밖의 저장소는 지우지 않습니다: {store.root}")
+        store.clear_memory()
+        shutil.rmtree(store.root, ignore_errors=True)
+    SNAPSHOT_CACHE.clear()
+    TOOL_CACHE.clear()
+
+
+def _run(function, arguments):
+    # 스킬이 출력하는 진행 메시지는 버림
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if "parsed" in arguments:
+            return function(arguments["parsed"])
+        return function(**arguments)
+
+
+def run_case(function, arguments, provider, repeat):
+    '''벤치마크 하나를 실행하여 {cold, warm, throughput, calls, peak_mb, result} 반환'''
+    # 1. 빈 캐시에서 실행 시간과 공급자 호출 횟수
+    reset_caches()
+    provider.reset()
+    started = time.perf_counter()
+    result = _run(function, arguments)
+    cold = time.perf_counter() - started
+    calls = provider.reset()
+
+    # 2. 캐시가 채워진 상태에서 반복 실행
+    warm_started = time.perf_counter()
+    for _ in range(repeat):
+        _run(function, arguments)
+    warm_total = time.perf_counter() - warm_started
+
+    # 3. 빈 캐시에서 다시 실행하며 최대 메모리 측정 (tracemalloc은 실행 시간을 늘리므로 따로 측정)
+    reset_caches()
+    tracemalloc.start()
+    try:
+        _run(function, arguments)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    provider.reset()
+
+    return {
+        "cold": round(cold, 4),
+        "warm": round(warm_total / repeat, 4) if repeat else None,
+        "throughput": round(repeat / warm_total, 2) if repeat and warm_total else None,
+        "calls": calls,
+        "peak_mb": round(peak / 2**20, 2),
+        "result": str(result)[:80],
+    }
+
+
+def run_benchmarks(names=None, repeat=3, fixture_dir=None):
+    '''fixture 위에서 벤치마크를 실행하여 {"fixture": ..., "tools": {이름: 측정값}} 반환'''
+    fixture = FixtureProvider(fixture_dir)
+    provider = CountingProvider(fixture)
+    set_provider(provider)
+
+    import skillset
+    from ticker_index import get_ticker_index
+    from trading_calendar import get_trading_calendar
+
+    # 종목 유니버스와 거래일 달력은 모든 스킬이 공유하므로 측정 전에 한 번 준비
+    get_trading_calendar()
+    get_ticker_index()
+
+    cases = benchmark_cases(fixture.meta["end_date"])
+    results = {}
+    for name, (function_name, arguments) in cases.items():
+        if names and name not in names:
+            continue
+        function = getattr(skillset, function_name)
+        results[name] = run_case(function, arguments, provider, repeat)
+        print(f"  {name:<34} cold {results[name]['cold']:8.3f}s  warm {results[name]['warm'] or 0:8.4f}s  "
+              f"calls {sum(results[name]['calls'].values()):5d}  peak {results[name]['peak_mb']:7.1f}MB", file=sys.stderr)
+
+    return {
+        "fixture": {
+            "end_date": fixture.meta["end_date"],
+            "seed": fixture.meta["seed"],
+            "sessions": len(fixture.sessions),
+            "stocks": len(fixture.meta["listing"]),
+        },
+        "tools": results,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    '''
+    - 기준값과 비교하여 [(이름, 항목, 기준값, 현재값)] 회귀 목록 반환
+    - 실행 시간은 (1 + tolerance)배 이상이면서 NOISE_FLOOR_SECONDS 이상 늘어난 경우, 공급자 호출 수는 늘어난 경우, 메모리는 (1 + tolerance)배 이상인 경우
+    '''
+    regressions = []
+    for name, now in current["tools"].items():
+        before = baseline.get("tools", {}).get(name)
+        if before is None:
+            continue
+        for metric in ("cold", "warm"):
+            if now[metric] is None or before.get(metric) is None:
+                continue
+            if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] > NOISE_FLOOR_SECONDS:
+                regressions.append((name, metric, before[metric], now[metric]))
+        if sum(now["calls"].values()) > sum(before.get("calls", {}).values()):
+            regressions.append((name, "calls", sum(before["calls"].values()), sum(now["calls"].values())))
+        if now["peak_mb"] > before.get("peak_mb", 0) * (1 + tolerance) and now["peak_mb"] - before.get("peak_mb", 0) > 1:
+            regressions.append((name, "peak_mb", before["peak_mb"], now["peak_mb"]))
+    return regressions
+
+
+def print_comparison(current, baseline):
+    print(f"{'tool':<34} {'cold':>9} {'base':>9} {'warm':>9} {'base':>9} {'calls':>6} {'peakMB':>8}")
+    for name, now in current["tools"].items():
+        before = baseline.get("tools", {}).get(name, {}) if baseline else {}
+        print(f"{name:<34} {now['cold']:9.4f} {before.get('cold', float('nan')):9.4f} "
+              f"{(now['warm'] or 0):9.4f} {before.get('warm') or float('nan'):9.4f} "
+              f"{sum(now['calls'].values()):6d} {now['peak_mb']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스킬별 오프라인 지연 시간 벤치마크")
+    parser.add_argument("tools", nargs="*", help="실행할 벤치마크 이름 (기본값: 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="캐시가 채워진 상태에서 반복 실행할 횟수")
+    parser.add_argument("--fixture", default=Config.FIXTURE_DIR, help="합성 시세 fixture 경로")
+    parser.add_argument("--build-fixture", action="store_true", help="fixture를 새로 생성")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="비교할 기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="회귀로 판단할 증가 비율 (0.2 = 20%%)")
+    parser.add_argument("-o", "--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.build_fixture or not fixture_exists(args.fixture):
+        print(f"🧪 합성 시세 fixture 생성 중... ({args.fixture})", file=sys.stderr)
+        build_fixture(args.fixture, end_date=DEFAULT_END_DATE)
+
+    print("⏱️ 벤치마크 실행 중...", file=sys.stderr)
+    current = run_benchmarks(args.tools or None, args.repeat, args.fixture)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_comparison(current, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"💾 기준값 저장: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("기준값이 없습니다. --save-baseline으로 저장한 뒤 비교할 수 있습니다.")
+        return 0
+    if baseline.get("fixture") != current["fixture"]:
+        print("⚠️ 기준값과 fixture 설정이 달라 비교하지 않습니다.")
+        return 0
+
+    regressions = compare(current, baseline, args.tolerance)
+    for name, metric, before, now in regressions:
+        print(f"❌ {name}: {metric} {before} → {now}")
+    if regressions:
+        return 1
+    print("✅ 기준값 대비 성능 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+'''
+실행 예시
+python benchmark.py --save-baseline                  # fixture 생성(없으면) 후 기준값 저장
+python benchmark.py                                  # 기준값과 비교 (회귀가 있으면 종료 코드 1)
+python benchmark.py get_top_stocks_by_metric handle_bollinger --repeat 5
+'''
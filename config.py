@@ -1,11 +1,80 @@
 '''
 - API 키 설정
 '''
+import os
+
 class Config:
     
-    # Chat Completions 호출 경로
+    # Chat Completions 호출 경로 (CLOVA_API_URL로 로컬 가짜 서버(mock_llm_server.py) 등을 지정할 수 있음)
     MODEL_NAME = 'HCX-005'
-    CHAT_COMPLETIONS_API = f'https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/{MODEL_NAME}'
+    CHAT_COMPLETIONS_API = os.getenv('CLOVA_API_URL', f'https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/{MODEL_NAME}')
 
     # CLOVA Studio API 인증 정보 (테스트 API 키)
-    API_KEY = ''
\ No newline at end of file
+    API_KEY = ''
+
+    # Chat Completions 호출 제한 (초 단위 연결/응답 대기 시간, 재시도 횟수와 백오프 기준 시간, 동시 연결 수)
+    LLM_CONNECT_TIMEOUT = 5
+    LLM_READ_TIMEOUT = 60
+    LLM_MAX_RETRIES = 2
+    LLM_RETRY_BACKOFF = 0.5
+    LLM_MAX_CONNECTIONS = 32
+
+    # 한 턴의 여러 함수 호출(toolCalls)을 동시에 실행하는 공유 스레드 풀 크기
+    TOOL_MAX_WORKERS = 8
+
+    # 함수(Tool) 실행 결과 캐시 (최대 항목 수, 당일 데이터 결과의 유지 시간(초))
+    TOOL_CACHE_MAX_ENTRIES = 4096
+    TOOL_CACHE_LIVE_TTL = 60
+
+    # 질문 단위 답변 캐시 (최대 항목 수, 당일/날짜 없는 질문 답변의 유지 시간(초))
+    ANSWER_CACHE_MAX_ENTRIES = 2048
+    ANSWER_CACHE_LIVE_TTL = 60
+
+    # 첫 번째 LLM 호출에 질문과 관련된 함수 명세만 보냄 (키워드 점수 상위 개수)
+    TOOL_SELECTION = True
+    TOOL_SELECTION_TOP_K = 4
+
+    # 값 하나를 반환하는 함수의 결과는 두 번째 LLM 호출 없이 문장 템플릿으로 답변
+    TEMPLATE_ANSWERS = True
+
+    # HTTP 서버 (바인딩 주소, 포트, 동시에 처리하는 턴 수, 유휴 세션 유지 시간(초), 최대 세션 수)
+    SERVER_HOST = os.getenv('AGENT_HOST', '127.0.0.1')
+    SERVER_PORT = int(os.getenv('AGENT_PORT', '8080'))
+    SERVER_MAX_CONCURRENT_TURNS = 32
+    SERVER_SESSION_TTL = 1800
+    SERVER_MAX_SESSIONS = 1000
+
+    # 배치 실행기(batch.py)에서 동시에 처리하는 질문(세션) 수
+    BATCH_CONCURRENCY = 16
+
+    # 부하 테스트(load_test.py)에서 차례로 늘려 가는 동시 요청 수
+    LOAD_TEST_CONCURRENCY = (1, 4, 16, 32)
+
+    # 대화 기록 관리 (LLM에 보낼 기록의 추정 토큰 예산, 원문으로 유지할 최근 턴 수, 요약에 남길 종류별 대상 수)
+    HISTORY_TOKEN_BUDGET = 1500
+    HISTORY_RECENT_TURNS = 3
+    HISTORY_MAX_ENTITIES = 5
+
+    # 지표(metrics.py) 출력 (GET /metrics 엔드포인트 포트, Prometheus 텍스트 파일 경로와 저장 간격(초)) - 지정하지 않으면 출력하지 않음 (server.py는 항상 /metrics 제공)
+    METRICS_PORT = int(os.getenv('FIN_METRICS_PORT', '0')) or None
+    METRICS_FILE = os.getenv('FIN_METRICS_FILE')
+    METRICS_FILE_INTERVAL = 15
+
+    # 턴마다 추적(tracing.py) 결과를 저장할 디렉터리 (지정하지 않으면 추적하지 않음)
+    TRACE_DIR = os.getenv('FIN_TRACE_DIR')
+
+    # 질문 단위 프로파일러(profiling.py) 결과 저장 디렉터리, 표본 추출 간격(초), 요약에 출력할 상위 항목 수
+    PROFILE_DIR = os.getenv('FIN_PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profiles'))
+    PROFILE_INTERVAL = 0.005
+    PROFILE_TOP = 15
+
+    # 로컬 시세 저장소 경로 (일봉 OHLCV 파티션 등)
+    DATA_DIR = os.getenv('FIN_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+    # 외부 시세 데이터 공급자 (live: 실제 조회, record: 실제 조회 결과를 기록, replay: 기록만으로 오프라인 실행, fixture: 합성 시세 fixture)
+    DATA_PROVIDER = os.getenv('FIN_DATA_PROVIDER', 'live')
+    PROVIDER_RECORD_DIR = os.getenv('FIN_PROVIDER_DIR', os.path.join(DATA_DIR, 'recordings'))
+    # replay 공급자가 호출마다 흉내 내는 지연 시간(초)
+    PROVIDER_REPLAY_LATENCY = float(os.getenv('FIN_REPLAY_LATENCY', '0'))
+    # 오프라인 실행/벤치마크용 합성 시세 fixture 경로 (시세 저장소 경로와 별도)
+    FIXTURE_DIR = os.getenv('FIN_FIXTURE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixture'))
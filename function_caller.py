@@ -2,9 +2,11 @@
 - LLM에게 전달할 Tool(함수) 목록을 정의하고, 
 - 사용자의 질문과 함께 API를 호출하여 LLM의 응답(함수 호출 또는 텍스트)을 파싱하는 역할
 '''
-import requests
 import json
-from config import Config
+import time
+from llm_client import LLM_CLIENT, run_sync
+from metrics import REGISTRY
+from tracing import span
 
 # --- LLM에게 제공할 Tool 명세 정의 ---
 # 각 함수의 역할과 필요한 파라미터를 상세히 설명해야 LLM이 제대로 사용함
@@ -311,32 +313,12 @@ TOOLS = [
 ]
 
 
-# --- LLM API 호출 및 응답 처리 ---
-def get_llm_function_call(user_query, chat_history=None):
-    '''
-    - 사용자 질문과 Tool 목록을 LLM API에 보내고, 그 응답을 반환
-    '''
-    url = Config.CHAT_COMPLETIONS_API
-    headers = {
-        'Authorization': f'Bearer {Config.API_KEY}',
-        # 'X-NCP-CLOVASTUDIO-REQUEST-ID': f'{Config.REQUEST_ID_CHAT}',
-        'Content-Type': 'application/json; charset=utf-8',
-    }
-    
-    messages = []
-    
-    # 2차 호출(tool 실행 결과를 바탕으로 최종 답변 생성)일 경우, 간결한 답변을 위한 시스템 프롬프트 추가
-    is_second_call = user_query is None and chat_history and chat_history[-1]['role'] == 'tool'
-    if is_second_call:
-        messages.append({
-            "role": "system",
-            "content": "Tool이 결과를 반환하면, 추가적인 설명, 분석, 조언, 또는 불필요한 문장 없이 결과의 핵심 정보만 간결하게 한 문장으로 전달하세요. 예를 들어, Tool이 '786.29'를 반환하면 'KOSDAQ 지수는 786.29입니다.' 와 같이 핵심만 답변하고 말을 끝내세요. Tool이 '데이터가 없습니다' 류의 결과를 반환하면 그대로 전달하세요."
-        })
-    else:
-        # 첫 번째 호출 시 모호한 질문 처리를 위한 시스템 프롬프트 추가
-        messages.append({
-            "role": "system",
-            "content": """당신은 금융 정보 전문 AI 에이전트입니다. 다음 원칙을 따라 답변하세요:
+# --- 시스템 프롬프트 ---
+# 2차 호출(tool 실행 결과를 바탕으로 최종 답변 생성)일 경우, 간결한 답변을 위한 시스템 프롬프트
+ANSWER_SYSTEM_PROMPT = "Tool이 결과를 반환하면, 추가적인 설명, 분석, 조언, 또는 불필요한 문장 없이 결과의 핵심 정보만 간결하게 한 문장으로 전달하세요. 예를 들어, Tool이 '786.29'를 반환하면 'KOSDAQ 지수는 786.29입니다.' 와 같이 핵심만 답변하고 말을 끝내세요. Tool이 '데이터가 없습니다' 류의 결과를 반환하면 그대로 전달하세요."
+
+# 첫 번째 호출 시 모호한 질문 처리를 위한 시스템 프롬프트
+ROUTING_SYSTEM_PROMPT = """당신은 금융 정보 전문 AI 에이전트입니다. 다음 원칙을 따라 답변하세요:
 
 1. **날짜 관련 질문 처리** (매우 중요):
    - 질문에 특정 날짜가 포함되어 있으면 항상 해당 Tool을 호출하여 실제 데이터를 확인하세요
@@ -368,38 +350,175 @@ def get_llm_function_call(user_query, chat_history=None):
    - 구현되지 않은 복잡한 분석이 요구되는 경우
 
 6. **기본값 활용**: 간단한 정보 부족 시에는 합리적인 기본값을 사용하여 get_recent_rising_stocks 등을 활용하세요."""
-        })
 
-    if chat_history:
-        messages.extend(chat_history)
+# 요청 파라미터 (Tool 명세 포함)
+REQUEST_OPTIONS = {
+    "tools": TOOLS,
+    "toolChoice": "auto", # LLM이 함수 사용 여부를 자율적으로 결정
+    "temperature": 0.1,
+    "max_tokens": 1024,
+    "seed": 42,
+}
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# 호출마다 바뀌지 않는 시스템 메시지와 Tool 명세는 모듈 로드 시 한 번만 직렬화
+# (Tool 명세는 질문마다 일부만 보낼 수 있도록 함수별로 직렬화)
+_ANSWER_SYSTEM_JSON = _dumps({"role": "system", "content": ANSWER_SYSTEM_PROMPT})
+_ROUTING_SYSTEM_JSON = _dumps({"role": "system", "content": ROUTING_SYSTEM_PROMPT})
+_TOOL_JSONS = {tool["function"]["name"]: _dumps(tool) for tool in TOOLS}
+_ALL_TOOLS_JSON = '"tools":[' + ",".join(_TOOL_JSONS.values()) + ']'
+_REQUEST_OPTIONS_JSON = _dumps({k: v for k, v in REQUEST_OPTIONS.items() if k != "tools"})[1:-1]
+# 2차 호출은 함수를 다시 고르지 않으므로 Tool 명세 없이 요청
+_ANSWER_OPTIONS_JSON = _dumps({k: v for k, v in REQUEST_OPTIONS.items() if k not in ("tools", "toolChoice")})[1:-1]
+
+
+def is_second_call(user_query, chat_history):
+    '''Tool 실행 결과를 바탕으로 최종 답변을 생성하는 호출인지'''
+    return bool(user_query is None and chat_history and chat_history[-1]['role'] == 'tool')
+
+
+def _tools_json(tool_names):
+    # tool_names가 None이면 전체 Tool 명세, 아니면 지정한 함수의 명세만 사용
+    if tool_names is None:
+        return _ALL_TOOLS_JSON
+    return '"tools":[' + ",".join(_TOOL_JSONS[name] for name in tool_names if name in _TOOL_JSONS) + ']'
+
+
+def build_request_body(user_query, chat_history=None, tool_names=None):
+    '''
+    - API 요청 본문(JSON bytes)을 생성
+    - 미리 직렬화해 둔 시스템 메시지와 Tool 명세에 이번 대화의 메시지만 직렬화하여 이어 붙임
+    - 첫 번째 호출은 tool_names로 고른 함수의 명세만(None이면 전체) 보내고, 2차 호출은 Tool 명세를 보내지 않음
+    - 대화 기록이 system 메시지(이전 대화 요약)로 시작하면 별도 메시지로 보내지 않고 맨 앞 시스템 프롬프트 뒤에 이어 붙임
+    '''
+    second_call = is_second_call(user_query, chat_history)
+    chat_history = chat_history or []
+    if chat_history and chat_history[0].get("role") == "system":
+        prompt = ANSWER_SYSTEM_PROMPT if second_call else ROUTING_SYSTEM_PROMPT
+        message_jsons = [_dumps({"role": "system", "content": f"{prompt}\n\n{chat_history[0]['content']}"})]
+        chat_history = chat_history[1:]
+    else:
+        message_jsons = [_ANSWER_SYSTEM_JSON if second_call else _ROUTING_SYSTEM_JSON]
+    message_jsons.extend(_dumps(message) for message in chat_history)
     if user_query:
-        messages.append({'role': 'user', 'content': user_query})
-
-    payload = {
-        "messages": messages,
-        "tools": TOOLS,
-        "toolChoice": "auto", # LLM이 함수 사용 여부를 자율적으로 결정
-        "temperature": 0.1,
-        "max_tokens": 1024,
-        "seed": 42,
+        message_jsons.append(_dumps({'role': 'user', 'content': user_query}))
+    options_json = _ANSWER_OPTIONS_JSON if second_call else _tools_json(tool_names) + ',' + _REQUEST_OPTIONS_JSON
+    return ('{"messages":[' + ",".join(message_jsons) + '],' + options_json + '}').encode("utf-8")
+
+
+# LLM 호출 지표 (call: first(함수 선택)/second(답변 생성), mode: post/stream)
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM 호출 수 (result: ok, error)", ("call", "mode", "result"))
+LLM_LATENCY = REGISTRY.histogram("llm_request_duration_seconds", "LLM 호출 지연 시간(초)", ("call", "mode"))
+LLM_FIRST_TOKEN = REGISTRY.histogram("llm_first_token_seconds", "스트리밍 LLM 호출의 첫 토큰까지 걸린 시간(초)", ("call",))
+LLM_REQUEST_BYTES = REGISTRY.counter("llm_request_bytes_total", "LLM 요청 본문 크기 합계(바이트)", ("call",))
+LLM_INFLIGHT = REGISTRY.gauge("llm_requests_inflight", "응답을 기다리는 LLM 호출 수")
+
+
+def _llm_span_attributes(user_query, chat_history, tool_names, body):
+    # 추적 구간 속성: 호출 종류(first: 함수 선택, second: 답변 생성), 요청 크기, 보낸 함수 명세 수, 메시지 수
+    second_call = is_second_call(user_query, chat_history)
+    return {
+        "call": "second" if second_call else "first",
+        "request_bytes": len(body),
+        "tools": 0 if second_call else (len(_TOOL_JSONS) if tool_names is None else len(tool_names)),
+        "messages": len(chat_history or []) + (1 if user_query else 0),
     }
 
-    try:
-        if not url:
-            raise ValueError("API URL이 config.py에 설정되지 않았습니다.")
-        
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        return response.json() # LLM의 응답을 그대로 반환
-
-    except Exception as e:
-        print(f"API 호출 오류: {e}")
-        # 오류 발생 시, 사용자에게 보여줄 대체 메시지 생성
-        return {
-            "result": {
-                "message": {
-                    "role": "assistant",
-                    "content": f"API 호출에 실패했습니다. (오류: {e})",
-                }
+
+def _error_response(e):
+    # 오류 발생 시, 사용자에게 보여줄 대체 메시지 생성 (error 키로 실패한 응답임을 표시하여 답변 캐시에 저장하지 않도록 함)
+    return {
+        "error": str(e),
+        "result": {
+            "message": {
+                "role": "assistant",
+                "content": f"API 호출에 실패했습니다. (오류: {e})",
             }
-        } 
\ No newline at end of file
+        }
+    }
+
+
+# --- LLM API 호출 및 응답 처리 ---
+async def aget_llm_function_call(user_query, chat_history=None, tool_names=None):
+    '''
+    - 사용자 질문과 Tool 목록을 LLM API에 보내고, 그 응답을 반환 (비동기)
+    - tool_names: 보낼 함수 이름 목록 (None이면 전체 Tool 명세)
+    '''
+    body = build_request_body(user_query, chat_history, tool_names)
+    attributes = _llm_span_attributes(user_query, chat_history, tool_names, body)
+    LLM_REQUEST_BYTES.inc(len(body), call=attributes["call"])
+    with span("llm.call", **attributes) as llm_span, LLM_INFLIGHT.track_inprogress(), \
+            LLM_LATENCY.time(call=attributes["call"], mode="post"):
+        try:
+            response = await LLM_CLIENT.post(body) # LLM의 응답을 그대로 반환
+        except Exception as e:
+            print(f"API 호출 오류: {e}")
+            llm_span.set(error=str(e))
+            LLM_REQUESTS.inc(call=attributes["call"], mode="post", result="error")
+            return _error_response(e)
+        llm_span.set(tool_calls=len(response.get("result", {}).get("message", {}).get("toolCalls") or []))
+        LLM_REQUESTS.inc(call=attributes["call"], mode="post", result="ok")
+        return response
+
+
+def get_llm_function_call(user_query, chat_history=None, tool_names=None):
+    '''
+    - 사용자 질문과 Tool 목록을 LLM API에 보내고, 그 응답을 반환
+    - 공유 클라이언트의 백그라운드 이벤트 루프에서 실행되므로 턴 사이에 연결이 재사용됨
+    '''
+    return run_sync(aget_llm_function_call(user_query, chat_history, tool_names))
+
+
+async def astream_llm_function_call(user_query, chat_history=None, on_token=None, tool_names=None):
+    '''
+    - get_llm_function_call과 같은 요청을 스트리밍으로 보내고, 답변 토큰이 도착할 때마다 on_token(토큰)을 호출
+    - 스트림이 끝나면 일반 호출과 같은 형태({"result": {"message": ...}})의 응답을 반환
+    '''
+    tokens = []
+    result = None
+    body = build_request_body(user_query, chat_history, tool_names)
+    attributes = _llm_span_attributes(user_query, chat_history, tool_names, body)
+    LLM_REQUEST_BYTES.inc(len(body), call=attributes["call"])
+    started = time.perf_counter()
+    with span("llm.stream", **attributes) as llm_span, LLM_INFLIGHT.track_inprogress(), \
+            LLM_LATENCY.time(call=attributes["call"], mode="stream"):
+        try:
+            async for event, data in LLM_CLIENT.stream(body):
+                if event == "token":
+                    token = data.get("message", {}).get("content", "")
+                    if token:
+                        if not tokens:
+                            llm_span.set(first_token=round(llm_span.duration, 4))
+                            LLM_FIRST_TOKEN.observe(time.perf_counter() - started, call=attributes["call"])
+                        tokens.append(token)
+                        if on_token:
+                            on_token(token)
+                elif event == "result":
+                    result = data
+                elif event == "error":
+                    raise ValueError(data.get("status", {}).get("message", data) if isinstance(data, dict) else data)
+        except Exception as e:
+            print(f"API 호출 오류: {e}")
+            llm_span.set(error=str(e))
+            LLM_REQUESTS.inc(call=attributes["call"], mode="stream", result="error")
+            if not tokens:
+                return _error_response(e)
+        else:
+            LLM_REQUESTS.inc(call=attributes["call"], mode="stream", result="ok")
+        llm_span.set(tokens=len(tokens))
+
+    if result is None or not result.get("message"):
+        # 최종 결과 이벤트가 없으면 받은 토큰으로 응답을 구성
+        result = {"message": {"role": "assistant", "content": "".join(tokens)}}
+    return {"result": result}
+
+
+def stream_llm_function_call(user_query, chat_history=None, on_token=None, tool_names=None):
+    '''
+    - astream_llm_function_call의 동기 버전 (on_token은 백그라운드 이벤트 루프 스레드에서 호출됨)
+    '''
+    return run_sync(astream_llm_function_call(user_query, chat_history, on_token, tool_names))
@@ -0,0 +1,164 @@
+'''
+- 토큰 예산 안에서 대화 기록을 관리하는 모듈
+- 최근 몇 턴(질문/답변)은 그대로 보내고, 그보다 오래된 턴은 다룬 대상(종목, 날짜, 시장, 지표)만 남긴 요약 메시지 하나로 합침
+- 예산을 넘으면 오래된 턴부터 요약으로 옮기고, 요약의 대상 목록도 최근 것부터 정해진 개수만 유지
+    - 직전 턴 하나만으로도 예산을 넘으면 그 턴의 답변(필요하면 질문까지)을 잘라 예산에 맞춤
+- 요약은 기록 맨 앞의 system 메시지로 반환하고, 요청을 만들 때(function_caller.build_request_body) 시스템 프롬프트에 합쳐 보냄
+- 대화가 길어져도 LLM에 보내는 기록의 크기가 일정하게 유지되어 턴당 응답 시간이 늘어나지 않음
+- "그럼 SK하이닉스는?" 같은 후속 질문에 필요한 맥락(직전 턴 원문, 이전에 다룬 종목/날짜)은 유지
+'''
+import re
+from collections import deque
+
+from config import Config
+
+# 함수 인자 이름 → 요약 항목
+ENTITY_ARGUMENTS = {
+    "stock_name": "stocks", "stock1": "stocks", "stock2": "stocks",
+    "date": "dates",
+    "market": "markets",
+    "metric": "metrics",
+}
+ENTITY_LABELS = {"stocks": "종목", "dates": "날짜", "markets": "시장", "metrics": "지표"}
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# 예산에 맞추려고 자른 답변/질문 끝에 붙이는 표시
+TRUNCATED_MARKER = " …(생략)"
+
+
+def estimate_tokens(text):
+    '''
+    - 토큰 수 추정 (한글은 글자당 1토큰, 그 외 문자는 4글자당 1토큰으로 계산)
+    '''
+    text = text or ""
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def _message_tokens(message):
+    # 역할/구분자 몫으로 메시지마다 4토큰을 더함
+    return estimate_tokens(message.get("content")) + 4
+
+
+def truncate_to_tokens(text, max_tokens):
+    '''
+    - 추정 토큰 수가 max_tokens 이하가 되도록 text 뒷부분을 잘라 생략 표시를 붙여 반환 (이미 맞으면 그대로)
+    '''
+    text = text or ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # 앞부분 길이를 이분 탐색 (추정 토큰 수는 길이에 대해 단조 증가)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid] + TRUNCATED_MARKER) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + TRUNCATED_MARKER
+
+
+def extract_entities(query, tool_infos=None):
+    '''
+    - 한 턴에서 다룬 대상을 {"stocks": [...], "dates": [...], "markets": [...], "metrics": [...]}로 반환
+    - 함수 호출 인자(해석이 끝난 값)를 우선 사용하고, 날짜는 질문 속 YYYY-MM-DD 표기도 포함
+    '''
+    entities = {kind: [] for kind in ENTITY_LABELS}
+    for info in tool_infos or []:
+        arguments = info.get("arguments")
+        if not isinstance(arguments, dict):
+            continue
+        for argument, kind in ENTITY_ARGUMENTS.items():
+            value = arguments.get(argument)
+            if isinstance(value, str) and value and value not in entities[kind]:
+                entities[kind].append(value)
+    for date in _ISO_DATE.findall(query or ""):
+        if date not in entities["dates"]:
+            entities["dates"].append(date)
+    return entities
+
+
+class ChatHistory:
+    '''
+    - 토큰 예산 안에서 LLM에 보낼 대화 기록을 만드는 관리자
+    - append(질문, 답변, 함수 실행 정보)로 턴을 추가하고, messages()로 LLM에 보낼 메시지 목록을 얻음
+    '''
+    def __init__(self, token_budget=None, recent_turns=None, max_entities=None):
+        self.token_budget = token_budget or Config.HISTORY_TOKEN_BUDGET
+        self.recent_turns = recent_turns or Config.HISTORY_RECENT_TURNS
+        self.max_entities = max_entities or Config.HISTORY_MAX_ENTITIES
+        self._turns = deque()
+        # 요약으로 옮긴 턴의 대상 (최근 것이 뒤에 오도록 유지)
+        self._summary = {kind: [] for kind in ENTITY_LABELS}
+        self.summarized_turns = 0
+
+    def __len__(self):
+        return self.summarized_turns + len(self._turns)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def append(self, query, answer, tool_infos=None):
+        '''한 턴의 질문과 최종 답변을 추가하고, 예산에 맞게 오래된 턴을 요약으로 옮김'''
+        self._turns.append({
+            "messages": [{"role": "user", "content": query}, {"role": "assistant", "content": answer}],
+            "entities": extract_entities(query, tool_infos),
+            "tool_names": [info["name"] for info in tool_infos or []],
+        })
+        self._compact()
+
+    def last_tool_names(self):
+        '''직전 턴에서 호출한 함수 이름 (LLM에 보내는 기록에는 함수 호출이 없으므로 따로 보관한 값을 사용)'''
+        return list(self._turns[-1]["tool_names"]) if self._turns else []
+
+    def clear(self):
+        self._turns.clear()
+        self._summary = {kind: [] for kind in ENTITY_LABELS}
+        self.summarized_turns = 0
+
+    def _fold(self, turn):
+        # 턴의 대상을 요약에 합침 (이미 있으면 최근 위치로 옮기고, 종류별로 max_entities개만 유지)
+        for kind, values in turn["entities"].items():
+            summary = self._summary[kind]
+            for value in values:
+                if value in summary:
+                    summary.remove(value)
+                summary.append(value)
+            del summary[:-self.max_entities]
+        self.summarized_turns += 1
+
+    def _compact(self):
+        while len(self._turns) > self.recent_turns:
+            self._fold(self._turns.popleft())
+        # 최근 턴만으로도 예산을 넘으면 직전 턴 하나만 남을 때까지 요약으로 옮김
+        while len(self._turns) > 1 and self.tokens() > self.token_budget:
+            self._fold(self._turns.popleft())
+        # 직전 턴 하나만으로도 넘으면 답변부터, 그래도 넘으면 질문까지 잘라 예산에 맞춤
+        if self._turns and self.tokens() > self.token_budget:
+            for message in reversed(self._turns[-1]["messages"]):
+                excess = self.tokens() - self.token_budget
+                if excess <= 0:
+                    break
+                allowed = max(estimate_tokens(message["content"]) - excess, 0)
+                message["content"] = truncate_to_tokens(message["content"], allowed)
+
+    def summary_message(self):
+        '''요약으로 옮긴 턴이 있으면 이전 대화 요약 메시지를, 없으면 None을 반환'''
+        if not self.summarized_turns:
+            return None
+        parts = [f"{ENTITY_LABELS[kind]}: {', '.join(values)}" for kind, values in self._summary.items() if values]
+        detail = " / ".join(parts) if parts else "다룬 종목/날짜/시장 없음"
+        return {"role": "system", "content": f"이전 대화 요약 ({self.summarized_turns}개 턴) - {detail}"}
+
+    def messages(self):
+        '''LLM에 보낼 대화 기록 (요약 메시지 + 최근 턴 원문)'''
+        summary = self.summary_message()
+        messages = [summary] if summary else []
+        for turn in self._turns:
+            messages.extend(turn["messages"])
+        return messages
+
+    def tokens(self):
+        '''messages()의 추정 토큰 수'''
+        return sum(_message_tokens(message) for message in self.messages())
@@ -0,0 +1,83 @@
+'''
+- 모듈 import 시간 리포트 (python -X importtime 결과를 요약)
+- 새 파이썬 프로세스에서 대상 모듈을 import하고, 프로젝트 모듈별 누적 import 시간과 가장 무거운 외부 패키지를 출력
+- 지연 import(lazy_import.py)가 유지되고 있는지, CLI 시작 경로에 무거운 라이브러리가 다시 들어오지 않았는지 확인하는 용도
+'''
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_MODULES = {f[:-3] for f in os.listdir(PROJECT_DIR) if f.endswith(".py")}
+
+
+def measure(module):
+    '''
+    - 새 프로세스에서 module을 import하고 (프로세스 전체 소요 시간(초), [(모듈, 자체 시간 us, 누적 시간 us)]) 반환
+    '''
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"{module} import 실패")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return elapsed, rows
+
+
+def report(module, top=10):
+    elapsed, rows = measure(module)
+    total_us = sum(self_us for _, self_us, _ in rows)
+
+    print(f"📦 import {module}: 프로세스 {elapsed * 1000:.0f}ms (import 합계 {total_us / 1000:.1f}ms)")
+
+    print("\n[프로젝트 모듈] 누적 시간")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: -r[2]):
+        if name in PROJECT_MODULES:
+            print(f"  {name:<24} {cumulative_us / 1000:8.1f}ms (자체 {self_us / 1000:.1f}ms)")
+
+    # 외부 패키지는 최상위 패키지 단위로 자체 시간을 합산
+    packages = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        if root not in PROJECT_MODULES:
+            packages[root] = packages.get(root, 0) + self_us
+    print(f"\n[외부 패키지] 자체 시간 상위 {top}개")
+    for root, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {root:<24} {self_us / 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 시간 리포트")
+    parser.add_argument("modules", nargs="*", default=["main"], help="측정할 모듈 (기본값: main)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 외부 패키지 개수")
+    args = parser.parse_args()
+
+    for i, module in enumerate(args.modules):
+        if i:
+            print("\n" + "=" * 60)
+        try:
+            report(module, args.top)
+        except RuntimeError as e:
+            print(f"❌ {module}: {e}")
+
+
+if __name__ == "__main__":
+    main()
+
+
+'''
+실행 예시
+python import_report.py
+python import_report.py skillset function_caller --top 5
+'''
@@ -0,0 +1,157 @@
+'''
+- 티커 × 날짜 2차원 가격/거래량 행렬과, 그 위에서 전 종목 기술적 지표를 한 번에 계산하는 엔진
+- 종목별 DataFrame에 rolling을 거는 대신, NumPy 배열 한 번의 연산으로 볼린저 밴드, RSI, 이동평균 괴리율, 거래량 비율을 계산
+- 모든 지표 함수는 (종목 수, 날짜 수) 모양의 배열을 받아 같은 모양의 배열을 반환하며, 계산할 수 없는 칸은 NaN
+- 자주 쓰는 지표(MA5, MA20, 볼린저 상/하단, RSI14, 20일 평균 거래량)는 장 마감 후 미리 계산해 날짜별 파티션으로 저장(materialize)
+'''
+import os
+import warnings
+
+from config import Config
+from lazy_import import lazy_module
+from ohlcv_store import OHLCV_COLUMNS, DatePartitionStore
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# 미리 계산하여 저장하는 지표 컬럼 (당일 종가/거래량을 함께 저장해 파티션 하나로 조건 검색이 끝나도록 함)
+INDICATOR_COLUMNS = ["close", "volume", "ma5", "ma20", "bb_upper", "bb_lower", "rsi14", "vol_avg20"]
+
+# 지표 계산에 필요한 최소 조회 기간 (거래일 수, 20일 평균 거래량은 당일을 제외한 직전 20거래일을 씀)
+INDICATOR_LOOKBACK_SESSIONS = 21
+
+# 가격 데이터(data/ohlcv) 옆에 같은 구조로 저장되는 지표 파티션 (data/indicators)
+INDICATOR_STORE = DatePartitionStore(os.path.join(Config.DATA_DIR, "indicators"), columns=INDICATOR_COLUMNS)
+
+
+class PriceMatrix:
+    '''
+    - tickers(행) × dates(열) 모양의 OHLCV 행렬 묶음
+    '''
+    def __init__(self, tickers, dates, values):
+        self.tickers = list(tickers)
+        self.dates = list(dates)
+        self._date_pos = {d: i for i, d in enumerate(self.dates)}
+        self.open = values["Open"]
+        self.high = values["High"]
+        self.low = values["Low"]
+        self.close = values["Close"]
+        self.volume = values["Volume"]
+
+    def column(self, date_str):
+        '''특정 날짜의 열 번호 (행렬에 없는 날짜면 None)'''
+        return self._date_pos.get(date_str)
+
+
+def build_price_matrix(tickers, panel):
+    '''
+    - 날짜별 파티션(date -> 티커 index DataFrame)을 PriceMatrix로 변환
+    - 전 종목 데이터가 비어 있는 날짜(휴장일)는 열에서 제외
+    '''
+    tickers = list(tickers)
+    dates = sorted(d for d, rows in panel.items() if not rows.empty)
+
+    if dates:
+        stacked = np.stack([
+            panel[d].reindex(index=tickers, columns=OHLCV_COLUMNS).to_numpy(dtype="float64")
+            for d in dates
+        ], axis=1)
+    else:
+        stacked = np.empty((len(tickers), 0, len(OHLCV_COLUMNS)))
+
+    values = {col: stacked[:, :, i] for i, col in enumerate(OHLCV_COLUMNS)}
+    return PriceMatrix(tickers, dates, values)
+
+
+def rolling_mean(values, window):
+    '''날짜 축 이동평균 (구간에 NaN이 있거나 길이가 모자라면 NaN)'''
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window, axis=1).mean(axis=-1)
+    return out
+
+
+def rolling_std(values, window):
+    '''날짜 축 이동 표본표준편차 (pandas rolling().std()와 같은 ddof=1)'''
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window, axis=1).std(axis=-1, ddof=1)
+    return out
+
+
+def bollinger_bands(close, window=20, num_std=2):
+    '''
+    - (중심선, 상단, 하단) 반환
+    '''
+    middle = rolling_mean(close, window)
+    std = rolling_std(close, window)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def rsi(close, period=14):
+    '''
+    - 전일 대비 상승폭/하락폭의 단순 이동평균으로 계산한 RSI
+    '''
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    avg_gain = rolling_mean(np.clip(delta, 0, None), period)
+    avg_loss = rolling_mean(-np.clip(delta, None, 0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def ma_gap(close, window=20):
+    '''
+    - (이동평균, 이동평균 대비 괴리율 %) 반환
+    '''
+    ma = rolling_mean(close, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = (close - ma) / ma * 100
+    return ma, gap
+
+
+def volume_ratio(volume, n=20):
+    '''
+    - (직전 n거래일 평균 거래량, 당일 거래량 / 평균 거래량 %) 반환
+    - 평균은 당일을 제외한 직전 n개 열로 계산하며, 그 구간의 결측치는 건너뜀
+    '''
+    avg = np.full(volume.shape, np.nan)
+    if volume.shape[1] > n:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            avg[:, n:] = np.nanmean(np.lib.stride_tricks.sliding_window_view(volume[:, :-1], n, axis=1), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where((avg > 0) & (volume > 0), volume / avg * 100, np.nan)
+    return avg, ratio
+
+
+
+def compute_indicators(matrix):
+    '''
+    - 행렬의 모든 날짜에 대해 INDICATOR_COLUMNS 지표를 계산하여 {컬럼: 배열} 반환
+    '''
+    _, bb_upper, bb_lower = bollinger_bands(matrix.close, 20)
+    vol_avg20, _ = volume_ratio(matrix.volume, 20)
+    return {
+        "close": matrix.close,
+        "volume": matrix.volume,
+        "ma5": rolling_mean(matrix.close, 5),
+        "ma20": rolling_mean(matrix.close, 20),
+        "bb_upper": bb_upper,
+        "bb_lower": bb_lower,
+        "rsi14": rsi(matrix.close, 14),
+        "vol_avg20": vol_avg20,
+    }
+
+
+def indicator_rows(matrix, indicators, date_str):
+    '''
+    - 특정 날짜 한 열을 티커 index × INDICATOR_COLUMNS DataFrame으로 추출 (행렬에 없는 날짜면 None)
+    '''
+    col = matrix.column(date_str)
+    if col is None:
+        return None
+    rows = pd.DataFrame({name: indicators[name][:, col] for name in INDICATOR_COLUMNS}, index=matrix.tickers)
+    rows.index.name = "ticker"
+    return rows
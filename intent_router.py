@@ -0,0 +1,130 @@
+'''
+- 첫 번째 LLM 호출 전에 실행하는 규칙 기반 질문 해석기 (fast path)
+- 자주 들어오는 단순 조회 질문을 종목명 인덱스와 TOOLS 명세의 enum 값으로 직접 해석하여, LLM과 같은 형태의 함수 호출(toolCalls)을 만듦
+    - "<종목> <날짜> <시가/고가/저가/종가/거래량/등락률>"  → get_stock_metric
+    - "<날짜> 코스피(코스닥) 지수"                         → get_market_index
+    - "<A>랑 <B> 중 <날짜> <지표>가 더 높은 종목"           → compare_stocks
+    - "<날짜> 코스피와 코스닥 중 더 높은 지수"             → compare_market_indices
+- 질문의 모든 부분이 템플릿으로 설명되지 않으면(남는 단어가 있으면) 해석하지 않고 LLM에 맡김
+'''
+import re
+
+from answer_cache import normalize_query
+from function_caller import TOOLS
+from ticker_index import get_ticker_index
+
+
+def _enum(function_name, parameter):
+    for tool in TOOLS:
+        if tool["function"]["name"] == function_name:
+            return list(tool["function"]["parameters"]["properties"][parameter]["enum"])
+    return []
+
+
+# TOOLS 명세의 enum 값 (지표는 긴 이름부터 찾음)
+STOCK_METRICS = sorted(_enum("get_stock_metric", "metric"), key=len, reverse=True)
+MARKETS = _enum("get_market_index", "market")
+
+# 시장 이름 표기 → TOOLS enum 값
+MARKET_ALIASES = {"코스피": "KOSPI", "kospi": "KOSPI", "코스닥": "KOSDAQ", "kosdaq": "KOSDAQ"}
+
+# 비교 방향 표현
+HIGHER_WORDS = ("높은", "높아", "높았", "큰", "많은", "많아", "많았")
+LOWER_WORDS = ("낮은", "낮아", "낮았", "작은", "적은", "적어", "적었")
+COMPARE_WORDS = ("중", "비교", "더")
+
+# 템플릿에 해당하는 단어를 지운 뒤 남아도 되는 조사, 어미, 의문 표현
+FILLER_WORDS = [
+    "알려주세요", "알려줄래", "알려줘", "알려", "주세요", "줘", "보여줘", "조회해줘", "조회", "확인해줘", "확인",
+    "얼마였나요", "얼마인가요", "얼마였어", "얼마예요", "얼마야", "얼마", "어땠나요", "어땠어", "어때요", "어때",
+    "어떻게됐어", "어떻게돼", "뭐였어", "뭐야", "인가요", "였나요", "였어", "이야", "이에요", "예요", "야", "요",
+    "기준으로", "기준", "중에서", "중에", "중", "비교해줘", "비교", "이랑", "하고", "그리고", "및", "랑", "와", "과",
+    "에서", "에", "으로", "로", "의", "은", "는", "이", "가", "을", "를", "좀", "일자", "날", "당시",
+    "어느쪽", "어디가", "어디", "어느", "쪽", "종목", "더", "지수",
+] + list(HIGHER_WORDS) + list(LOWER_WORDS)
+_FILLER = re.compile("|".join(re.escape(w) for w in sorted(set(FILLER_WORDS), key=len, reverse=True)))
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_MARKET = re.compile("|".join(re.escape(w) for w in sorted(MARKET_ALIASES, key=len, reverse=True)))
+
+
+def _remove_spans(text, spans):
+    chars = list(text)
+    for start, end in spans:
+        for i in range(start, end):
+            chars[i] = " "
+    return "".join(chars)
+
+
+def _is_explained(residual):
+    '''템플릿으로 해석한 부분을 지운 나머지가 조사/어미뿐인지'''
+    return not _FILLER.sub("", residual.replace(" ", ""))
+
+
+def _comparison(text):
+    if any(word in text for word in LOWER_WORDS):
+        return "lower"
+    return "higher"
+
+
+def _tool_call(index, name, arguments):
+    return {"id": f"router-{index}", "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+def route(query, today=None):
+    '''
+    - 질문을 템플릿으로 해석할 수 있으면 LLM 응답과 같은 형태의 toolCalls 목록을, 아니면 None을 반환
+    '''
+    text = normalize_query(query, today)
+    # "최근", "요즘" 같은 모호한 표현은 LLM에 맡김 (되묻기 판단 필요)
+    if ":" in text:
+        return None
+
+    spans = []
+    dates = [(m.start(), m.end(), m.group()) for m in _ISO_DATE.finditer(text)]
+    if len({d for _, _, d in dates}) != 1:
+        return None
+    date = dates[0][2]
+    spans.extend((s, e) for s, e, _ in dates)
+
+    markets = [(m.start(), m.end(), MARKET_ALIASES[m.group()]) for m in _MARKET.finditer(text)]
+    spans.extend((s, e) for s, e, _ in markets)
+    markets = sorted({m for _, _, m in markets if m in MARKETS})
+
+    # 날짜/시장 이름을 지운 나머지에서 지표와 종목명을 찾음
+    remaining = _remove_spans(text, spans)
+    metrics = []
+    for metric in STOCK_METRICS:
+        for m in re.finditer(re.escape(metric), remaining):
+            metrics.append(metric)
+            spans.append((m.start(), m.end()))
+            remaining = _remove_spans(remaining, [(m.start(), m.end())])
+
+    names = []
+    for start, end, name in get_ticker_index().find_names(remaining):
+        names.append(name)
+        spans.append((start, end))
+    remaining = _remove_spans(remaining, spans)
+
+    if not _is_explained(remaining):
+        return None
+
+    metrics = list(dict.fromkeys(metrics))
+    names = list(dict.fromkeys(names))
+    has_index_word = "지수" in text
+    is_comparison = any(word in text for word in COMPARE_WORDS)
+
+    if len(names) == 1 and len(metrics) == 1 and not markets and not has_index_word:
+        return [_tool_call(0, "get_stock_metric", {"date": date, "stock_name": names[0], "metric": metrics[0]})]
+
+    if len(names) == 2 and len(metrics) == 1 and not markets and is_comparison:
+        return [_tool_call(0, "compare_stocks", {
+            "date": date, "stock1": names[0], "stock2": names[1], "metric": metrics[0], "comparison": _comparison(text),
+        })]
+
+    if not names and not metrics and len(markets) == 1 and has_index_word:
+        return [_tool_call(0, "get_market_index", {"date": date, "market": markets[0]})]
+
+    if not names and not metrics and len(markets) == 2 and has_index_word and is_comparison:
+        return [_tool_call(0, "compare_market_indices", {"date": date, "comparison": _comparison(text)})]
+
+    return None
@@ -0,0 +1,47 @@
+'''
+- 무거운 라이브러리(pandas, numpy, yfinance, pykrx, FinanceDataReader, aiohttp 등)를 처음 사용할 때 import하는 지연 모듈
+- 모듈 최상단의 `import pandas as pd` 대신 `pd = lazy_module("pandas")`로 두면, 실제 import는 pd의 속성에 처음 접근하는 시점에 일어남
+- CLI 시작, SKILL_HANDLERS/TOOLS import 같은 경로에서 데이터 라이브러리 로딩 비용을 없애 첫 화면이 바로 뜨도록 함
+'''
+import importlib
+import threading
+import types
+
+_IMPORT_LOCK = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    '''
+    - 속성에 처음 접근할 때 실제 모듈을 import하고, 이후에는 실제 모듈의 속성을 그대로 돌려주는 대리 모듈
+    '''
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _IMPORT_LOCK:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # 다음 접근부터는 일반 속성 조회로 처리
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name):
+    '''name 모듈을 첫 사용 시점에 import하는 대리 모듈을 반환 (예: lazy_module("pykrx.stock"))'''
+    return LazyModule(name)
@@ -0,0 +1,225 @@
+'''
+- CLOVA Studio Chat Completions API를 호출하는 비동기 HTTP 클라이언트
+- 연결을 재사용(keep-alive)하는 aiohttp 세션 하나로 모든 호출을 처리하여 매 턴의 TCP/TLS 연결 비용을 없앰
+- 연결/응답 대기 시간 제한과, 네트워크 오류·429·5xx에 대한 제한된 횟수의 재시도(지터를 섞은 지수 백오프)를 적용
+- 최종 답변은 스트리밍(SSE)으로 받아 토큰이 도착하는 대로 전달할 수 있음
+- 동기 코드(main.py 등)에서는 백그라운드 이벤트 루프 위에서 실행하는 run_sync로 호출
+'''
+import asyncio
+import atexit
+import json
+import random
+import threading
+
+from config import Config
+from lazy_import import lazy_module
+from metrics import REGISTRY
+from tracing import bind_coroutine, current_span
+
+aiohttp = lazy_module("aiohttp")
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적인 서버 오류)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# API 오류 응답/네트워크 오류 수 (reason: HTTP 상태 코드 또는 예외 종류, 재시도한 오류 포함)
+LLM_HTTP_ERRORS = REGISTRY.counter("llm_http_errors_total", "Chat Completions API 오류 수 (재시도한 오류 포함)", ("reason",))
+
+
+class LLMRequestError(Exception):
+    '''재시도 후에도 API 호출에 실패했을 때 발생'''
+
+
+class ChatCompletionsClient:
+    '''
+    - 이벤트 루프마다 하나의 aiohttp 세션(커넥션 풀)을 만들어 재사용
+    - 요청 본문은 호출하는 쪽에서 직렬화한 bytes를 그대로 전송
+    '''
+    def __init__(self, url=None, api_key=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, retry_backoff=None, max_connections=None):
+        self.url = url or Config.CHAT_COMPLETIONS_API
+        self.api_key = api_key if api_key is not None else Config.API_KEY
+        self.connect_timeout = connect_timeout or Config.LLM_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.LLM_READ_TIMEOUT
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = retry_backoff or Config.LLM_RETRY_BACKOFF
+        self.max_connections = max_connections or Config.LLM_MAX_CONNECTIONS
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def headers(self):
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json; charset=utf-8',
+        }
+
+    def _session(self):
+        '''현재 이벤트 루프에 묶인 세션 (없으면 생성)'''
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                timeout = aiohttp.ClientTimeout(
+                    total=None,
+                    connect=self.connect_timeout,
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout,
+                )
+                connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+                session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+                self._sessions[loop] = session
+            return session
+
+    async def post(self, body):
+        '''
+        - 직렬화된 요청 본문(bytes)을 전송하고 JSON 응답을 반환
+        - 재시도할 수 없는 오류(4xx 등)나 재시도 횟수를 넘긴 오류는 LLMRequestError로 전달
+        '''
+        if not self.url:
+            raise LLMRequestError("API URL이 config.py에 설정되지 않았습니다.")
+
+        session = self._session()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with session.post(self.url, data=body) as response:
+                    if response.status >= 400:
+                        LLM_HTTP_ERRORS.inc(reason=str(response.status))
+                    if response.status not in RETRY_STATUSES:
+                        if response.status >= 400:
+                            text = await response.text()
+                            raise LLMRequestError(f"HTTP {response.status}: {text[:200]}")
+                        return json.loads(await response.read())
+                    error = LLMRequestError(f"HTTP {response.status}")
+                    retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                LLM_HTTP_ERRORS.inc(reason=type(e).__name__)
+                error = LLMRequestError(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def stream(self, body):
+        '''
+        - 스트리밍(SSE) 요청을 보내고 (event, data) 쌍을 도착하는 대로 반환하는 비동기 제너레이터
+        - 첫 이벤트를 받기 전의 실패만 재시도하고, 스트림 도중의 오류는 그대로 LLMRequestError로 전달
+        '''
+        if not self.url:
+            raise LLMRequestError("API URL이 config.py에 설정되지 않았습니다.")
+
+        session = self._session()
+        headers = {'Accept': 'text/event-stream'}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            started = False
+            try:
+                async with session.post(self.url, data=body, headers=headers) as response:
+                    if response.status >= 400:
+                        LLM_HTTP_ERRORS.inc(reason=str(response.status))
+                    if response.status not in RETRY_STATUSES:
+                        if response.status >= 400:
+                            text = await response.text()
+                            raise LLMRequestError(f"HTTP {response.status}: {text[:200]}")
+                        async for event in _iter_sse(response.content):
+                            started = True
+                            yield event
+                        return
+                    error = LLMRequestError(f"HTTP {response.status}")
+                    retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                LLM_HTTP_ERRORS.inc(reason=type(e).__name__)
+                error = LLMRequestError(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+                if started:
+                    raise error
+
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    def _backoff(self, attempt, retry_after=None):
+        # 여러 요청이 동시에 재시도하지 않도록 지수 백오프 구간 안에서 무작위로 대기 (full jitter)
+        delay = random.uniform(0, self.retry_backoff * (2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.read_timeout))
+        return delay
+
+    async def aclose(self):
+        '''현재 이벤트 루프의 세션을 닫음'''
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+async def _iter_sse(content):
+    '''
+    - text/event-stream 본문을 읽어 (event 이름, data JSON) 쌍으로 반환
+    - data가 JSON이 아니면 문자열 그대로 반환
+    '''
+    event, data_lines = "message", []
+    async for raw_line in content:
+        line = raw_line.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield event, _parse_sse_data("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+    if data_lines:
+        yield event, _parse_sse_data("\n".join(data_lines))
+
+
+def _parse_sse_data(data):
+    try:
+        return json.loads(data)
+    except ValueError:
+        return data
+
+
+def _retry_after_seconds(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- 동기 코드에서 호출하기 위한 백그라운드 이벤트 루프 ---
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop():
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llm-client-loop", daemon=True).start()
+        return _LOOP
+
+
+def run_sync(coro):
+    '''
+    - 코루틴을 백그라운드 이벤트 루프에서 실행하고 결과를 기다려 반환
+    - 모든 동기 호출이 같은 루프(같은 세션)를 쓰므로 연결이 턴 사이에 재사용됨
+    - 추적 중이면 호출한 쪽의 현재 구간을 백그라운드 루프의 코루틴에 이어 줌
+    '''
+    parent = current_span()
+    if parent is not None:
+        coro = bind_coroutine(coro, parent)
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+@atexit.register
+def _close_background_session():
+    if _LOOP is not None and _LOOP.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(LLM_CLIENT.aclose(), _LOOP).result(timeout=5)
+        except Exception:
+            pass
+
+
+# 모든 호출이 공유하는 기본 클라이언트
+LLM_CLIENT = ChatCompletionsClient()
@@ -0,0 +1,254 @@
+'''
+- 에이전트 전체 흐름(agent.arun_turn)의 단계별 지연 시간 부하 테스트
+- README 예시 질문을 동시 요청 수를 늘려 가며(기본값: Config.LOAD_TEST_CONCURRENCY) 실행하고, 단계마다 p50/p95/p99를 출력
+    - 단계: route(규칙 해석), first_llm, tools, template, second_llm, first_token(스트리밍), total
+- LLM은 로컬 가짜 서버(mock_llm_server.py)를 같은 프로세스에서 띄워 사용하고(--llm-url로 외부 서버 지정 가능), 시세는 합성 fixture를 사용하여 네트워크 없이 실행
+- 결과를 기준값(baseline) JSON으로 저장하거나, 저장된 기준값과 비교하여 전체 지연 시간의 p95/p99가 늘어난 동시 요청 수가 있으면 종료 코드 1을 반환
+'''
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 시세는 항상 합성 fixture로, 시세 저장소는 부하 테스트 전용 임시 디렉터리로 하고 종료 시 삭제 (config import 전에 설정)
+# 환경 변수로 지정된 FIN_DATA_PROVIDER(live 등)나 FIN_DATA_DIR(실제 저장소)은 쓰지 않음 (합성 시세가 실제 저장소에 섞이지 않도록)
+LOAD_DATA_DIR = tempfile.mkdtemp(prefix="fin-load-")
+os.environ["FIN_DATA_PROVIDER"] = "fixture"
+os.environ["FIN_DATA_DIR"] = LOAD_DATA_DIR
+atexit.register(shutil.rmtree, LOAD_DATA_DIR, ignore_errors=True)
+
+from aiohttp import web
+
+from config import Config
+from market_fixture import DEFAULT_END_DATE, build_fixture, fixture_exists
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "load_test_baseline.json")
+DEFAULT_TOLERANCE = 0.2
+
+# README 예시 질문 ("어제", "오늘"은 fixture 날짜로 바꿈)
+README_QUESTIONS = [
+    "삼성전자 {date} 종가 알려줘",
+    "{date} 코스피 지수 어때?",
+    "{date} 코스닥에서 가장 많이 오른 종목 5개 알려줘",
+    "{date} 거래량이 가장 많았던 코스피 종목은 뭐야?",
+    "카카오랑 네이버 중에 {date} 종가 더 높은게 뭐야?",
+    "삼성전자랑 SK하이닉스 {date} 시가총액 비교해줘",
+    "{date} 코스피 시장의 평균 등락률 알려줘",
+    "{date} 삼성전자 거래량이 전체 시장에서 차지하는 비중은 몇 프로야?",
+    "셀트리온의 {date} 거래량 순위 알려줘",
+    "삼성전자랑 SK하이닉스 중에 {date} 종가 기준으로 어디가 더 높아?",
+    "삼성전자 {date} 종가랑 코스피 지수 알려줘",
+]
+
+STAGES = ("route", "first_llm", "tools", "template", "second_llm", "first_token", "total")
+
+
+def configure_caches(mode):
+    '''
+    - 캐시 사용 방식 설정 후 비움 (none: 모두 끔, tool: 함수 결과 캐시만 사용, all: 답변 캐시까지 사용)
+    - 같은 질문을 반복하므로 답변 캐시를 켜면 대부분 캐시 적중만 측정됨
+    '''
+    from answer_cache import ANSWER_CACHE
+    from tool_cache import TOOL_CACHE
+
+    ANSWER_CACHE.max_entries = Config.ANSWER_CACHE_MAX_ENTRIES if mode == "all" else 0
+    # max_entries=0이어도 같은 호출끼리 키 잠금에서 차례로 기다리므로, 끌 때는 캐시를 아예 거치지 않도록 함
+    TOOL_CACHE.enabled = mode in ("tool", "all")
+    ANSWER_CACHE.clear()
+    TOOL_CACHE.clear()
+
+
+async def arun_level(questions, concurrency, requests, stream=False):
+    '''questions를 차례로 requests개 실행하되 동시에 concurrency개씩 처리하고, (턴 기록 목록, 경과 시간) 반환'''
+    from agent import arun_turn
+
+    records = []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            query = questions[next_index % len(questions)]
+            next_index += 1
+            try:
+                turn = await arun_turn(query, stream=stream, on_token=(lambda token: None) if stream else None)
+                records.append({"timings": turn["timings"], "routed": turn["routed"], "error": None})
+            except Exception as e:
+                records.append({"timings": {}, "routed": False, "error": f"{type(e).__name__}: {e}"})
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return records, time.perf_counter() - started
+
+
+def summarize_level(records, elapsed, concurrency):
+    '''동시 요청 수 하나의 결과 요약 (처리량, 오류/규칙 해석 건수, 단계별 p50/p95/p99)'''
+    from batch import percentile
+
+    stages = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in records if stage in r["timings"]]
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+            }
+    return {
+        "concurrency": concurrency,
+        "turns": len(records),
+        "errors": sum(1 for r in records if r["error"]),
+        "routed": sum(1 for r in records if r["routed"]),
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(records) / elapsed, 3) if elapsed else 0.0,
+        "stages": stages,
+    }
+
+
+def print_level(summary):
+    print(f"\n동시 요청 {summary['concurrency']}개: {summary['turns']}턴, {summary['throughput']}턴/초 "
+          f"(오류 {summary['errors']}, 규칙 해석 {summary['routed']})")
+    print(f"  {'stage':<12} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, stats in summary["stages"].items():
+        print(f"  {stage:<12} {stats['count']:6d} {stats['p50']:8.3f} {stats['p95']:8.3f} {stats['p99']:8.3f}")
+
+
+async def _start_mock_server(**mock_kwargs):
+    import mock_llm_server
+
+    runner = web.AppRunner(mock_llm_server.create_app(**mock_kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/testapp/v3/chat-completions/{Config.MODEL_NAME}"
+
+
+async def arun_load_test(levels, requests=None, date=DEFAULT_END_DATE, stream=False, llm_url=None,
+                         cache="tool", mock_kwargs=None):
+    '''
+    - 동시 요청 수(levels)마다 부하 테스트를 실행하고 요약 목록 반환
+    - requests: 동시 요청 수마다 실행할 턴 수 (기본값: max(질문 수, 동시 요청 수 × 4))
+    '''
+    from llm_client import LLM_CLIENT
+    from ticker_index import get_ticker_index
+    from trading_calendar import get_trading_calendar
+
+    runner = None
+    if llm_url is None:
+        runner, llm_url = await _start_mock_server(**(mock_kwargs or {}))
+    LLM_CLIENT.url = llm_url
+
+    # 종목 인덱스와 거래일 달력은 모든 턴이 공유하므로 측정 전에 준비
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, get_trading_calendar)
+    await loop.run_in_executor(None, get_ticker_index)
+
+    questions = [q.format(date=date) for q in README_QUESTIONS]
+    summaries = []
+    try:
+        for concurrency in levels:
+            configure_caches(cache)
+            records, elapsed = await arun_level(questions, concurrency, requests or max(len(questions), concurrency * 4), stream)
+            summaries.append(summarize_level(records, elapsed, concurrency))
+            print_level(summaries[-1])
+    finally:
+        await LLM_CLIENT.aclose()
+        if runner is not None:
+            await runner.cleanup()
+    return summaries
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    '''같은 동시 요청 수의 전체 지연 시간 p95/p99가 (1 + tolerance)배를 넘으면 [(동시 요청 수, 항목, 기준값, 현재값)]으로 반환'''
+    before_by_level = {s["concurrency"]: s for s in baseline.get("levels", [])}
+    regressions = []
+    for now in current["levels"]:
+        before = before_by_level.get(now["concurrency"])
+        if before is None or "total" not in before["stages"] or "total" not in now["stages"]:
+            continue
+        for q in ("p95", "p99"):
+            if now["stages"]["total"][q] > before["stages"]["total"][q] * (1 + tolerance):
+                regressions.append((now["concurrency"], f"total_{q}", before["stages"]["total"][q], now["stages"]["total"][q]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="에이전트 단계별 지연 시간 부하 테스트")
+    parser.add_argument("--concurrency", default=",".join(map(str, Config.LOAD_TEST_CONCURRENCY)), help="동시 요청 수 목록 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, help="동시 요청 수마다 실행할 턴 수")
+    parser.add_argument("--date", default=DEFAULT_END_DATE, help="질문에 넣을 날짜 (fixture 범위 안)")
+    parser.add_argument("--stream", action="store_true", help="최종 답변을 스트리밍으로 받음 (first_token 측정)")
+    parser.add_argument("--cache", choices=("none", "tool", "all"), default="tool", help="캐시 사용 방식")
+    parser.add_argument("--llm-url", help="외부 Chat Completions 주소 (기본값: 가짜 서버를 같은 프로세스에서 실행)")
+    parser.add_argument("--tool-latency", default="lognormal:0.8,0.3", help="가짜 서버의 첫 번째 호출 지연 시간 분포")
+    parser.add_argument("--answer-latency", default="lognormal:1.2,0.3", help="가짜 서버의 두 번째 호출 지연 시간 분포")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 서버가 503으로 실패시킬 요청 비율")
+    parser.add_argument("--seed", type=int, default=42, help="가짜 서버 난수 seed")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="비교할 기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="회귀로 판단할 증가 비율 (0.2 = 20%%)")
+    parser.add_argument("-o", "--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if Config.DATA_PROVIDER == "fixture" and not fixture_exists():
+        print(f"🧪 합성 시세 fixture 생성 중... ({Config.FIXTURE_DIR})", file=sys.stderr)
+        build_fixture()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    mock_kwargs = {
+        "tool_latency": args.tool_latency,
+        "answer_latency": args.answer_latency,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+    summaries = asyncio.run(arun_load_test(levels, args.requests, args.date, args.stream, args.llm_url, args.cache, mock_kwargs))
+    current = {
+        "settings": {"requests": args.requests, "date": args.date, "stream": args.stream, "cache": args.cache, **mock_kwargs},
+        "levels": summaries,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 기준값 저장: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != current["settings"]:
+        print("\n⚠️ 기준값과 실행 설정이 달라 비교하지 않습니다.")
+        return 0
+    regressions = compare(current, baseline, args.tolerance)
+    for concurrency, metric, before, now in regressions:
+        print(f"❌ 동시 요청 {concurrency}개: {metric} {before}초 → {now}초")
+    if regressions:
+        return 1
+    print("\n✅ 기준값 대비 지연 시간 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+'''
+실행 예시
+python load_test.py                                            # 동시 요청 1, 4, 16, 32개
+python load_test.py --concurrency 8,64 --stream --error-rate 0.02
+python load_test.py --save-baseline                            # 기준값 저장 후, 배포 전 python load_test.py로 비교
+python mock_llm_server.py --port 8090 & python load_test.py --llm-url http://127.0.0.1:8090/testapp/v3/chat-completions/HCX-005
+'''
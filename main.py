@@ -3,83 +3,118 @@
 - 동작 방식
     1. 사용자가 질문을 입력
     2. function_caller.py의 get_llm_function_call을 호출하여, LLM이 사용자의 질문을 분석하고 어떤 도구(함수)를 사용할지 결정
-    3. 만약 LLM이 함수 사용을 결정하면, skillset.py에 정의된 해당 함수(예: get_stock_metric)를 실행하여 데이터를 가져옴
+    3. 만약 LLM이 함수 사용을 결정하면, skillset.py에 정의된 해당 함수들(예: get_stock_metric)을 동시에 실행하여 데이터를 가져옴
     4. 가져온 데이터를 바탕으로 다시 get_llm_function_call을 호출하여 최종 사용자 답변을 생성
+       (--stream 옵션을 주면 최종 답변을 스트리밍으로 받아 토큰이 도착하는 대로 출력)
+- 한 턴의 처리 흐름은 agent.py에 있음
+- 대화 기록은 history.ChatHistory가 토큰 예산 안에서 관리 (오래된 턴은 다룬 종목/날짜/시장 요약으로 합침)
+- --trace 디렉터리(또는 FIN_TRACE_DIR)를 지정하면 턴마다 LLM 호출, 함수 실행, 시세 조회 구간을 추적하여 JSON과 Chrome trace 파일로 저장
+- 질문 앞에 ":profile"을 붙이면(또는 --profile로 모든 턴을) 그 턴을 표본 추출 프로파일러와 tracemalloc으로 측정하여 접힌 스택(불꽃 그래프용)과 핫스팟 요약을 저장
 '''
-import json
-import time
-from function_caller import get_llm_function_call
-from skillset import SKILL_HANDLERS
+import argparse
+from contextlib import nullcontext
+from agent import run_turn
+from config import Config
+from history import ChatHistory
+from metrics import start_exporters
+from profiling import profile
+from tracing import start_trace
 
-def main():
+def print_trace_summary(trace, paths, top=5):
+    # 시간을 가장 많이 쓴 구간 이름 top개와 저장 경로 출력
+    print(f"🔎 추적 저장: {paths[0]} (Chrome trace: {paths[1]})")
+    for name, stats in list(trace.summary().items())[:top]:
+        print(f"   {name:<24} {stats['count']:5d}회  합계 {stats['total']:.3f}초  최대 {stats['max']:.3f}초")
+
+# 이 접두어로 시작하는 질문은 해당 턴만 프로파일링
+PROFILE_PREFIX = ":profile"
+
+def print_profile_summary(current, paths, top=Config.PROFILE_TOP):
+    # 시간을 가장 많이 쓴 함수(self)와 프로젝트 코드 줄, 메모리 할당 최대치 출력
+    hotspots = current.hotspots(top)
+    print(f"🔬 프로파일 저장: {paths[0]} (불꽃 그래프용 접힌 스택: {paths[1]})")
+    print(f"   표본 {current.samples}개 (유휴 {current.idle_samples}개), {current.duration:.3f}초, 간격 {current.interval * 1000:.0f}ms")
+    for title, key in (("함수(self)", "self"), ("코드 줄", "lines")):
+        print(f"   [{title}]")
+        for row in hotspots[key]:
+            print(f"   {row['ratio'] * 100:5.1f}%  {row['samples']:5d}  {row['name']}")
+    if current.memory_peak is not None:
+        print(f"   [메모리] 할당 최대치 {current.memory_peak / 1024 / 1024:.1f}MB")
+        for row in current.memory_top(5):
+            print(f"   {row['size'] / 1024:9.1f}KB  {row['count']:6d}개  {row['location']}")
+
+def main(stream=False, trace_dir=None, profile_all=False, profile_dir=Config.PROFILE_DIR):
     initial_message = '하이~ 나는 금융 AI 에이전트 정비스🤖다.\n'
     print(initial_message)
 
-    chat_history = []
+    # FIN_METRICS_PORT / FIN_METRICS_FILE을 지정한 경우에만 지표를 내보냄
+    start_exporters()
+
+    chat_history = ChatHistory()
 
     while True:
         query = input("질문: ")
         if query.lower() in ["exit", "quit"]:
             print("🤖: 바이바이")
             break
-        
-        start_time = time.time()
-
-        # 현재 턴의 메시지 기록 (대화 기록과 별도 관리)
-        current_messages = [{"role": "user", "content": query}]
-        
-        # 1. 사용자 질문을 LLM에게 보내 함수 호출 정보를 얻음
-        # 이전 대화 기록(chat_history)을 함께 전달하여 맥락 유지
-        llm_response = get_llm_function_call(None, chat_history + current_messages)
-        
-        message = llm_response.get("result", {}).get("message", {})
-        
-        # LLM의 응답(tool_calls 포함 가능)을 현재 턴의 기록에 추가
-        current_messages.append(message)
-        final_answer = ""
-        
-        # 2. LLM이 함수 호출을 결정했는지 확인
-        if message.get("toolCalls"):
-            tool_call = message["toolCalls"][0]
-            function_name = tool_call["function"]["name"]
-            function_args = tool_call["function"]["arguments"]
-            tool_call_id = tool_call["id"]
-
-            if function_name in SKILL_HANDLERS:
-                handler = SKILL_HANDLERS[function_name]
-                try:
-                    function_result = handler(**function_args)
-                    
-                    # 함수 실행 결과를 현재 턴의 기록에 추가
-                    current_messages.append({
-                        "role": "tool",
-                        "content": str(function_result), # 결과를 문자열로 변환
-                        "toolCallId": tool_call_id
-                    })
-                    
-                    # 3. 전체 대화 흐름(이전 기록 + 현재 턴)을 포함하여 다시 LLM을 호출
-                    second_response = get_llm_function_call(None, chat_history + current_messages)
-                    final_answer = second_response.get("result", {}).get("message", {}).get("content", "최종 답변 생성에 실패")
-                    
-                except Exception as e:
-                    final_answer = f"Function Execution Error: {function_name} 실행 중 오류 발생: {e}"
-            else:
-                final_answer = f"Error: LLM이 알 수 없는 함수({function_name})를 호출"
+
+        profiling = profile_all
+        if query.startswith(PROFILE_PREFIX):
+            query = query[len(PROFILE_PREFIX):].strip()
+            profiling = True
+            if not query:
+                print(f"사용법: {PROFILE_PREFIX} <질문>")
+                continue
+
+        streamed = False
+
+        def print_token(token):
+            nonlocal streamed
+            if not streamed:
+                print("🤖: ", end="", flush=True)
+                streamed = True
+            print(token, end="", flush=True)
+
+        with start_trace("turn", query=query) if trace_dir else nullcontext() as trace, \
+                profile("turn", query=query) if profiling else nullcontext() as profiled:
+            turn = run_turn(query, chat_history.messages(), stream=stream, on_token=print_token,
+                            previous_tools=chat_history.last_tool_names())
+        final_answer = turn["answer"]
+
+        if streamed:
+            print("\n")
         else:
-            final_answer = message.get("content", "응답을 생성하지 못했습니다.")
+            print(f"🤖: {final_answer}\n")
+
+        timings = turn["timings"]
+        if "first_token" in timings:
+            print(f"⚡ 첫 토큰까지 걸린 시간: {timings['first_token']:.2f}초")
+        print(f"⏳ 답변까지 걸린 시간: {timings['total']:.2f}초")
+        if trace is not None:
+            print_trace_summary(trace, trace.write(trace_dir))
+        if profiled is not None:
+            print_profile_summary(profiled, profiled.write(profile_dir))
+        print("=" * 100)
 
-        print(f"🤖: {final_answer}\n")
-        
-        # 전체 대화 기록에 현재 턴의 사용자 질문과 최종 답변만 추가
-        chat_history.append({"role": "user", "content": query})
-        chat_history.append({"role": "assistant", "content": final_answer})
+        # 대화 기록에 현재 턴의 사용자 질문과 최종 답변만 추가 (함수 인자는 요약용 대상으로 사용)
+        chat_history.append(query, final_answer, turn["tool_calls"])
 
 
 if __name__ == "__main__":
-    main() 
+    parser = argparse.ArgumentParser(description="금융 정보 에이전트")
+    parser.add_argument("--stream", action="store_true", help="최종 답변을 스트리밍으로 출력")
+    parser.add_argument("--trace", default=Config.TRACE_DIR, help="턴마다 추적(JSON, Chrome trace)을 저장할 디렉터리")
+    parser.add_argument("--profile", action="store_true", help=f"모든 턴을 프로파일링 (한 턴만 하려면 질문 앞에 '{PROFILE_PREFIX}')")
+    parser.add_argument("--profile-dir", default=Config.PROFILE_DIR, help="프로파일(JSON, 접힌 스택)을 저장할 디렉터리")
+    args = parser.parse_args()
+    main(stream=args.stream, trace_dir=args.trace, profile_all=args.profile, profile_dir=args.profile_dir)
     
     
 '''
 실행 예시
 python main.py
+python main.py --stream
+python main.py --trace traces/   # traces/<trace_id>.trace.json을 chrome://tracing 또는 Perfetto에서 열기
+python main.py --profile         # 모든 턴을 프로파일링 (data/profiles/<profile_id>.folded를 flamegraph.pl 또는 speedscope로 보기)
+질문: :profile 삼성전자 최근 1년 골든크로스 날짜 알려줘   # 이 턴만 프로파일링
 '''
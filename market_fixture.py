@@ -0,0 +1,203 @@
+'''
+- 네트워크 없이 스킬을 실행하기 위한 합성 시세 데이터(fixture)
+- KRX 전체 규모(KOSPI 약 950개, KOSDAQ 약 1,750개 종목)의 1년치 거래일 일봉과 KOSPI/KOSDAQ 지수를 seed로 결정적으로 생성하여 디스크에 저장
+    - bars.npy: (종목, 거래일, 시가/고가/저가/종가/거래량) float64 배열 (거래정지일은 NaN)
+    - meta.json: 거래일, 티커, 종목명, 시장, 상장주식수, 생성 설정
+- FixtureProvider는 이 파일로 providers의 조회 인터페이스(일봉, 시장 스냅샷, 상장 목록, 상장주식수, 영업일)를 제공
+- 같은 설정으로 만든 fixture는 항상 같은 값이므로 벤치마크 결과를 기준값(baseline)과 비교할 수 있음
+'''
+import json
+import os
+from datetime import datetime
+
+from config import Config
+from lazy_import import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+FIXTURE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+SNAPSHOT_COLUMNS = ["시가", "고가", "저가", "종가", "거래량", "거래대금", "등락률"]
+
+# 기본 생성 설정 (마지막 거래일, 거래일 수, 시장별 종목 수, 난수 seed)
+DEFAULT_END_DATE = "2025-06-30"
+DEFAULT_SESSIONS = 250
+DEFAULT_COUNTS = {"KOSPI": 950, "KOSDAQ": 1750}
+DEFAULT_SEED = 42
+
+# 질문 예시에 자주 나오는 실제 종목 (코드, 이름, 시장, 상장주식수)
+KNOWN_STOCKS = [
+    ("005930", "삼성전자", "KOSPI", 5_969_782_550),
+    ("000660", "SK하이닉스", "KOSPI", 728_002_365),
+    ("035720", "카카오", "KOSPI", 442_180_000),
+    ("051910", "LG화학", "KOSPI", 70_592_343),
+    ("005380", "현대차", "KOSPI", 209_416_191),
+    ("068270", "셀트리온", "KOSPI", 216_916_727),
+    ("035420", "NAVER", "KOSPI", 158_437_008),
+    ("247540", "에코프로비엠", "KOSDAQ", 97_801_344),
+    ("086520", "에코프로", "KOSDAQ", 133_138_340),
+    ("196170", "알테오젠", "KOSDAQ", 53_395_740),
+]
+MARKET_SUFFIX = {"KOSPI": ".KS", "KOSDAQ": ".KQ"}
+# 지수 티커 (시작 값, 일 변동성)
+INDEX_TICKERS = {"^KS11": 2600.0, "^KQ11": 800.0}
+
+
+def _path(root, filename):
+    return os.path.join(root or Config.FIXTURE_DIR, filename)
+
+
+def fixture_exists(root=None):
+    return os.path.exists(_path(root, "bars.npy")) and os.path.exists(_path(root, "meta.json"))
+
+
+def build_fixture(root=None, end_date=DEFAULT_END_DATE, sessions=DEFAULT_SESSIONS, counts=None, seed=DEFAULT_SEED):
+    '''
+    - 합성 시세 fixture를 생성하여 root(기본값: Config.FIXTURE_DIR)에 저장하고 meta를 반환
+    - 가격은 종목별 변동성을 가진 로그 정규 랜덤 워크(일 변동폭 ±30% 제한), 거래량은 종목별 평균 주변의 로그 정규 분포
+    '''
+    root = root or Config.FIXTURE_DIR
+    counts = counts or DEFAULT_COUNTS
+    rng = np.random.default_rng(seed)
+    session_dates = pd.bdate_range(end=end_date, periods=sessions).strftime("%Y-%m-%d").tolist()
+
+    # 상장 목록: 실제 종목 + 시장별 가상 종목
+    listing = [(code, name, market, shares) for code, name, market, shares in KNOWN_STOCKS]
+    used_codes = {code for code, _, _, _ in listing}
+    next_code = 100000
+    for market, count in counts.items():
+        for i in range(count - sum(1 for s in KNOWN_STOCKS if s[2] == market)):
+            while f"{next_code:06d}" in used_codes:
+                next_code += 1
+            code = f"{next_code:06d}"
+            used_codes.add(code)
+            shares = int(np.exp(rng.uniform(np.log(2e6), np.log(5e8))))
+            listing.append((code, f"가상{market}{i + 1:04d}", market, shares))
+
+    tickers = [f"{code}{MARKET_SUFFIX[market]}" for code, _, market, _ in listing] + list(INDEX_TICKERS)
+    n, t = len(tickers), sessions
+
+    # 종가: 종목별 시작 가격과 변동성으로 만든 랜덤 워크 (지수는 시작 값 고정, 낮은 변동성)
+    start_price = np.exp(rng.uniform(np.log(1_000), np.log(300_000), n))
+    sigma = rng.uniform(0.01, 0.04, n)
+    for i, ticker in enumerate(tickers):
+        if ticker in INDEX_TICKERS:
+            start_price[i], sigma[i] = INDEX_TICKERS[ticker], 0.01
+    returns = np.clip(rng.normal(0.0003, sigma[:, None], (n, t)), -0.3, 0.3)
+    close = start_price[:, None] * np.cumprod(1 + returns, axis=1)
+    previous_close = np.concatenate([start_price[:, None], close[:, :-1]], axis=1)
+    open_ = previous_close * (1 + rng.normal(0, sigma[:, None] / 3, (n, t)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, sigma[:, None] / 2, (n, t))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, sigma[:, None] / 2, (n, t))))
+    mean_volume = np.exp(rng.uniform(np.log(1e4), np.log(5e6), n))
+    volume = np.round(mean_volume[:, None] * rng.lognormal(0, 0.5, (n, t)))
+
+    bars = np.stack([open_, high, low, close, volume], axis=2)
+    # 지수를 제외한 종목은 가격을 원 단위로 반올림
+    stock_rows = slice(0, len(listing))
+    bars[stock_rows, :, :4] = np.round(bars[stock_rows, :, :4])
+    # 거래정지: 0.1%의 (종목, 거래일)을 NaN으로
+    suspended = rng.random((len(listing), t)) < 0.001
+    bars[stock_rows][suspended] = np.nan
+
+    meta = {
+        "end_date": end_date,
+        "seed": seed,
+        "counts": counts,
+        "sessions": session_dates,
+        "tickers": tickers,
+        "listing": [{"code": code, "name": name, "market": market, "shares": int(shares)} for code, name, market, shares in listing],
+    }
+    os.makedirs(root, exist_ok=True)
+    np.save(_path(root, "bars.npy"), bars)
+    with open(_path(root, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+def _weekdays(start_str, end_str):
+    return pd.bdate_range(start_str, end_str).strftime("%Y-%m-%d").tolist() if start_str <= end_str else []
+
+
+class FixtureProvider:
+    '''
+    - 합성 시세 fixture로 데이터 공급자 인터페이스를 제공 (네트워크 사용 없음, 항상 같은 결과)
+    - 일봉 배열은 메모리 맵으로 열어 필요한 부분만 읽음
+    '''
+    def __init__(self, root=None):
+        root = root or Config.FIXTURE_DIR
+        if not fixture_exists(root):
+            raise FileNotFoundError(f"시세 fixture가 없습니다: {root} (python benchmark.py --build-fixture로 생성)")
+        with open(_path(root, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.bars = np.load(_path(root, "bars.npy"), mmap_mode="r")
+        self.sessions = self.meta["sessions"]
+        self._session_array = np.array(self.sessions)
+        self._session_position = {date: i for i, date in enumerate(self.sessions)}
+        self._ticker_position = {ticker: i for i, ticker in enumerate(self.meta["tickers"])}
+        self._shares = {}
+        self._market_rows = {}
+        for i, entry in enumerate(self.meta["listing"]):
+            ticker = f"{entry['code']}{MARKET_SUFFIX[entry['market']]}"
+            self._shares[ticker] = entry["shares"]
+            self._market_rows.setdefault(entry["market"], []).append(i)
+
+    def _session_slice(self, start_str, end_str):
+        start = np.searchsorted(self._session_array, start_str, side="left")
+        end = np.searchsorted(self._session_array, end_str, side="right")
+        return slice(start, end)
+
+    def daily_bars(self, ticker, start_str, end_str):
+        position = self._ticker_position.get(ticker)
+        if position is None:
+            return pd.DataFrame(columns=FIXTURE_COLUMNS, dtype="float64")
+        window = self._session_slice(start_str, end_str)
+        bars = pd.DataFrame(np.array(self.bars[position, window]), index=self.sessions[window], columns=FIXTURE_COLUMNS)
+        # yfinance처럼 거래가 없는 날은 행을 반환하지 않음
+        return bars.dropna(how="all")
+
+    def daily_bars_many(self, tickers, start_str, end_str):
+        bars_by_ticker = {}
+        for ticker in tickers:
+            bars = self.daily_bars(ticker, start_str, end_str)
+            if not bars.empty:
+                bars_by_ticker[ticker] = bars
+        return bars_by_ticker
+
+    def market_snapshot(self, date_formatted, market):
+        date_str = datetime.strptime(date_formatted, "%Y%m%d").strftime("%Y-%m-%d")
+        position = self._session_position.get(date_str)
+        rows = self._market_rows.get(market, [])
+        if position is None or not rows:
+            return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+        day = np.nan_to_num(np.array(self.bars[rows, position]))
+        previous_close = np.array(self.bars[rows, position - 1, 3]) if position > 0 else np.full(len(rows), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(previous_close > 0, (day[:, 3] / previous_close - 1) * 100, 0.0)
+        # pykrx와 같이 거래가 없는 종목은 0으로 채움
+        snapshot = pd.DataFrame({
+            "시가": day[:, 0].astype("int64"),
+            "고가": day[:, 1].astype("int64"),
+            "저가": day[:, 2].astype("int64"),
+            "종가": day[:, 3].astype("int64"),
+            "거래량": day[:, 4].astype("int64"),
+            "거래대금": (day[:, 3] * day[:, 4]).astype("int64"),
+            "등락률": np.round(np.nan_to_num(change), 2),
+        }, index=[self.meta["listing"][i]["code"] for i in rows])
+        snapshot.index.name = "티커"
+        return snapshot
+
+    def listing(self):
+        return pd.DataFrame({
+            "Code": [entry["code"] for entry in self.meta["listing"]],
+            "Name": [entry["name"] for entry in self.meta["listing"]],
+            "Market": [entry["market"] for entry in self.meta["listing"]],
+        })
+
+    def shares_outstanding(self, ticker):
+        return self._shares.get(ticker)
+
+    def business_days(self, start_str, end_str):
+        # fixture의 거래일은 평일이므로, fixture 구간 밖도 평일을 영업일로 취급
+        return _weekdays(start_str, end_str)
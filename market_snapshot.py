@@ -0,0 +1,147 @@
+'''
+- 특정 거래일의 시장 전체 스냅샷(전 종목 시가/고가/저가/종가/거래량/거래대금/등락률)
+- pykrx 전종목 조회를 (날짜, 시장)마다 한 번만 호출하고 결과를 메모리에 캐시
+- 종목마다 pykrx를 반복 호출하던 순위/비중/시장 통계 스킬들이 이 스냅샷 위에서 동작함
+'''
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from lazy_import import lazy_module
+from ohlcv_store import is_closed_date
+from providers import get_provider
+from metrics import REGISTRY
+from tracing import span
+from trading_calendar import get_trading_calendar
+
+pd = lazy_module("pandas")
+
+SNAPSHOT_MARKETS = ["KOSPI", "KOSDAQ"]
+SNAPSHOT_COLUMNS = ["시가", "고가", "저가", "종가", "거래량", "거래대금", "등락률"]
+
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "캐시 조회 수 (result: hit, miss)", ("cache", "result"))
+
+
+class MarketSnapshotCache:
+    '''
+    - (날짜, 시장) 단위 스냅샷 캐시
+    - 장이 끝난 과거 날짜는 만료되지 않고, 당일 스냅샷은 live_ttl초 동안만 유지
+    '''
+    def __init__(self, max_entries=64, live_ttl=60):
+        self.max_entries = max_entries
+        self.live_ttl = live_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, date, market="ALL"):
+        '''
+        - date('YYYY-MM-DD' 또는 'YYYYMMDD')의 시장 스냅샷을 반환
+        - market이 'ALL'이면 KOSPI와 KOSDAQ을 합친 스냅샷
+        - 휴장일(거래일 달력 기준)이거나 조회에 실패하면 빈 DataFrame
+        '''
+        if market == "ALL":
+            frames = [self.get(date, m) for m in SNAPSHOT_MARKETS]
+            frames = [f for f in frames if not f.empty]
+            return pd.concat(frames) if frames else _empty_snapshot()
+
+        date_formatted = date.replace("-", "")
+        key = (date_formatted, market)
+
+        # 휴장일은 조회하지 않음
+        if not get_trading_calendar().is_session(f"{date_formatted[:4]}-{date_formatted[4:6]}-{date_formatted[6:]}"):
+            return _empty_snapshot()
+
+        with span("data.market_snapshot", date=date_formatted, market=market) as snapshot_span:
+            snapshot = self._lookup(key)
+            if snapshot is not None:
+                snapshot_span.set(cache_hit=True, rows=len(snapshot))
+                CACHE_REQUESTS.inc(cache="snapshot", result="hit")
+                return snapshot
+
+            # 같은 (날짜, 시장)을 여러 스레드가 동시에 요청해도 실제 조회는 한 번만 수행
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                snapshot = self._lookup(key)
+                if snapshot is not None:
+                    snapshot_span.set(cache_hit=True, rows=len(snapshot))
+                    CACHE_REQUESTS.inc(cache="snapshot", result="hit")
+                    return snapshot
+
+                CACHE_REQUESTS.inc(cache="snapshot", result="miss")
+                try:
+                    snapshot = _fetch_snapshot(date_formatted, market)
+                    snapshot_span.set(cache_hit=False, rows=None if snapshot is None else len(snapshot))
+                    if snapshot is not None:
+                        self._store(key, snapshot)
+                        return snapshot
+                    return _empty_snapshot()
+                finally:
+                    # 조회가 끝난 키의 잠금은 버려 (날짜, 시장)마다 잠금이 쌓이지 않도록 함
+                    with self._lock:
+                        self._key_locks.pop(key, None)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            snapshot, expires_at = entry
+            if expires_at is not None and time.time() > expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return snapshot
+
+    def _store(self, key, snapshot):
+        date_str = datetime.strptime(key[0], "%Y%m%d").strftime("%Y-%m-%d")
+        expires_at = None if is_closed_date(date_str) else time.time() + self.live_ttl
+        with self._lock:
+            self._entries[key] = (snapshot, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _fetch_snapshot(date_formatted, market):
+    '''
+    - 데이터 공급자(pykrx)로 시장 전 종목 데이터를 한 번에 조회
+    - 거래일(휴장일은 get에서 미리 걸러짐)에만 호출되므로, 네트워크 오류와 빈 결과/가격이 모두 0인 결과는 조회 실패로 보고 None(캐시하지 않음)
+    '''
+    try:
+        df = get_provider().market_snapshot(date_formatted, market)
+    except Exception:
+        return None
+
+    # pykrx는 조회에 실패해도 빈 결과나 모든 가격이 0으로 채워진 결과를 돌려줌
+    if df is None or df.empty:
+        return None
+
+    df = df.reindex(columns=SNAPSHOT_COLUMNS)
+    if (df[["시가", "고가", "저가", "종가"]] == 0).all(axis=None):
+        return None
+
+    df["시장"] = market
+    df.index = df.index.astype(str)
+    df.index.name = "티커"
+    return df
+
+
+def _empty_snapshot():
+    df = pd.DataFrame(columns=SNAPSHOT_COLUMNS + ["시장"])
+    df.index.name = "티커"
+    return df
+
+
+# 모든 스킬이 공유하는 기본 스냅샷 캐시
+SNAPSHOT_CACHE = MarketSnapshotCache()
+
+
+def get_market_snapshot(date, market="ALL"):
+    return SNAPSHOT_CACHE.get(date, market)
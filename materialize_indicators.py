@@ -0,0 +1,30 @@
+'''
+- 장 마감 후 전 종목의 기술적 지표(MA5, MA20, 볼린저 상/하단, RSI14, 20일 평균 거래량)를 미리 계산해 저장하는 배치 스크립트
+- 저장된 지표는 query_by_technical_signal의 볼린저/RSI/MA20/거래량 조건 검색에서 바로 조회됨
+'''
+import argparse
+from datetime import datetime
+
+from skillset import materialize_indicators
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전 종목 기술적 지표 일괄 계산")
+    parser.add_argument("--start", default=datetime.now().strftime("%Y-%m-%d"), help="계산 시작일 (YYYY-MM-DD, 기본값: 오늘)")
+    parser.add_argument("--end", default=None, help="계산 종료일 (YYYY-MM-DD, 기본값: 시작일)")
+    parser.add_argument("--market", default="ALL", choices=["KOSPI", "KOSDAQ", "ALL"], help="대상 시장")
+    args = parser.parse_args()
+
+    written = materialize_indicators(args.start, args.end, args.market)
+    print(f"✅ {written}개 거래일의 지표를 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
+
+
+'''
+실행 예시 (매일 장 마감 후, 예: cron 30 18 * * 1-5)
+python materialize_indicators.py
+python materialize_indicators.py --start 2025-01-02 --end 2025-07-18
+'''
@@ -0,0 +1,263 @@
+'''
+- 프로세스 안에서 집계하는 지표(metrics) 저장소 (카운터, 게이지, 히스토그램)
+- 데이터 공급자(yfinance/pykrx/FinanceDataReader) 호출 수·오류 수·지연 시간, 함수(Tool)별 실행 시간, LLM 호출 지연 시간, 캐시 적중, 스레드 풀 사용량을 기록
+- Prometheus 텍스트 형식(0.0.4)으로 출력
+    - server.py: GET /metrics
+    - main.py, batch.py: FIN_METRICS_PORT를 지정하면 로컬 HTTP 엔드포인트(/metrics), FIN_METRICS_FILE을 지정하면 종료 시(와 주기적으로) 파일로 저장
+- 지표는 사용하는 모듈에서 REGISTRY.counter/gauge/histogram으로 정의 (같은 이름이면 같은 지표를 반환)
+'''
+import atexit
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+# 지연 시간(초) 히스토그램 기본 구간
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 지표의 라벨은 {self.labelnames}이어야 합니다: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        '''[(이름 접미사, 라벨 값, 추가 라벨, 값)]'''
+        with self._lock:
+            return [("", key, None, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    '''증가만 하는 누적 값 (호출 수, 오류 수 등)'''
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    '''
+    - 현재 값 (처리 중인 작업 수, 대기 중인 작업 수 등)
+    - set_function으로 값을 읽을 때마다 계산하는 함수를 지정할 수 있음 (라벨 없는 게이지)
+    '''
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self._function = function
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        '''블록을 실행하는 동안 값을 1 늘림'''
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels):
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        if self._function is not None:
+            return [("", (), None, self._function())]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    '''구간별 관측 수와 합계 (지연 시간 분포)'''
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            entry["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        '''블록 실행 시간(초)을 관측 (예외가 발생해도 기록)'''
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry["count"] if entry else 0
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                cumulative = 0
+                for bound, observed in zip(self.buckets + (float("inf"),), entry["buckets"]):
+                    cumulative += observed
+                    samples.append(("_bucket", key, [("le", _format_value(bound))], cumulative))
+                samples.append(("_sum", key, None, entry["sum"]))
+                samples.append(("_count", key, None, entry["count"]))
+        return samples
+
+
+class MetricsRegistry:
+    '''이름으로 지표를 모아 두고 Prometheus 텍스트 형식으로 출력'''
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"{name} 지표가 다른 종류나 라벨로 이미 등록되어 있습니다.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def write(self, path):
+        '''Prometheus 텍스트 형식으로 파일에 저장 (node_exporter textfile collector 등에서 읽을 수 있도록 원자적으로 교체)'''
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# 프로세스 전체가 공유하는 지표 저장소
+REGISTRY = MetricsRegistry()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    '''백그라운드 스레드에서 GET /metrics 엔드포인트를 실행하고 서버를 반환'''
+    # 엔드포인트를 열 때만 필요하므로 여기서 import (CLI 시작 시간 유지)
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 요청마다 출력하지 않음
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_exporters(port=None, path=None, interval=None):
+    '''
+    - 설정(Config.METRICS_PORT, METRICS_FILE)에 따라 지표 엔드포인트를 열고, 지표 파일을 interval초마다와 종료 시 저장
+    - 지정한 출력이 없으면 아무것도 하지 않음
+    '''
+    port = port or Config.METRICS_PORT
+    path = path or Config.METRICS_FILE
+    interval = interval or Config.METRICS_FILE_INTERVAL
+    if port:
+        serve_metrics(port)
+    if path:
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                REGISTRY.write(path)
+        threading.Thread(target=write_periodically, name="metrics-file", daemon=True).start()
+        atexit.register(REGISTRY.write, path)
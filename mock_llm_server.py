@@ -0,0 +1,236 @@
+'''
+- CLOVA Studio Chat Completions API를 흉내 내는 로컬 서버 (부하 테스트, 오프라인 전체 흐름 점검용)
+- 실제 API와 같은 경로/형식으로 응답하므로 Config.CHAT_COMPLETIONS_API(CLOVA_API_URL 환경 변수)만 바꾸면 에이전트 코드를 그대로 사용
+    - 첫 번째 호출(Tool 명세 포함): 시나리오에서 질문과 맞는 함수 호출(toolCalls)을 골라 반환 (맞는 항목이 없으면 되묻는 답변)
+    - 두 번째 호출(마지막 메시지가 tool): 함수 실행 결과를 이어 붙인 답변 반환 (Accept: text/event-stream이면 token/result 이벤트로 스트리밍)
+- 호출 종류별 응답 지연 시간을 분포(fixed, uniform, normal, lognormal)로 지정하고, 일부 요청을 503으로 실패시켜 재시도 경로도 재현
+- 시나리오: [{"keywords": [...], "tool_calls": [{"name": ..., "arguments": {...}}]}] (질문에 keywords가 모두 있으면 적중, 앞 항목 우선)
+    - arguments의 "{date}"는 질문 속 날짜(YYYY-MM-DD)로, "{query}"는 질문 원문으로 바꿈
+'''
+import argparse
+import asyncio
+import json
+import random
+import re
+from datetime import date as date_type
+
+from aiohttp import web
+
+from config import Config
+
+# README 예시 질문(load_test.py)에 대한 기본 시나리오
+DEFAULT_SCENARIO = [
+    {"keywords": ["삼성전자", "종가", "코스피", "지수"], "tool_calls": [
+        {"name": "get_stock_metric", "arguments": {"date": "{date}", "stock_name": "삼성전자", "metric": "종가"}},
+        {"name": "get_market_index", "arguments": {"date": "{date}", "market": "KOSPI"}},
+    ]},
+    {"keywords": ["삼성전자", "SK하이닉스", "시가총액"], "tool_calls": [
+        {"name": "compare_market_caps", "arguments": {"date": "{date}", "stock1": "삼성전자", "stock2": "SK하이닉스"}},
+    ]},
+    {"keywords": ["삼성전자", "SK하이닉스", "종가"], "tool_calls": [
+        {"name": "compare_stocks", "arguments": {"date": "{date}", "stock1": "삼성전자", "stock2": "SK하이닉스", "metric": "종가"}},
+    ]},
+    {"keywords": ["카카오", "네이버", "종가"], "tool_calls": [
+        {"name": "compare_stocks", "arguments": {"date": "{date}", "stock1": "카카오", "stock2": "NAVER", "metric": "종가"}},
+    ]},
+    {"keywords": ["코스닥", "가장 많이 오른"], "tool_calls": [
+        {"name": "get_top_stocks_by_metric", "arguments": {"date": "{date}", "market": "KOSDAQ", "metric": "상승률", "n": 5}},
+    ]},
+    {"keywords": ["거래량이 가장 많았던", "코스피"], "tool_calls": [
+        {"name": "get_top_stocks_by_metric", "arguments": {"date": "{date}", "market": "KOSPI", "metric": "거래량", "n": 1}},
+    ]},
+    {"keywords": ["코스피", "평균 등락률"], "tool_calls": [
+        {"name": "calculate_market_average_change", "arguments": {"date": "{date}", "market": "KOSPI"}},
+    ]},
+    {"keywords": ["삼성전자", "거래량", "비중"], "tool_calls": [
+        {"name": "calculate_stock_volume_share", "arguments": {"date": "{date}", "stock_name": "삼성전자"}},
+    ]},
+    {"keywords": ["셀트리온", "거래량 순위"], "tool_calls": [
+        {"name": "get_stock_volume_rank", "arguments": {"date": "{date}", "stock_name": "셀트리온", "market": "ALL"}},
+    ]},
+    {"keywords": ["코스피", "지수"], "tool_calls": [
+        {"name": "get_market_index", "arguments": {"date": "{date}", "market": "KOSPI"}},
+    ]},
+    {"keywords": ["삼성전자", "종가"], "tool_calls": [
+        {"name": "get_stock_metric", "arguments": {"date": "{date}", "stock_name": "삼성전자", "metric": "종가"}},
+    ]},
+]
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class LatencyDistribution:
+    '''
+    - 응답 지연 시간(초) 분포: "fixed:0.8", "uniform:0.5,1.5", "normal:1.0,0.2", "lognormal:1.0,0.5" (중앙값, 로그 표준편차)
+    '''
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, spec):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"알 수 없는 지연 시간 분포입니다: {spec} ({', '.join(self.KINDS)} 중 선택)")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+
+    def sample(self, rng):
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(*self.params[:2])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.params[:2]))
+        return self.params[0] * rng.lognormvariate(0, self.params[1])
+
+    def __repr__(self):
+        return self.spec
+
+
+def _fill(value, date, query):
+    if isinstance(value, str):
+        return value.replace("{date}", date).replace("{query}", query)
+    if isinstance(value, dict):
+        return {k: _fill(v, date, query) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, date, query) for v in value]
+    return value
+
+
+def _last_user_query(messages):
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+class MockChatCompletions:
+    '''
+    - 요청 본문을 보고 시나리오의 함수 호출 또는 함수 결과를 요약한 답변을 돌려주는 가짜 Chat Completions API
+    - tool_latency: 첫 번째 호출(함수 선택) 지연 시간 분포, answer_latency: 두 번째 호출(답변 생성) 첫 토큰까지의 지연 시간 분포
+    - token_interval: 스트리밍 답변의 토큰 사이 간격(초), error_rate: 503으로 실패시킬 요청 비율
+    '''
+    def __init__(self, scenario=None, tool_latency="lognormal:0.8,0.3", answer_latency="lognormal:1.2,0.3",
+                 token_interval=0.02, error_rate=0.0, seed=None):
+        self.scenario = scenario or DEFAULT_SCENARIO
+        self.tool_latency = LatencyDistribution(tool_latency)
+        self.answer_latency = LatencyDistribution(answer_latency)
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.requests = {"tool": 0, "answer": 0, "error": 0}
+
+    def plan(self, query):
+        '''질문에 맞는 시나리오의 toolCalls 목록 (없으면 None)'''
+        compact = query.replace(" ", "")
+        dates = _ISO_DATE.findall(query)
+        date = dates[0] if dates else date_type.today().isoformat()
+        for entry in self.scenario:
+            if all(keyword.replace(" ", "") in compact for keyword in entry["keywords"]):
+                return [
+                    {"id": f"call_mock_{i}", "type": "function",
+                     "function": {"name": call["name"], "arguments": _fill(call["arguments"], date, query)}}
+                    for i, call in enumerate(entry["tool_calls"])
+                ]
+        return None
+
+    def answer(self, messages):
+        '''마지막 사용자 질문 이후의 함수 실행 결과를 이어 붙인 답변'''
+        results = []
+        for message in reversed(messages):
+            if message.get("role") != "tool":
+                break
+            results.append(str(message.get("content", ""))[:200])
+        return "조회 결과입니다. " + " / ".join(reversed(results))
+
+    async def handle(self, request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        is_answer = bool(messages) and messages[-1].get("role") == "tool"
+        self.requests["answer" if is_answer else "tool"] += 1
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.requests["error"] += 1
+            return web.json_response({"status": {"code": "50300", "message": "Service Unavailable"}}, status=503)
+
+        await asyncio.sleep((self.answer_latency if is_answer else self.tool_latency).sample(self._rng))
+        if is_answer:
+            message = {"role": "assistant", "content": self.answer(messages)}
+        else:
+            tool_calls = self.plan(_last_user_query(messages))
+            if tool_calls:
+                message = {"role": "assistant", "content": "", "toolCalls": tool_calls}
+            else:
+                message = {"role": "assistant", "content": "질문을 조금 더 구체적으로 말씀해 주세요. (날짜, 종목명, 시장 등)"}
+
+        result = {"message": message, "finishReason": "tool_calls" if message.get("toolCalls") else "stop"}
+        if "text/event-stream" not in request.headers.get("Accept", ""):
+            return web.json_response({"status": {"code": "20000", "message": "OK"}, "result": result},
+                                     dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+        return await self._stream(request, result)
+
+    async def _stream(self, request, result):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream; charset=utf-8"})
+        await response.prepare(request)
+        content = result["message"]["content"]
+        for start in range(0, len(content), 8):
+            token = {"message": {"role": "assistant", "content": content[start:start + 8]}}
+            await response.write(f"event: token\ndata: {json.dumps(token, ensure_ascii=False)}\n\n".encode("utf-8"))
+            if self.token_interval:
+                await asyncio.sleep(self.token_interval)
+        await response.write(f"event: result\ndata: {json.dumps(result, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def handle_stats(self, request):
+        return web.json_response(self.requests)
+
+
+def create_app(**kwargs):
+    '''가짜 Chat Completions API aiohttp 애플리케이션 생성 (kwargs는 MockChatCompletions 설정)'''
+    mock = MockChatCompletions(**kwargs)
+    app = web.Application()
+    app["mock"] = mock
+    app.router.add_get("/stats", mock.handle_stats)
+    # 실제 API 경로(/testapp/v3/chat-completions/HCX-005 등) 어디로 보내도 같은 응답
+    app.router.add_post("/{path:.*}", mock.handle)
+    return app
+
+
+def load_scenario(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLOVA Chat Completions API를 흉내 내는 로컬 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인딩할 주소")
+    parser.add_argument("--port", type=int, default=8090, help="포트 번호")
+    parser.add_argument("--scenario", help="시나리오 JSON 파일 (기본값: README 예시 질문용 내장 시나리오)")
+    parser.add_argument("--tool-latency", default="lognormal:0.8,0.3", help="첫 번째 호출(함수 선택) 지연 시간 분포")
+    parser.add_argument("--answer-latency", default="lognormal:1.2,0.3", help="두 번째 호출(답변 생성) 지연 시간 분포")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="스트리밍 토큰 사이 간격(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503으로 실패시킬 요청 비율 (0~1)")
+    parser.add_argument("--seed", type=int, help="지연 시간/실패 난수 seed")
+    args = parser.parse_args()
+
+    app = create_app(
+        scenario=load_scenario(args.scenario) if args.scenario else None,
+        tool_latency=args.tool_latency,
+        answer_latency=args.answer_latency,
+        token_interval=args.token_interval,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"에이전트에서 사용하려면: CLOVA_API_URL=http://{args.host}:{args.port}/testapp/v3/chat-completions/{Config.MODEL_NAME}")
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
+
+
+'''
+실행 예시
+python mock_llm_server.py --port 8090 --tool-latency lognormal:0.8,0.3 --answer-latency normal:1.5,0.4 --error-rate 0.01
+CLOVA_API_URL=http://127.0.0.1:8090/testapp/v3/chat-completions/HCX-005 python main.py
+'''
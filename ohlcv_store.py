@@ -0,0 +1,194 @@
+'''
+- 일봉 OHLCV 데이터를 로컬 디스크에 보관하는 컬럼형 저장소
+- 거래일(날짜)별로 파티션(parquet 파일)을 나누고, 각 파티션은 티커를 키(index)로 전 종목의 시가/고가/저가/종가/거래량을 가짐
+- 지나간 거래일의 일봉은 바뀌지 않으므로 한 번 저장하면 다시 네트워크를 타지 않음 (당일 데이터는 저장하지 않음)
+- 조회 구간은 KRX 거래일 달력(trading_calendar.py) 기준이며, 거래일인데 데이터가 없는 종목(거래정지 등)은 NaN 행(tombstone)으로 기록하여 같은 구간을 반복 조회하지 않도록 함
+- 같은 파티션 구조로 미리 계산한 기술적 지표도 저장함 (indicator_engine.INDICATOR_STORE)
+'''
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from lazy_import import lazy_module
+from trading_calendar import get_trading_calendar
+
+pd = lazy_module("pandas")
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# 이 시각 이후에는 당일 일봉도 확정된 것으로 보고 저장
+SETTLEMENT_HOUR = 18
+
+
+class DatePartitionStore:
+    '''
+    - 날짜 파티션 단위로 읽고 쓰는 저장소
+    - 최근에 읽은 파티션은 메모리(LRU)에 올려두어 반복 조회를 마이크로초 단위로 처리
+    '''
+    def __init__(self, root=None, columns=OHLCV_COLUMNS, max_cached_partitions=256):
+        self.root = root or os.path.join(Config.DATA_DIR, "ohlcv")
+        self.columns = list(columns)
+        self.max_cached_partitions = max_cached_partitions
+        self._partitions = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, date_str):
+        return os.path.join(self.root, date_str[:4], f"{date_str}.parquet")
+
+    def load_partition(self, date_str):
+        '''
+        - 특정 거래일의 파티션을 반환 (없으면 빈 DataFrame)
+        '''
+        with self._lock:
+            if date_str in self._partitions:
+                self._partitions.move_to_end(date_str)
+                return self._partitions[date_str]
+
+            path = self._path(date_str)
+            if os.path.exists(path):
+                try:
+                    partition = pd.read_parquet(path)
+                except Exception:
+                    partition = self._empty_partition()
+            else:
+                partition = self._empty_partition()
+
+            self._remember(date_str, partition)
+            return partition
+
+    def _empty_partition(self):
+        partition = pd.DataFrame(columns=self.columns, dtype="float64")
+        partition.index.name = "ticker"
+        return partition
+
+    def _remember(self, date_str, partition):
+        self._partitions[date_str] = partition
+        self._partitions.move_to_end(date_str)
+        while len(self._partitions) > self.max_cached_partitions:
+            self._partitions.popitem(last=False)
+
+    def clear_memory(self):
+        '''메모리에 올려둔 파티션을 비움 (디스크의 파티션은 유지)'''
+        with self._lock:
+            self._partitions.clear()
+
+    def write_partition(self, date_str, rows):
+        '''
+        - 티커를 index로 하는 rows를 기존 파티션에 병합하여 저장 (같은 티커는 새 값으로 덮어씀)
+        '''
+        if not is_closed_date(date_str) or rows.empty:
+            return
+
+        with self._lock:
+            existing = self.load_partition(date_str)
+            rows = rows.reindex(columns=self.columns).astype("float64")
+            merged = pd.concat([existing[~existing.index.isin(rows.index)], rows])
+            merged.index.name = "ticker"
+            merged.sort_index(inplace=True)
+
+            path = self._path(date_str)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            merged.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            self._remember(date_str, merged)
+
+    def read(self, ticker, start_str, end_str):
+        '''
+        - [start_str, end_str] 구간의 특정 티커 일봉과, 저장소에 없어 새로 받아와야 하는 날짜 목록을 함께 반환
+        - 반환 DataFrame은 'YYYY-MM-DD' 문자열 index를 가짐
+        '''
+        rows = {}
+        missing = []
+        for date_str in get_trading_calendar().sessions_between(start_str, end_str):
+            if not is_closed_date(date_str):
+                # 당일(장중) 데이터는 계속 바뀌므로 항상 새로 조회
+                if date_str == datetime.now().strftime("%Y-%m-%d"):
+                    missing.append(date_str)
+                continue
+
+            partition = self.load_partition(date_str)
+            if ticker not in partition.index:
+                missing.append(date_str)
+                continue
+
+            row = partition.loc[ticker]
+            if not row.isna().all():
+                rows[date_str] = row
+
+        frame = pd.DataFrame.from_dict(rows, orient="index", columns=self.columns)
+        return frame.sort_index(), missing
+
+    def read_panel(self, tickers, start_str, end_str):
+        '''
+        - 여러 티커의 [start_str, end_str] 구간 일봉을 날짜별로 묶어 반환 (date -> 티커 index DataFrame)
+        - 저장소에 한 날짜라도 빠져 있어 새로 받아와야 하는 티커 목록을 함께 반환
+        '''
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        panel = {}
+        missing = set()
+        for date_str in get_trading_calendar().sessions_between(start_str, end_str):
+            if not is_closed_date(date_str):
+                if date_str == today_str:
+                    missing.update(tickers)
+                continue
+
+            partition = self.load_partition(date_str)
+            present = partition.index.intersection(tickers)
+            if len(present) < len(tickers):
+                missing.update(set(tickers).difference(present))
+            panel[date_str] = partition.loc[present].dropna(how="all")
+
+        return panel, sorted(missing)
+
+    def write(self, ticker, bars, covered_dates):
+        '''
+        - 새로 받아온 일봉(bars)을 날짜별 파티션에 저장
+        - covered_dates 중 bars에 없는 날짜는 tombstone으로 기록하여 데이터가 없다는 사실까지 저장
+        '''
+        self.write_many({ticker: bars}, covered_dates)
+
+    def write_many(self, bars_by_ticker, covered_dates):
+        '''
+        - 여러 티커의 일봉을 한 번에 저장 (날짜별 파티션 파일은 한 번씩만 다시 씀)
+        '''
+        frames = [bars.assign(ticker=ticker) for ticker, bars in bars_by_ticker.items() if not bars.empty]
+        if not frames:
+            return
+        long_bars = pd.concat(frames)
+        covered_dates = set(covered_dates)
+
+        for date_str, day in long_bars.groupby(level=0):
+            rows = day.set_index("ticker")[self.columns]
+            if date_str in covered_dates:
+                # 받아온 구간 안인데 행이 없는 티커는 tombstone
+                rows = rows.reindex(list(bars_by_ticker))
+            self.write_partition(date_str, rows)
+
+        # 모든 티커가 비어 있는 날짜(휴장일)도 tombstone으로 기록
+        for date_str in sorted(covered_dates.difference(long_bars.index)):
+            self.write_partition(date_str, pd.DataFrame(index=list(bars_by_ticker), columns=self.columns, dtype="float64"))
+
+
+def normalize_bars(hist):
+    '''
+    - yfinance history 결과를 저장소 형식('YYYY-MM-DD' index, OHLCV 컬럼)으로 변환
+    '''
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    bars = hist.reindex(columns=OHLCV_COLUMNS).astype("float64")
+    bars.index = pd.DatetimeIndex(hist.index).strftime("%Y-%m-%d")
+    return bars[~bars.index.duplicated(keep="last")]
+
+
+def is_closed_date(date_str):
+    '''장이 끝나 값이 확정된 날짜인지 (지난 날짜, 또는 정산 시각이 지난 오늘)'''
+    now = datetime.now()
+    today_str = now.strftime("%Y-%m-%d")
+    return date_str < today_str or (date_str == today_str and now.hour >= SETTLEMENT_HOUR)
+
+
+# 모든 스킬이 공유하는 기본 저장소
+OHLCV_STORE = DatePartitionStore()
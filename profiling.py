@@ -0,0 +1,229 @@
+'''
+- 질문 한 턴을 처리하는 동안 모든 스레드의 호출 스택을 일정 간격으로 표본 추출하는 프로파일러 (tracemalloc 메모리 할당 추적 포함)
+- 추적(tracing.py)이 어느 구간이 느린지 보여 준다면, 프로파일은 그 구간 안에서 어떤 함수와 코드 줄이 시간을 쓰는지 보여 줌
+    - 예: handle_cross의 시간이 Python 반복문의 df.iloc, tz_localize, 시세 조회 중 어디에 쓰이는지
+- 한 턴은 메인 스레드, LLM 클라이언트 이벤트 루프 스레드, 함수 실행 스레드 풀에 걸쳐 실행되므로,
+  스레드마다 따로 켜야 하는 결정적 프로파일러(cProfile) 대신 sys._current_frames로 모든 스레드를 한꺼번에 표본 추출
+- 락/큐 대기, select처럼 멈춰 있는 스레드의 표본은 유휴 표본으로만 세고 핫스팟에서 제외
+- 결과
+    - <profile_id>.folded: 접힌 스택(folded stacks) 형식 (flamegraph.pl, speedscope 등에서 불꽃 그래프로 보기)
+    - <profile_id>.json: 함수별 self/누적 표본 수, 프로젝트 코드 줄별 표본 수, 스레드별 표본 수, 메모리 할당 최대치와 할당 위치 상위 목록
+'''
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from config import Config
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_LIBRARY_MARKERS = (f"{os.sep}site-packages{os.sep}", f"{os.sep}dist-packages{os.sep}")
+
+# 멈춰 있는 스레드의 맨 위 프레임 (파일 이름, 함수 이름)
+# 락/큐 대기, 이벤트 루프의 select, 스레드 풀의 작업 대기, 지표 파일 저장 스레드의 sleep
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("metrics.py", "write_periodically"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _short_path(filename):
+    # 라이브러리는 site-packages 아래 경로, 프로젝트 파일은 상대 경로, 표준 라이브러리는 파일 이름
+    for marker in _LIBRARY_MARKERS:
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    if filename.startswith(_ROOT + os.sep):
+        return os.path.relpath(filename, _ROOT)
+    return os.path.basename(filename)
+
+
+@functools.lru_cache(maxsize=None)
+def _is_project_file(filename):
+    return filename.startswith(_ROOT + os.sep) and not any(marker in filename for marker in _LIBRARY_MARKERS)
+
+
+@functools.lru_cache(maxsize=None)
+def _frame_label(code):
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_group(name):
+    # 스레드 풀의 스레드(tool_0, tool_1, ...)는 하나로 묶음
+    return re.sub(r"_\d+$", "", name)
+
+
+class Profile:
+    '''
+    - 표본 추출 프로파일 하나 (start ~ stop 사이의 모든 스레드 호출 스택)
+    - memory가 True이면 tracemalloc으로 할당 최대치와 턴이 끝날 때 남아 있는 할당 위치를 기록 (할당 추적 때문에 실행이 느려짐)
+    '''
+    def __init__(self, name, interval=None, memory=True, attributes=None):
+        self.profile_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.interval = interval or Config.PROFILE_INTERVAL
+        self.memory = memory
+        self.stacks = Counter()  # (스레드 이름, (바깥 프레임, ..., 맨 위 프레임)) -> 표본 수
+        self.lines = Counter()   # 표본마다 맨 위에서 가장 가까운 프로젝트 코드 줄 -> 표본 수
+        self.ticks = 0
+        self.idle_samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self.memory_peak = None
+        self._memory_stats = []
+        self._memory_base = 0
+        self._owns_tracemalloc = False
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.memory:
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._memory_base = tracemalloc.get_traced_memory()[0]
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        if self.memory:
+            self.memory_peak = tracemalloc.get_traced_memory()[1] - self._memory_base
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            ))
+            self._memory_stats = snapshot.statistics("lineno")
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_ident)
+
+    def _sample(self, own_ident):
+        names = {thread.ident: _thread_group(thread.name) for thread in threading.enumerate()}
+        self.ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                self.idle_samples += 1
+                continue
+            stack = []
+            line = None
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_label(code))
+                if line is None and _is_project_file(code.co_filename):
+                    line = f"{_short_path(code.co_filename)}:{frame.f_lineno} ({code.co_name})"
+                frame = frame.f_back
+            self.stacks[(names.get(ident, str(ident)), tuple(reversed(stack)))] += 1
+            if line is not None:
+                self.lines[line] += 1
+
+    @property
+    def samples(self):
+        '''유휴 표본을 뺀 표본 수'''
+        return sum(self.stacks.values())
+
+    def folded(self):
+        '''접힌 스택 형식 ("스레드;바깥 프레임;...;맨 위 프레임 표본 수" 한 줄씩)'''
+        return "".join(
+            ";".join((thread,) + stack) + f" {count}\n"
+            for (thread, stack), count in sorted(self.stacks.items())
+        )
+
+    def hotspots(self, top=None):
+        '''
+        - 표본 수 기준 상위 top개 {"self", "inclusive", "lines", "threads"}
+        - self: 맨 위 프레임으로 잡힌 함수, inclusive: 스택 어딘가에 있던 함수, lines: 가장 가까운 프로젝트 코드 줄
+        '''
+        top = top or Config.PROFILE_TOP
+        own, inclusive, threads = Counter(), Counter(), Counter()
+        for (thread, stack), count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+            threads[thread] += count
+        total = self.samples
+
+        def rows(counter):
+            return [
+                {"name": name, "samples": count, "ratio": round(count / total, 4) if total else 0.0}
+                for name, count in counter.most_common(top)
+            ]
+        return {"self": rows(own), "inclusive": rows(inclusive), "lines": rows(self.lines), "threads": rows(threads)}
+
+    def memory_top(self, top=None):
+        '''턴이 끝날 때 남아 있는 할당을 코드 줄별 크기 순으로 상위 top개'''
+        top = top or Config.PROFILE_TOP
+        return [
+            {
+                "location": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in self._memory_stats[:top]
+        ]
+
+    def to_dict(self, top=None):
+        return {
+            "profile_id": self.profile_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "hotspots": self.hotspots(top),
+            "memory": {"peak": self.memory_peak, "top": self.memory_top(top)} if self.memory else None,
+        }
+
+    def write(self, directory, top=None):
+        '''directory에 <profile_id>.json(핫스팟 요약)과 <profile_id>.folded(접힌 스택)를 저장하고 두 경로를 반환'''
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{self.profile_id}.json")
+        folded_path = os.path.join(directory, f"{self.profile_id}.folded")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(top), f, ensure_ascii=False, default=str, indent=2)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        return json_path, folded_path
+
+
+@contextmanager
+def profile(name, interval=None, memory=True, **attributes):
+    '''
+    - 프로파일을 시작하고 Profile을 반환 (with 블록이 끝나면 표본 추출과 메모리 추적을 멈춤)
+    - tracemalloc은 프로세스 전체에 하나이므로 한 번에 하나의 프로파일만 실행
+    '''
+    current = Profile(name, interval, memory, attributes)
+    current.start()
+    try:
+        yield current
+    finally:
+        current.stop()
@@ -0,0 +1,296 @@
+'''
+- 외부 시세 데이터 조회를 한곳으로 모은 데이터 공급자(provider) 인터페이스
+- 스킬, 시세 저장소, 스냅샷, 종목 인덱스, 거래일 달력은 yfinance/pykrx/FinanceDataReader를 직접 부르지 않고 get_provider()를 거침
+    - daily_bars: 한 종목의 일봉 (yfinance history)
+    - daily_bars_many: 여러 종목의 일봉 일괄 조회 (yfinance download)
+    - market_snapshot: 날짜·시장별 전 종목 시세 (pykrx)
+    - listing: KRX 상장 종목 목록 (FinanceDataReader)
+    - shares_outstanding: 상장주식수 (yfinance info)
+    - business_days: KRX 영업일 목록 (pykrx)
+- LiveProvider: 실제 라이브러리 호출
+- RecordingProvider: 다른 공급자의 응답을 디스크에 기록 (호출 이름 + 인자 → 파일 하나)
+- ReplayProvider: 기록된 응답을 네트워크 없이 돌려주고, 설정한 만큼 지연 시간을 흉내 냄 (기록이 없으면 ReplayMissError)
+- FixtureProvider(market_fixture.py): KRX 전체 규모의 합성 시세 fixture로 모든 조회를 결정적으로 제공
+- FIN_DATA_PROVIDER 환경 변수(live/record/replay/fixture)로 공급자를 고르며, 벤치마크 등에서는 set_provider로 바꿀 수 있음
+- 공유 공급자는 MeteredProvider로 감싸 데이터 소스(yfinance/pykrx/FinanceDataReader)별 호출 수, 빈 결과/오류 수, 지연 시간을 지표로 기록
+'''
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from lazy_import import lazy_module
+from market_fixture import FixtureProvider
+from metrics import REGISTRY
+
+yf = lazy_module("yfinance")
+pd = lazy_module("pandas")
+stock = lazy_module("pykrx.stock")
+fdr = lazy_module("FinanceDataReader")
+
+# 데이터 라이브러리(yfinance, pykrx)의 경고 및 오류 메시지 억제
+# sys.stdout/stderr를 바꾸지 않고 로거 수준만 높이므로, 함수를 여러 스레드에서 동시에 실행해도 다른 스레드(서버 세션 등)의 출력은 그대로 유지됨
+QUIET_LOGGERS = ("yfinance", "pykrx", "peewee")
+for _logger_name in QUIET_LOGGERS:
+    logging.getLogger(_logger_name).setLevel(logging.CRITICAL)
+
+# 공급자가 제공하는 조회 이름 (기록/재생 대상)
+PROVIDER_METHODS = ("daily_bars", "daily_bars_many", "market_snapshot", "listing", "shares_outstanding", "business_days")
+# 조회 이름별 실제 데이터 소스 (지표 라벨)
+DATA_SOURCES = {
+    "daily_bars": "yfinance",
+    "daily_bars_many": "yfinance",
+    "market_snapshot": "pykrx",
+    "listing": "fdr",
+    "shares_outstanding": "yfinance",
+    "business_days": "pykrx",
+}
+
+DATA_SOURCE_CALLS = REGISTRY.counter(
+    "data_source_calls_total", "데이터 공급자 호출 수 (result: ok, empty, error)", ("source", "method", "provider", "result"))
+DATA_SOURCE_ERRORS = REGISTRY.counter(
+    "data_source_errors_total", "데이터 공급자 호출 오류 수 (예외 종류별)", ("source", "method", "error"))
+DATA_SOURCE_LATENCY = REGISTRY.histogram(
+    "data_source_latency_seconds", "데이터 공급자 호출 지연 시간(초)", ("source", "method"))
+
+
+class ReplayMissError(LookupError):
+    '''재생 공급자에 해당 호출의 기록이 없을 때 발생'''
+
+
+def _next_day(date_str):
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class LiveProvider:
+    '''
+    - yfinance, pykrx, FinanceDataReader를 실제로 호출하는 공급자
+    - 일봉은 저장소 형식('YYYY-MM-DD' index, OHLCV 컬럼, 수정주가)으로 변환하여 반환
+    '''
+    def daily_bars(self, ticker, start_str, end_str):
+        '''[start_str, end_str] 구간의 일봉 (데이터가 없으면 빈 DataFrame)'''
+        from ohlcv_store import normalize_bars
+        hist = yf.Ticker(ticker).history(start=start_str, end=_next_day(end_str))
+        return normalize_bars(hist)
+
+    def daily_bars_many(self, tickers, start_str, end_str):
+        '''여러 종목의 [start_str, end_str] 구간 일봉을 {티커: 일봉} 으로 반환 (데이터가 없는 종목은 제외)'''
+        from ohlcv_store import normalize_bars
+        data = yf.download(list(tickers), start=start_str, end=_next_day(end_str),
+                           progress=False, group_by='ticker', auto_adjust=True)
+        if data is None or data.empty:
+            return {}
+        bars_by_ticker = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                ticker_data = data[ticker]
+            else:
+                ticker_data = data
+            bars = normalize_bars(ticker_data.dropna(how='all'))
+            if not bars.empty:
+                bars_by_ticker[ticker] = bars
+        return bars_by_ticker
+
+    def market_snapshot(self, date_formatted, market):
+        ''''YYYYMMDD' 날짜의 시장 전 종목 시세 (pykrx get_market_ohlcv_by_ticker 결과 그대로)'''
+        return stock.get_market_ohlcv_by_ticker(date_formatted, market=market)
+
+    def listing(self):
+        '''KRX 상장 종목 목록 (FinanceDataReader StockListing 결과 그대로)'''
+        return fdr.StockListing("KRX")
+
+    def shares_outstanding(self, ticker):
+        '''상장주식수 (조회할 수 없으면 None)'''
+        info = yf.Ticker(ticker).info
+        for field in ['sharesOutstanding', 'impliedSharesOutstanding', 'floatShares']:
+            if info.get(field):
+                return info[field]
+        return None
+
+    def business_days(self, start_str, end_str):
+        '''[start_str, end_str] 구간의 KRX 영업일 ('YYYY-MM-DD' 목록)'''
+        days = stock.get_previous_business_days(fromdate=start_str.replace("-", ""), todate=end_str.replace("-", ""))
+        return [d.strftime("%Y-%m-%d") for d in days]
+
+
+def recording_key(method, args):
+    '''호출 이름과 인자로 기록 파일 이름을 만듦 (여러 종목 조회는 티커 순서와 무관)'''
+    args = [sorted(a) if isinstance(a, (list, tuple)) else a for a in args]
+    payload = json.dumps([method, args], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def _recording_path(root, method, args):
+    return os.path.join(root, method, f"{recording_key(method, args)}.pkl")
+
+
+class RecordingProvider:
+    '''
+    - 내부 공급자(기본값: LiveProvider)를 호출하고, 응답을 root 아래에 기록하는 공급자
+    - 예외가 발생한 호출은 기록하지 않음 (재생 시에는 ReplayMissError로 같은 실패 경로를 탐)
+    '''
+    def __init__(self, root=None, inner=None):
+        self.root = root or Config.PROVIDER_RECORD_DIR
+        self.inner = inner or LiveProvider()
+
+    def _record(self, method, *args):
+        result = getattr(self.inner, method)(*args)
+        path = _recording_path(self.root, method, args)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"method": method, "args": list(args), "result": result}, f)
+        os.replace(tmp_path, path)
+        return result
+
+    def daily_bars(self, ticker, start_str, end_str):
+        return self._record("daily_bars", ticker, start_str, end_str)
+
+    def daily_bars_many(self, tickers, start_str, end_str):
+        return self._record("daily_bars_many", list(tickers), start_str, end_str)
+
+    def market_snapshot(self, date_formatted, market):
+        return self._record("market_snapshot", date_formatted, market)
+
+    def listing(self):
+        return self._record("listing")
+
+    def shares_outstanding(self, ticker):
+        return self._record("shares_outstanding", ticker)
+
+    def business_days(self, start_str, end_str):
+        return self._record("business_days", start_str, end_str)
+
+
+class ReplayProvider:
+    '''
+    - RecordingProvider가 기록한 응답을 돌려주는 공급자 (네트워크를 사용하지 않음)
+    - latency: 호출마다 기다릴 시간(초), 또는 {호출 이름: 시간} (지정하지 않은 호출은 0초)
+    - 읽은 기록은 메모리에 올려두고, 반환할 때는 복사본을 돌려주어 호출하는 쪽의 수정이 기록에 남지 않도록 함
+    '''
+    def __init__(self, root=None, latency=None):
+        self.root = root or Config.PROVIDER_RECORD_DIR
+        self.latency = Config.PROVIDER_REPLAY_LATENCY if latency is None else latency
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.calls = {method: 0 for method in PROVIDER_METHODS}
+        self.misses = 0
+
+    def _delay(self, method):
+        seconds = self.latency.get(method, 0) if isinstance(self.latency, dict) else self.latency
+        if seconds:
+            time.sleep(seconds)
+
+    def _replay(self, method, *args):
+        self._delay(method)
+        path = _recording_path(self.root, method, args)
+        with self._lock:
+            self.calls[method] += 1
+            if path not in self._cache:
+                if not os.path.exists(path):
+                    self.misses += 1
+                    raise ReplayMissError(f"{method}{tuple(args)} 호출의 기록이 없습니다.")
+                with open(path, "rb") as f:
+                    self._cache[path] = pickle.load(f)["result"]
+            result = self._cache[path]
+        return pickle.loads(pickle.dumps(result))
+
+    def daily_bars(self, ticker, start_str, end_str):
+        return self._replay("daily_bars", ticker, start_str, end_str)
+
+    def daily_bars_many(self, tickers, start_str, end_str):
+        return self._replay("daily_bars_many", list(tickers), start_str, end_str)
+
+    def market_snapshot(self, date_formatted, market):
+        return self._replay("market_snapshot", date_formatted, market)
+
+    def listing(self):
+        return self._replay("listing")
+
+    def shares_outstanding(self, ticker):
+        return self._replay("shares_outstanding", ticker)
+
+    def business_days(self, start_str, end_str):
+        return self._replay("business_days", start_str, end_str)
+
+
+class MeteredProvider:
+    '''
+    - 다른 공급자의 호출마다 데이터 소스별 호출 수, 결과(ok/empty/error), 오류 종류, 지연 시간을 지표로 기록하는 래퍼
+    - pykrx 등은 조회 실패를 빈 결과로 돌려주므로 빈 결과도 따로 집계
+    '''
+    def __init__(self, inner):
+        self.inner = inner
+        self.provider_name = type(inner).__name__
+
+    def _call(self, method, *args):
+        source = DATA_SOURCES[method]
+        started = time.perf_counter()
+        try:
+            result = getattr(self.inner, method)(*args)
+        except Exception as e:
+            DATA_SOURCE_CALLS.inc(source=source, method=method, provider=self.provider_name, result="error")
+            DATA_SOURCE_ERRORS.inc(source=source, method=method, error=type(e).__name__)
+            raise
+        finally:
+            DATA_SOURCE_LATENCY.observe(time.perf_counter() - started, source=source, method=method)
+        empty = result is None or (hasattr(result, "__len__") and len(result) == 0)
+        DATA_SOURCE_CALLS.inc(source=source, method=method, provider=self.provider_name, result="empty" if empty else "ok")
+        return result
+
+    def daily_bars(self, ticker, start_str, end_str):
+        return self._call("daily_bars", ticker, start_str, end_str)
+
+    def daily_bars_many(self, tickers, start_str, end_str):
+        return self._call("daily_bars_many", tickers, start_str, end_str)
+
+    def market_snapshot(self, date_formatted, market):
+        return self._call("market_snapshot", date_formatted, market)
+
+    def listing(self):
+        return self._call("listing")
+
+    def shares_outstanding(self, ticker):
+        return self._call("shares_outstanding", ticker)
+
+    def business_days(self, start_str, end_str):
+        return self._call("business_days", start_str, end_str)
+
+    def __getattr__(self, name):
+        # 감싼 공급자의 다른 속성(calls, misses 등)은 그대로 노출
+        return getattr(self.inner, name)
+
+
+PROVIDERS = {"live": LiveProvider, "record": RecordingProvider, "replay": ReplayProvider, "fixture": FixtureProvider}
+
+_PROVIDER = None
+_PROVIDER_LOCK = threading.Lock()
+
+
+def get_provider():
+    '''프로세스 전체가 공유하는 데이터 공급자 (Config.DATA_PROVIDER로 선택)'''
+    global _PROVIDER
+    if _PROVIDER is None:
+        with _PROVIDER_LOCK:
+            if _PROVIDER is None:
+                if Config.DATA_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"알 수 없는 데이터 공급자입니다: {Config.DATA_PROVIDER} (live, record, replay, fixture 중 선택)")
+                _PROVIDER = MeteredProvider(PROVIDERS[Config.DATA_PROVIDER]())
+    return _PROVIDER
+
+
+def set_provider(provider):
+    '''공유 데이터 공급자를 바꾸고 이전 공급자를 반환 (벤치마크, 오프라인 실행용, 지표 기록 래퍼로 감쌈)'''
+    global _PROVIDER
+    if provider is not None and not isinstance(provider, MeteredProvider):
+        provider = MeteredProvider(provider)
+    with _PROVIDER_LOCK:
+        previous, _PROVIDER = _PROVIDER, provider
+    return previous
@@ -0,0 +1,203 @@
+'''
+- 여러 사용자를 동시에 처리하는 에이전트 HTTP 서버 (asyncio + aiohttp, JSON API)
+- main.py와 같은 흐름(agent.arun_turn: 첫 번째 LLM 호출 → SKILL_HANDLERS 실행 → 두 번째 LLM 호출)을 세션마다 실행
+- 세션마다 대화 기록(history.ChatHistory)을 따로 두고, 같은 세션의 턴은 순서대로 처리
+- 함수 실행 결과 캐시, 답변 캐시, 시세 저장소, LLM 연결 풀은 모든 세션이 공유
+- 데이터 조회 함수는 크기가 정해진 공유 스레드 풀(agent.TOOL_EXECUTOR)에서 실행하고, 동시에 처리하는 턴 수도 제한
+- API
+    POST   /chat                  {"query": "...", "session_id": "(선택)", "stream": false}
+                                  → {"session_id", "answer", "tool_calls", "timings", "cache", "routed"}
+                                  (stream이 true이면 text/event-stream으로 token 이벤트 후 result 이벤트 전송)
+    DELETE /sessions/{session_id} 세션 대화 기록 삭제
+    GET    /health                세션 수, 처리 중인 턴 수, 캐시 통계
+    GET    /metrics               Prometheus 텍스트 형식 지표 (metrics.REGISTRY)
+'''
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from aiohttp import web
+
+from agent import arun_turn, summarize_tool_calls
+from answer_cache import ANSWER_CACHE
+from config import Config
+from history import ChatHistory
+from llm_client import LLM_CLIENT
+from metrics import CONTENT_TYPE, REGISTRY
+from tool_cache import TOOL_CACHE
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+def _json_response(data, status=200):
+    return web.json_response(data, status=status, dumps=_dumps)
+
+
+class Session:
+    '''세션 하나의 대화 기록과 턴 처리 순서를 지키기 위한 잠금'''
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.history = ChatHistory()
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class AgentServer:
+    '''
+    - 세션 관리와 HTTP 핸들러
+    - 오래 사용하지 않은 세션은 session_ttl초 후 정리하고, 세션 수가 max_sessions를 넘으면 가장 오래된 세션부터 정리
+    '''
+    def __init__(self, max_concurrent_turns=None, session_ttl=None, max_sessions=None):
+        self.session_ttl = session_ttl or Config.SERVER_SESSION_TTL
+        self.max_sessions = max_sessions or Config.SERVER_MAX_SESSIONS
+        self._turn_slots = asyncio.Semaphore(max_concurrent_turns or Config.SERVER_MAX_CONCURRENT_TURNS)
+        self._sessions = {}
+        self.active_turns = 0
+        self.total_turns = 0
+
+    def _get_session(self, session_id):
+        self._expire_sessions()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id)
+            while len(self._sessions) > self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_used)
+                del self._sessions[oldest.session_id]
+        session.last_used = time.monotonic()
+        return session
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_used > self.session_ttl and not session.lock.locked():
+                del self._sessions[session_id]
+
+    async def _run_turn(self, session, query, stream=False, on_token=None):
+        # 같은 세션의 턴은 순서대로, 전체 턴 수는 turn_slots 이내로 처리
+        async with session.lock, self._turn_slots:
+            self.active_turns += 1
+            try:
+                turn = await arun_turn(query, session.history.messages(), stream=stream, on_token=on_token,
+                                       previous_tools=session.history.last_tool_names())
+            finally:
+                self.active_turns -= 1
+                self.total_turns += 1
+            session.history.append(query, turn["answer"], turn["tool_calls"])
+            session.last_used = time.monotonic()
+        return {
+            "session_id": session.session_id,
+            "answer": turn["answer"],
+            "tool_calls": summarize_tool_calls(turn["tool_calls"]),
+            "timings": {k: round(v, 4) for k, v in turn["timings"].items()},
+            "cache": turn["cache"],
+            "routed": turn["routed"],
+        }
+
+    async def handle_chat(self, request):
+        try:
+            payload = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return _json_response({"error": "요청 본문이 올바른 JSON이 아닙니다."}, status=400)
+        query = payload.get("query") if isinstance(payload, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return _json_response({"error": "query를 입력해 주세요."}, status=400)
+
+        session = self._get_session(str(payload.get("session_id") or uuid.uuid4().hex))
+        if not payload.get("stream"):
+            return _json_response(await self._run_turn(session, query.strip()))
+        return await self._stream_chat(request, session, query.strip())
+
+    async def _stream_chat(self, request, session, query):
+        '''답변 토큰을 SSE(token 이벤트)로 보내고, 마지막에 전체 결과(result 이벤트)를 보냄'''
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream; charset=utf-8", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        tokens = asyncio.Queue()
+        turn_task = asyncio.ensure_future(self._run_turn(session, query, stream=True, on_token=tokens.put_nowait))
+        turn_task.add_done_callback(lambda _: tokens.put_nowait(None))
+
+        while True:
+            token = await tokens.get()
+            if token is None:
+                break
+            await response.write(f"event: token\ndata: {_dumps({'content': token})}\n\n".encode("utf-8"))
+
+        try:
+            result = await turn_task
+            await response.write(f"event: result\ndata: {_dumps(result)}\n\n".encode("utf-8"))
+        except Exception as e:
+            await response.write(f"event: error\ndata: {_dumps({'error': f'답변 생성 중 오류 발생: {e}'})}\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def handle_delete_session(self, request):
+        removed = self._sessions.pop(request.match_info["session_id"], None) is not None
+        return _json_response({"removed": removed})
+
+    async def handle_metrics(self, request):
+        return web.Response(body=REGISTRY.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def handle_health(self, request):
+        return _json_response({
+            "sessions": len(self._sessions),
+            "active_turns": self.active_turns,
+            "total_turns": self.total_turns,
+            "tool_cache": TOOL_CACHE.stats(),
+            "answer_cache": ANSWER_CACHE.stats(),
+        })
+
+
+@web.middleware
+async def _error_middleware(request, handler):
+    # 처리되지 않은 예외도 JSON 오류 응답으로 반환
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        return _json_response({"error": f"요청 처리 중 오류 발생: {e}"}, status=500)
+
+
+async def _close_llm_client(app):
+    await LLM_CLIENT.aclose()
+
+
+def create_app(**kwargs):
+    '''에이전트 서버 aiohttp 애플리케이션 생성 (kwargs는 AgentServer 설정)'''
+    server = AgentServer(**kwargs)
+    REGISTRY.gauge("server_sessions", "서버 세션 수").set_function(lambda: len(server._sessions))
+    REGISTRY.gauge("server_active_turns", "서버에서 처리 중인 턴 수").set_function(lambda: server.active_turns)
+    app = web.Application(middlewares=[_error_middleware])
+    app["agent_server"] = server
+    app.router.add_post("/chat", server.handle_chat)
+    app.router.add_delete("/sessions/{session_id}", server.handle_delete_session)
+    app.router.add_get("/health", server.handle_health)
+    app.router.add_get("/metrics", server.handle_metrics)
+    app.on_cleanup.append(_close_llm_client)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="금융 정보 에이전트 HTTP 서버")
+    parser.add_argument("--host", default=Config.SERVER_HOST, help="바인딩할 주소")
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT, help="포트 번호")
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
+
+
+'''
+실행 예시
+python server.py --port 8080
+curl -s localhost:8080/chat -d '{"session_id": "analyst-1", "query": "삼성전자 2025-03-05 종가 알려줘"}'
+curl -sN localhost:8080/chat -d '{"session_id": "analyst-1", "query": "그럼 SK하이닉스는?", "stream": true}'
+curl -s localhost:8080/health
+curl -s localhost:8080/metrics
+'''
@@ -2,43 +2,50 @@
 - 스킬셋: 실제 금융 데이터를 조회하는 함수(Tool)들의 모음
 - 각 함수는 명확한 단일 작업을 수행하며, function_caller에 의해 호출됨
 '''
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
-from pykrx import stock
 import warnings
-import logging
-import sys
-import os
-import FinanceDataReader as fdr
 import json
 import re
-from langchain_naver import ChatClovaX
+import threading
+import time
+import functools
+import operator
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor
-
-# yfinance 경고 및 오류 메시지 억제
+from lazy_import import lazy_module
+from providers import get_provider
+from ohlcv_store import OHLCV_STORE, OHLCV_COLUMNS
+from market_snapshot import get_market_snapshot
+from ticker_index import get_ticker_index
+from trading_calendar import get_trading_calendar
+from metrics import REGISTRY
+from tracing import bind, result_rows, span
+from indicator_engine import (
+    INDICATOR_STORE, INDICATOR_LOOKBACK_SESSIONS, build_price_matrix, compute_indicators, indicator_rows, volume_ratio
+)
+
+# 데이터 라이브러리는 처음 사용하는 스킬이 실행될 때 import (SKILL_HANDLERS import와 CLI 시작을 가볍게 유지)
+# 외부 시세 조회(yfinance, pykrx, FinanceDataReader)는 providers.get_provider()를 거침
+pd = lazy_module("pandas")
+
+# 데이터 라이브러리 경고 메시지 억제
 warnings.filterwarnings('ignore')
-logging.getLogger('yfinance').setLevel(logging.CRITICAL)
 
 # --- Setup from v0.2 ---
 load_dotenv()
-llm = ChatClovaX(model="HCX-005", temperature=0.3, top_p=0.8, max_tokens=256)
-
-# stdout 캡처를 위한 클래스
-class SuppressOutput:
-    def __enter__(self):
-        self._original_stdout = sys.stdout
-        self._original_stderr = sys.stderr
-        sys.stdout = open(os.devnull, 'w')
-        sys.stderr = open(os.devnull, 'w')
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout.close()
-        sys.stderr.close()
-        sys.stdout = self._original_stdout
-        sys.stderr = self._original_stderr
+
+# 조건 검색 질문 해석용 CLOVA 클라이언트 (처음 필요할 때 생성)
+_LLM = None
+_LLM_LOCK = threading.Lock()
+
+def get_llm():
+    global _LLM
+    if _LLM is None:
+        with _LLM_LOCK:
+            if _LLM is None:
+                from langchain_naver import ChatClovaX
+                _LLM = ChatClovaX(model="HCX-005", temperature=0.3, top_p=0.8, max_tokens=256)
+    return _LLM
 
 # --- 전역 변수 및 캐시 ---
 # 1. 빠른 조회를 위한 기본 종목 맵 (캐시 역할)
@@ -79,61 +86,18 @@ KOSPI_TICKERS = list(v for k, v in STOCK_TICKER_MAP.items() if ".KS" in v)
 KOSDAQ_TICKERS = list(v for k, v in STOCK_TICKER_MAP.items() if ".KQ" in v)
 MARKET_INDEX_TICKERS = {"KOSPI": "^KS11", "KOSDAQ": "^KQ11"}
 
-# 2. 전체 종목 티커 캐시 (pykrx 동적 조회)
-_KRX_TICKER_CACHE = None
-_FDR_KRX_CACHE = None
-
-def _initialize_krx_cache():
-    '''
-    - KRX로부터 전체 종목의 티커와 이름을 조회하여 캐시를 초기화
-    '''
-    global _KRX_TICKER_CACHE
-    if _KRX_TICKER_CACHE is None:
-        _KRX_TICKER_CACHE = {}
-        try:
-            today_str = datetime.now().strftime("%Y%m%d")
-            for market_code in ["KOSPI", "KOSDAQ"]:
-                tickers = stock.get_market_ticker_list(today_str, market=market_code)
-                for ticker in tickers:
-                    name = stock.get_market_ticker_name(ticker)
-                    # yfinance 형식에 맞게 접미사 추가
-                    suffix = ".KS" if market_code == "KOSPI" else ".KQ"
-                    _KRX_TICKER_CACHE[name] = f"{ticker}{suffix}"
-        except Exception as e:
-
-def get_krx_cache():
-    global _FDR_KRX_CACHE
-    if _FDR_KRX_CACHE is None:
-        _FDR_KRX_CACHE = fdr.StockListing("KRX")
-    return _FDR_KRX_CACHE
-
+# 2. 전체 종목 유니버스 (종목명 ↔ 티커 ↔ 시장 인덱스, 거래일마다 한 번 갱신, ticker_index.py)
 def _get_all_market_tickers(market=None):
     '''
     - 지정된 시장(또는 전체 시장)의 모든 티커를 반환
     '''
-    _initialize_krx_cache()
-    
-    if market == "KOSPI":
-        return [ticker for ticker in _KRX_TICKER_CACHE.values() if ".KS" in ticker]
-    elif market == "KOSDAQ":
-        return [ticker for ticker in _KRX_TICKER_CACHE.values() if ".KQ" in ticker]
-    else:
-        return list(_KRX_TICKER_CACHE.values())
+    return get_ticker_index().tickers(market)
 
 def _get_previous_trading_day(date_str=None):
     '''
-    - 주어진 날짜(또는 오늘)의 이전 거래일을 반환
+    - 주어진 날짜(또는 오늘) 이하의 가장 최근 거래일을 반환 (주말뿐 아니라 공휴일/임시 휴장일도 제외)
     '''
-    if date_str:
-        target_date = datetime.strptime(date_str, "%Y-%m-%d")
-    else:
-        target_date = datetime.now()
-    
-    # 주말 체크하여 가장 최근 거래일 찾기
-    while target_date.weekday() >= 5:  # 토요일(5), 일요일(6)
-        target_date -= timedelta(days=1)
-    
-    return target_date.strftime("%Y-%m-%d")
+    return get_trading_calendar().latest(date_str)
 
 # --- 헬퍼 함수 ---
 def get_ticker(stock_name):
@@ -146,9 +110,8 @@ def get_ticker(stock_name):
     if ticker:
         return ticker
 
-    # 2. 내부 맵에 없으면, KRX 전체 캐시에서 검색
-    _initialize_krx_cache() # 캐시가 비어있으면 초기화
-    ticker = _KRX_TICKER_CACHE.get(stock_name)
+    # 2. 내부 맵에 없으면, KRX 전체 종목 인덱스에서 검색
+    ticker = get_ticker_index().ticker(stock_name)
     if ticker:
         # 찾은 종목을 다음 빠른 조회를 위해 내부 맵에 추가
         STOCK_TICKER_MAP[stock_name] = ticker
@@ -156,17 +119,35 @@ def get_ticker(stock_name):
         
     return None
 
-# --- 주식 데이터 조회 (개선된 버전) ---
+# --- 지표 ---
+SKILL_DURATION = REGISTRY.histogram("skill_duration_seconds", "함수(Tool) 실제 실행 시간(초, 결과 캐시 적중 제외)", ("tool", "result"))
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "캐시 조회 수 (result: hit, miss)", ("cache", "result"))
+
+# --- 주식 데이터 조회 (로컬 OHLCV 저장소 우선) ---
+def _load_daily_bars(ticker, start_str, end_str):
+    '''
+    - [start_str, end_str] 구간의 일봉을 로컬 저장소에서 읽고, 저장소에 없는 구간만 데이터 공급자로 받아와 채움
+    - 'YYYY-MM-DD' 문자열 index를 가진 DataFrame 반환
+    '''
+    bars, missing = OHLCV_STORE.read(ticker, start_str, end_str)
+    CACHE_REQUESTS.inc(cache="ohlcv", result="miss" if missing else "hit")
+    if not missing:
+        return bars
+
+    with span("data.daily_bars", ticker=ticker, missing_days=len(missing)) as fetch_span:
+        fetched = get_provider().daily_bars(ticker, missing[0], missing[-1])
+        fetch_span.set(rows=len(fetched))
+    if fetched.empty:
+        # 네트워크 오류와 휴장일을 구분할 수 없으므로 아무것도 기록하지 않음
+        return bars
+
+    OHLCV_STORE.write(ticker, fetched, covered_dates=missing)
+    fetched = fetched[fetched.index.isin(missing)]
+    return pd.concat([bars, fetched]).sort_index()
+
 def get_history(ticker, date_str):
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        end_date_obj = date_obj + timedelta(days=1)
-        
-        # 오류 메시지 억제하면서 데이터 조회
-        with SuppressOutput():
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=date_str, end=end_date_obj.strftime("%Y-%m-%d"))
-        
+        hist = _load_daily_bars(ticker, date_str, date_str)
         if hist.empty:
             return None
         return hist.iloc[0]
@@ -178,48 +159,109 @@ def get_history_with_previous(ticker, date_str):
     - 특정 날짜와 이전 거래일의 데이터를 함께 가져옴 (등락률 계산용)
     '''
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        # 이전 거래일을 포함하기 위해 일주일 전부터 조회
-        start_date_obj = date_obj - timedelta(days=7)
-        end_date_obj = date_obj + timedelta(days=1)
-        
-        # 오류 메시지 억제하면서 데이터 조회
-        with SuppressOutput():
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start_date_obj.strftime("%Y-%m-%d"), 
-                               end=end_date_obj.strftime("%Y-%m-%d"))
-        
-        if hist.empty or len(hist) < 1:
+        # 이전 거래일부터 요청한 날짜까지 정확히 두 거래일만 조회
+        previous_str = get_trading_calendar().previous(date_str) or date_str
+        hist = _load_daily_bars(ticker, previous_str, date_str)
+
+        if hist.empty or date_str not in hist.index:
             return None, None
-            
-        # 요청한 날짜의 데이터 찾기
-        target_date = date_obj.strftime("%Y-%m-%d")
-        target_data = None
-        previous_data = None
-        
-        for i, (date_index, row) in enumerate(hist.iterrows()):
-            if date_index.strftime("%Y-%m-%d") == target_date:
-                target_data = row
-                # 이전 거래일 데이터 (바로 전 행)
-                if i > 0:
-                    previous_data = hist.iloc[i-1]
-                break
-        
+
+        # 요청한 날짜의 데이터와 바로 전 행(이전 거래일)의 데이터
+        position = hist.index.get_loc(date_str)
+        target_data = hist.iloc[position]
+        previous_data = hist.iloc[position - 1] if position > 0 else None
         return target_data, previous_data
     except Exception:
         return None, None
 
-def _safe_yf_download(tickers, start_date, end_date):
+def _safe_download_bars(tickers, start_str, end_str):
     '''
-    - yfinance download를 안전하게 실행하고 오류 메시지를 억제
+    - 여러 종목 일봉 일괄 조회를 안전하게 실행 ({티커: 일봉}, 실패 시 빈 dict, 라이브러리 오류 메시지는 providers에서 로거로 억제)
     '''
-    try:
-        with SuppressOutput():
-            data = yf.download(tickers, start=start_date, end=end_date, 
-                             progress=False, group_by='ticker', auto_adjust=False)
-        return data
-    except Exception:
-        return pd.DataFrame()
+    with span("data.daily_bars_many", tickers=len(tickers), start=start_str, end=end_str) as fetch_span:
+        try:
+            bars_by_ticker = get_provider().daily_bars_many(tickers, start_str, end_str)
+        except Exception as e:
+            fetch_span.set(error=str(e))
+            return {}
+        fetch_span.set(returned=len(bars_by_ticker), rows=result_rows(bars_by_ticker))
+        return bars_by_ticker
+
+def _load_daily_panel(tickers, start_str, end_str):
+    '''
+    - 여러 종목의 [start_str, end_str] 구간 일봉을 날짜별로 묶어 반환 (date -> 티커 index DataFrame)
+    - 로컬 저장소에 없는 종목만 데이터 공급자의 일괄 조회로 받아와 저장소에 채움
+    '''
+    panel, missing = OHLCV_STORE.read_panel(tickers, start_str, end_str)
+    CACHE_REQUESTS.inc(len(tickers) - len(missing), cache="ohlcv", result="hit")
+    CACHE_REQUESTS.inc(len(missing), cache="ohlcv", result="miss")
+    if not missing:
+        return panel
+
+    chunk_size = 100
+    chunks = [missing[i:i+chunk_size] for i in range(0, len(missing), chunk_size)]
+
+    # 구간 전체가 비어 있는 종목은 조회 실패일 수 있으므로 공급자가 결과에서 제외하고, 저장하지도 않음
+    fetched = {}
+    with span("data.daily_panel", tickers=len(tickers), missing=len(missing), chunks=len(chunks)) as panel_span, \
+            ThreadPoolExecutor(max_workers=8) as executor:
+        for bars_by_ticker in executor.map(bind(lambda chunk: _safe_download_bars(chunk, start_str, end_str)), chunks):
+            fetched.update(bars_by_ticker)
+        panel_span.set(fetched=len(fetched))
+
+    if not fetched:
+        return panel
+
+    # panel의 날짜는 모두 받아온 구간 안의 지난 평일이므로, 그날 행이 없는 종목은 tombstone으로 기록됨
+    OHLCV_STORE.write_many(fetched, covered_dates=list(panel))
+
+    rows_by_date = pd.concat([bars.assign(ticker=t) for t, bars in fetched.items()]).groupby(level=0)
+    for date_str, day in rows_by_date:
+        if not (start_str <= date_str <= end_str):
+            continue
+        day_rows = day.set_index('ticker')[OHLCV_COLUMNS]
+        existing = panel.get(date_str)
+        if existing is not None and not existing.empty:
+            day_rows = pd.concat([existing[~existing.index.isin(day_rows.index)], day_rows])
+        panel[date_str] = day_rows
+    return panel
+
+def _load_price_matrix(tickers, date_str, sessions):
+    '''
+    - date_str까지 최근 sessions거래일 구간의 티커 × 날짜 가격/거래량 행렬을 구성
+    '''
+    start_str = get_trading_calendar().offset(date_str, -(sessions - 1)) or date_str
+    panel = _load_daily_panel(tickers, start_str, date_str)
+    return build_price_matrix(tickers, panel)
+
+def _storable_indicator_rows(rows, date_str):
+    '''
+    - 지표 파티션에 저장할 행 (그날 일봉이 없는 종목은 NaN 행(tombstone)으로 남겨 다음 조회 때 다시 계산하지 않음)
+    - 일봉 저장소에도 그날 기록이 있는(조회는 되었지만 행이 없던) 종목만 tombstone으로 저장하고, 조회 실패로 비어 있는 종목은 저장하지 않음
+    '''
+    known = OHLCV_STORE.load_partition(date_str).index
+    return rows[rows['close'].notna() | rows.index.isin(known)]
+
+def _load_indicator_frame(tickers, date_str):
+    '''
+    - 특정 날짜의 종목별 지표(종가, 거래량, MA5, MA20, 볼린저 상/하단, RSI14, 20일 평균 거래량)를 티커 index DataFrame으로 반환
+    - 미리 계산해 둔 지표 파티션을 먼저 조회하고, 파티션에 없는 종목만 가격 행렬로 계산한 뒤 저장
+    '''
+    # 장중(미확정) 날짜는 파티션이 저장되지 않으므로 항상 새로 계산됨
+    frame = INDICATOR_STORE.load_partition(date_str)
+    present = frame.index.intersection(tickers)
+    frame = frame.loc[present]
+
+    present_set = set(present)
+    missing = [t for t in tickers if t not in present_set]
+    if missing:
+        matrix = _load_price_matrix(missing, date_str, INDICATOR_LOOKBACK_SESSIONS)
+        rows = indicator_rows(matrix, compute_indicators(matrix), date_str)
+        if rows is not None:
+            INDICATOR_STORE.write_partition(date_str, _storable_indicator_rows(rows, date_str))
+            frame = pd.concat([frame, rows]) if not frame.empty else rows
+
+    return frame.dropna(subset=['close'])
 
 # --- 실제 작업을 수행하는 함수 (Tools) ---
 # 1. 주식 데이터 조회 (등락률 계산 개선)
@@ -307,62 +349,42 @@ def get_top_stocks_by_metric(**kwargs):
     if not tickers:
         return f"'{market}' 시장의 종목 정보를 가져올 수 없습니다."
 
-    # 등락률 계산을 위해서는 더 긴 기간의 데이터가 필요
+    # 등락률 계산을 위해서는 이전 거래일 데이터가 필요
     if metric in ["상승률", "하락률"]:
-        start_date_obj = datetime.strptime(date, "%Y-%m-%d") - timedelta(days=7)
-        start_date = start_date_obj.strftime("%Y-%m-%d")
+        start_date = get_trading_calendar().previous(date) or date
     else:
         start_date = date
     
-    end_date = (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-
     # 안전한 데이터 다운로드로 개선
-    data_chunks = []
+    bars_by_ticker = {}
     chunk_size = 50  # 청크 크기 축소로 안정성 향상
     
     for i in range(0, len(tickers), chunk_size):
         chunk_tickers = tickers[i:i+chunk_size]
-        chunk_data = _safe_yf_download(chunk_tickers, start_date, end_date)
-        if not chunk_data.empty:
-            data_chunks.append(chunk_data)
+        bars_by_ticker.update(_safe_download_bars(chunk_tickers, start_date, date))
             
-    if not data_chunks:
-        return f"{date}에 대한 데이터를 가져올 수 없습니다."
-        
-    # 데이터 병합
-    data = pd.concat(data_chunks, axis=1) if len(data_chunks) > 1 else data_chunks[0]
-
-    if data.empty:
+    if not bars_by_ticker:
         return f"{date}에 대한 데이터를 가져올 수 없습니다."
     
-    # 각 티커별로 해당 날짜의 데이터 추출
+    # 각 티커별로 해당 날짜의 데이터 추출 (일봉 index는 'YYYY-MM-DD' 문자열)
     stock_data = []
-    target_date = datetime.strptime(date, "%Y-%m-%d")
     
     for ticker in tickers:
         try:
-            if ticker in data.columns.get_level_values(0):
-                ticker_data = data[ticker]
-                if not ticker_data.empty and not ticker_data.isna().all().all():
-                    # 요청 날짜의 데이터 찾기
-                    target_row = None
-                    previous_row = None
-                    
-                    for i, (date_index, row) in enumerate(ticker_data.iterrows()):
-                        if date_index.date() == target_date.date():
-                            target_row = row
-                            if i > 0:
-                                previous_row = ticker_data.iloc[i-1]
-                            break
-                    
-                    if target_row is not None and not target_row.isna().all():
-                        stock_entry = {'ticker': ticker, **target_row.to_dict()}
-                        
-                        # 등락률 계산이 필요한 경우 이전일 데이터 추가
-                        if metric in ["상승률", "하락률"] and previous_row is not None:
-                            stock_entry['Previous_Close'] = previous_row['Close']
-                        
-                        stock_data.append(stock_entry)
+            ticker_data = bars_by_ticker.get(ticker)
+            if ticker_data is None or date not in ticker_data.index:
+                continue
+            position = ticker_data.index.get_loc(date)
+            target_row = ticker_data.iloc[position]
+            
+            if not target_row.isna().all():
+                stock_entry = {'ticker': ticker, **target_row.to_dict()}
+                
+                # 등락률 계산이 필요한 경우 이전일 데이터 추가
+                if metric in ["상승률", "하락률"] and position > 0:
+                    stock_entry['Previous_Close'] = ticker_data['Close'].iloc[position - 1]
+                
+                stock_data.append(stock_entry)
         except:
             continue
 
@@ -373,8 +395,7 @@ def get_top_stocks_by_metric(**kwargs):
     df.set_index('ticker', inplace=True)
     
     # 종목명 매핑
-    ticker_to_name_map = {v: k for k, v in _KRX_TICKER_CACHE.items()} if _KRX_TICKER_CACHE else {}
-    df['stock_name'] = df.index.map(ticker_to_name_map)
+    df['stock_name'] = df.index.map(get_ticker_index().name)
     df.dropna(subset=['stock_name', 'Open', 'Close', 'Volume'], inplace=True)
 
     if metric == "거래량":
@@ -410,114 +431,71 @@ def get_top_stocks_by_metric(**kwargs):
 def get_market_statistics(**kwargs):
     '''
     - 특정 날짜의 시장 통계를 조회 (상승/하락 종목 수, 전체 거래대금 등)
+    - 시장 스냅샷 한 번으로 전 종목을 한꺼번에 집계
     '''
     date = kwargs.get('date')
-    stat_type = kwargs.get('stat_type')  # 'rising_count', 'falling_count', 'total_trading_value', 'kospi_rising', 'kosdaq_rising'
+    stat_type = kwargs.get('stat_type')  # 'rising_count', 'falling_count', 'total_trading_value', 'market_rising_count', 'market_traded_count'
     market = kwargs.get('market', None)  # 특정 시장 지정 시 사용
+    # 스냅샷이 비어 있으면(휴장일 또는 조회 실패) "0개"가 아닌 데이터 없음으로 답함 (함수 결과/답변 캐시가 오래 보관하지 않도록)
+    no_data = f"{date} 휴장일이거나 조회에 실패하여 시장 데이터가 없습니다."
     
     try:
-        date_formatted = date.replace('-', '')
-        
         if stat_type == 'rising_count':
             # 전체 시장 상승 종목 수
-            kospi_rising = len([t for t in stock.get_market_ticker_list(date_formatted, "KOSPI") 
-                              if _is_stock_rising(t, date)])
-            kosdaq_rising = len([t for t in stock.get_market_ticker_list(date_formatted, "KOSDAQ") 
-                               if _is_stock_rising(t, date)])
-            total_rising = kospi_rising + kosdaq_rising
-            return f"{total_rising}개"
+            snapshot = get_market_snapshot(date, "ALL")
+            if snapshot.empty:
+                return no_data
+            return f"{int(_is_stock_rising(snapshot).sum())}개"
             
         elif stat_type == 'falling_count':
             # 전체 시장 하락 종목 수
-            kospi_falling = len([t for t in stock.get_market_ticker_list(date_formatted, "KOSPI") 
-                               if _is_stock_falling(t, date)])
-            kosdaq_falling = len([t for t in stock.get_market_ticker_list(date_formatted, "KOSDAQ") 
-                                if _is_stock_falling(t, date)])
-            total_falling = kospi_falling + kosdaq_falling
-            return f"{total_falling}개"
+            snapshot = get_market_snapshot(date, "ALL")
+            if snapshot.empty:
+                return no_data
+            return f"{int(_is_stock_falling(snapshot).sum())}개"
             
         elif stat_type == 'total_trading_value':
             # 전체 시장 거래대금
-            kospi_value = stock.get_market_trading_value_by_date(date_formatted, date_formatted, "KOSPI")
-            kosdaq_value = stock.get_market_trading_value_by_date(date_formatted, date_formatted, "KOSDAQ")
-            if not kospi_value.empty and not kosdaq_value.empty:
-                total_value = kospi_value.iloc[0]['거래대금'] + kosdaq_value.iloc[0]['거래대금']
-                return f"{total_value:,}원"
-            return "거래대금 데이터를 가져올 수 없습니다."
+            snapshot = get_market_snapshot(date, "ALL")
+            if snapshot.empty:
+                return "거래대금 데이터를 가져올 수 없습니다."
+            total_value = int(snapshot['거래대금'].sum())
+            return f"{total_value:,}원"
             
         elif stat_type == 'market_rising_count' and market:
             # 특정 시장의 상승 종목 수
-            rising_count = len([t for t in stock.get_market_ticker_list(date_formatted, market) 
-                              if _is_stock_rising(t, date)])
-            return f"{rising_count}개"
+            snapshot = get_market_snapshot(date, market)
+            if snapshot.empty:
+                return no_data
+            return f"{int(_is_stock_rising(snapshot).sum())}개"
             
         elif stat_type == 'market_traded_count' and market:
             # 특정 시장의 거래된 종목 수
-            tickers = stock.get_market_ticker_list(date_formatted, market)
-            traded_count = len([t for t in tickers if _has_trading_data(t, date)])
-            return f"{traded_count}개"
+            snapshot = get_market_snapshot(date, market)
+            if snapshot.empty:
+                return no_data
+            return f"{int(_has_trading_data(snapshot).sum())}개"
             
         return "지원하지 않는 통계 유형입니다."
         
     except Exception as e:
         return f"시장 통계 조회 중 오류 발생: {e}"
 
-def _is_stock_rising(ticker, date):
-    '''티커의 해당 날짜 상승 여부 확인 (전일 종가 대비)'''
-    try:
-        date_formatted = date.replace('-', '')
-        # 해당 날짜와 이전 거래일 데이터 조회
-        df = stock.get_market_ohlcv_by_ticker(date_formatted, ticker)
-        if not df.empty:
-            current_close = df.iloc[0]['종가']
-            
-            # 이전 거래일 조회 (최대 5일 전까지)
-            for days_back in range(1, 6):
-                prev_date_obj = datetime.strptime(date, "%Y-%m-%d") - timedelta(days=days_back)
-                prev_date_formatted = prev_date_obj.strftime("%Y%m%d")
-                try:
-                    prev_df = stock.get_market_ohlcv_by_ticker(prev_date_formatted, ticker)
-                    if not prev_df.empty:
-                        prev_close = prev_df.iloc[0]['종가']
-                        return current_close > prev_close
-                except:
-                    continue
-    except:
-        pass
-    return False
+def _is_stock_rising(snapshot):
+    '''스냅샷의 종목별 상승 여부 (전일 종가 대비 등락률 > 0)'''
+    return snapshot['등락률'].astype(float) > 0
 
-def _is_stock_falling(ticker, date):
-    '''티커의 해당 날짜 하락 여부 확인 (전일 종가 대비)'''
-    try:
-        date_formatted = date.replace('-', '')
-        # 해당 날짜와 이전 거래일 데이터 조회
-        df = stock.get_market_ohlcv_by_ticker(date_formatted, ticker)
-        if not df.empty:
-            current_close = df.iloc[0]['종가']
-            
-            # 이전 거래일 조회 (최대 5일 전까지)
-            for days_back in range(1, 6):
-                prev_date_obj = datetime.strptime(date, "%Y-%m-%d") - timedelta(days=days_back)
-                prev_date_formatted = prev_date_obj.strftime("%Y%m%d")
-                try:
-                    prev_df = stock.get_market_ohlcv_by_ticker(prev_date_formatted, ticker)
-                    if not prev_df.empty:
-                        prev_close = prev_df.iloc[0]['종가']
-                        return current_close < prev_close
-                except:
-                    continue
-    except:
-        pass
-    return False
+def _is_stock_falling(snapshot):
+    '''스냅샷의 종목별 하락 여부 (전일 종가 대비 등락률 < 0)'''
+    return snapshot['등락률'].astype(float) < 0
 
-def _has_trading_data(ticker, date):
-    '''티커의 해당 날짜 거래 데이터 존재 여부 확인'''
-    try:
-        df = stock.get_market_ohlcv_by_ticker(date.replace('-', ''), ticker)
-        return not df.empty and df.iloc[0]['거래량'] > 0
-    except:
-        pass
-    return False
+def _has_trading_data(snapshot):
+    '''스냅샷의 종목별 거래 발생 여부 (거래량 > 0)'''
+    return snapshot['거래량'].astype(float) > 0
+
+def _krx_code(ticker):
+    '''yfinance 형식 티커(005930.KS)에서 KRX 종목코드(005930)만 추출'''
+    return ticker.split('.')[0]
 
 # 5. 전체 시장 거래량 순위 조회
 def get_all_market_volume_ranking(**kwargs):
@@ -680,15 +658,12 @@ def get_stocks_down_from_high(**kwargs):
             chunk_tickers = tickers[i:i+chunk_size]
             
             # 안전한 다운로드 사용
-            data = _safe_yf_download(chunk_tickers, start_date_str, date)
-            
-            if data.empty:
-                continue
+            bars_by_ticker = _safe_download_bars(chunk_tickers, start_date_str, date)
                 
             for ticker in chunk_tickers:
                 try:
-                    if ticker in data.columns.get_level_values(0):
-                        ticker_data = data[ticker]
+                    if ticker in bars_by_ticker:
+                        ticker_data = bars_by_ticker[ticker]
                         if not ticker_data.empty:
                             # 52주 고점과 현재가 계산
                             high_52w = ticker_data['High'].max()
@@ -698,12 +673,7 @@ def get_stocks_down_from_high(**kwargs):
                                 decline_pct = ((current_price - high_52w) / high_52w) * 100
                                 
                                 # 종목명 조회
-                                stock_name = None
-                                if _KRX_TICKER_CACHE:
-                                    for name, t in _KRX_TICKER_CACHE.items():
-                                        if t == ticker:
-                                            stock_name = name
-                                            break
+                                stock_name = get_ticker_index().name(ticker)
                                 
                                 if stock_name and decline_pct < -5:  # 5% 이상 하락한 종목만
                                     stocks_with_decline.append({
@@ -880,7 +850,7 @@ def compare_stock_to_market(**kwargs):
     except Exception as e:
         return f"종목과 시장 평균 비교 중 오류 발생: {e}"
 
-# 14. 종목의 시장 거래량 점유율 계산 (pykrx 기반으로 개선)
+# 14. 종목의 시장 거래량 점유율 계산 (시장 스냅샷 기반)
 def calculate_stock_volume_share(**kwargs):
     '''
     - 특정 종목의 거래량이 전체 시장 거래량에서 차지하는 비율 계산
@@ -889,55 +859,19 @@ def calculate_stock_volume_share(**kwargs):
     stock_name = kwargs.get('stock_name')
     
     try:
-        # 날짜 형식 변환
-        date_formatted = date.replace('-', '')
-        
         # 해당 종목의 티커 찾기
         ticker = get_ticker(stock_name)
         if not ticker:
             return f"'{stock_name}'에 대한 티커 정보를 찾을 수 없습니다."
         
-        # 티커에서 숫자 부분만 추출 (pykrx용)
-        import re
-        ticker_code = re.search(r'\d+', ticker).group()
-        
-        # pykrx로 해당 종목의 거래량 조회
-        try:
-            stock_data = stock.get_market_ohlcv_by_ticker(date_formatted, ticker_code)
-            if stock_data.empty:
-                return f"{date}에 '{stock_name}'의 거래 데이터가 없습니다."
-            stock_volume = stock_data.iloc[0]['거래량']
-        except:
-            return f"{date}에 '{stock_name}'의 거래 데이터를 가져올 수 없습니다."
-        
-        # 전체 시장 거래량 계산 (KOSPI + KOSDAQ)
-        total_volume = 0
-        
-        # KOSPI 전체 거래량
-        try:
-            kospi_tickers = stock.get_market_ticker_list(date_formatted, market="KOSPI")
-            for ticker_code in kospi_tickers:
-                try:
-                    data = stock.get_market_ohlcv_by_ticker(date_formatted, ticker_code)
-                    if not data.empty:
-                        total_volume += data.iloc[0]['거래량']
-                except:
-                    continue
-        except:
-            pass
+        # 전체 시장(KOSPI + KOSDAQ) 스냅샷에서 종목 거래량과 전체 거래량을 함께 계산
+        snapshot = get_market_snapshot(date, "ALL")
+        ticker_code = _krx_code(ticker)
+        if ticker_code not in snapshot.index:
+            return f"{date}에 '{stock_name}'의 거래 데이터가 없습니다."
         
-        # KOSDAQ 전체 거래량
-        try:
-            kosdaq_tickers = stock.get_market_ticker_list(date_formatted, market="KOSDAQ")
-            for ticker_code in kosdaq_tickers:
-                try:
-                    data = stock.get_market_ohlcv_by_ticker(date_formatted, ticker_code)
-                    if not data.empty:
-                        total_volume += data.iloc[0]['거래량']
-                except:
-                    continue
-        except:
-            pass
+        stock_volume = float(snapshot.loc[ticker_code, '거래량'])
+        total_volume = float(snapshot['거래량'].sum())
         
         if total_volume == 0:
             return f"{date} 전체 시장 거래량을 계산할 수 없습니다."
@@ -948,7 +882,7 @@ def calculate_stock_volume_share(**kwargs):
     except Exception as e:
         return f"시장 거래량 점유율 계산 중 오류 발생: {e}"
 
-# 15. 특정 종목의 거래량 순위 조회 (pykrx 기반으로 개선)
+# 15. 특정 종목의 거래량 순위 조회 (시장 스냅샷 기반)
 def get_stock_volume_rank(**kwargs):
     '''
     - 특정 종목의 전체 시장에서의 거래량 순위를 조회
@@ -958,81 +892,25 @@ def get_stock_volume_rank(**kwargs):
     market = kwargs.get('market', 'ALL')  # 기본값: 전체 시장
     
     try:
-        # 날짜 형식 변환
-        date_formatted = date.replace('-', '')
-        
         # 해당 종목의 티커 찾기
         ticker = get_ticker(stock_name)
         if not ticker:
             return f"'{stock_name}'에 대한 티커 정보를 찾을 수 없습니다."
         
-        # 티커에서 숫자 부분만 추출 (pykrx용)
-        import re
-        target_ticker_code = re.search(r'\d+', ticker).group()
-        
-        # 해당 종목의 거래량 조회
-        try:
-            target_data = stock.get_market_ohlcv_by_ticker(date_formatted, target_ticker_code)
-            if target_data.empty:
-                return f"{date}에 '{stock_name}'의 거래 데이터가 없습니다."
-            target_volume = target_data.iloc[0]['거래량']
-        except:
-            return f"{date}에 '{stock_name}'의 거래 데이터를 가져올 수 없습니다."
-        
-        # 전체 시장 거래량 데이터 수집
-        all_volumes = []
-        
-        # 조회할 시장 결정
-        markets_to_check = []
-        if market == 'ALL':
-            markets_to_check = ['KOSPI', 'KOSDAQ']
-        else:
-            markets_to_check = [market]
-        
-        for market_name in markets_to_check:
-            try:
-                tickers = stock.get_market_ticker_list(date_formatted, market=market_name)
-                for ticker_code in tickers:
-                    try:
-                        data = stock.get_market_ohlcv_by_ticker(date_formatted, ticker_code)
-                        if not data.empty:
-                            volume = data.iloc[0]['거래량']
-                            all_volumes.append({
-                                'ticker': ticker_code,
-                                'volume': volume,
-                                'market': market_name
-                            })
-                    except:
-                        continue
-            except Exception as e:
-                print(f"Error fetching {market_name} data: {e}")
-                continue
-        
-        if not all_volumes:
+        snapshot = get_market_snapshot(date, market)
+        if snapshot.empty:
             return f"{date} 시장 거래량 데이터를 가져올 수 없습니다."
         
-        # 거래량 기준으로 정렬 (높은 순서)
-        all_volumes.sort(key=lambda x: x['volume'], reverse=True)
-        
-        # 해당 종목의 순위 찾기
-        rank = None
-        for i, data in enumerate(all_volumes):
-            if data['ticker'] == target_ticker_code:
-                rank = i + 1
-                break
-        
-        if rank is None:
-            # 직접 매칭이 안 되면 거래량으로 추정
-            for i, data in enumerate(all_volumes):
-                if data['volume'] <= target_volume:
-                    rank = i + 1
-                    break
+        target_ticker_code = _krx_code(ticker)
+        if target_ticker_code not in snapshot.index:
+            return f"{date}에 '{stock_name}'의 거래 데이터가 없습니다."
         
-        if rank is None:
-            rank = len(all_volumes) + 1
+        # 거래량 기준으로 정렬 (높은 순서) 후 해당 종목의 순위 찾기
+        volumes = snapshot['거래량'].astype(float).sort_values(ascending=False, kind='stable')
+        rank = volumes.index.get_loc(target_ticker_code) + 1
         
         market_text = f"{market} 시장" if market != 'ALL' else "전체 시장"
-        return f"{rank}위 (총 {len(all_volumes)}개 종목 중 {market_text})"
+        return f"{rank}위 (총 {len(volumes)}개 종목 중 {market_text})"
         
     except Exception as e:
         return f"거래량 순위 조회 중 오류 발생: {e}"
@@ -1057,17 +935,9 @@ def calculate_market_cap(**kwargs):
         
         close_price = hist['Close']
         
-        # yfinance를 통해 주식 정보 조회 (상장주식수 포함)
-        with SuppressOutput():
-            stock_info = yf.Ticker(ticker)
-            info = stock_info.info
-        
-        # 상장주식수 조회 (여러 필드 시도)
-        shares_outstanding = None
-        for field in ['sharesOutstanding', 'impliedSharesOutstanding', 'floatShares']:
-            if field in info and info[field] is not None:
-                shares_outstanding = info[field]
-                break
+        # 데이터 공급자를 통해 상장주식수 조회
+        with span("data.shares_outstanding", ticker=ticker):
+            shares_outstanding = get_provider().shares_outstanding(ticker)
         
         if shares_outstanding is None or shares_outstanding == 0:
             return f"{stock_name}의 상장주식수 정보를 가져올 수 없습니다."
@@ -1172,7 +1042,7 @@ def parse_question_with_llm_clova(question: str):
         f"질문: \"{question}\""
     )
     try:
-        raw = llm.invoke(prompt).content
+        raw = get_llm().invoke(prompt).content
         return normalize_conditions(json.loads(extract_json_body(raw)))
     except:
         return {}
@@ -1193,7 +1063,7 @@ def parse_tech_signal_question(question: str):
         f"질문: \"{question}\""
     )
     try:
-        response = llm.invoke(prompt)
+        response = get_llm().invoke(prompt)
         return json.loads(extract_json_body(response.content))
     except Exception as e:
         print("⚠️ 파싱 실패:", e)
@@ -1233,48 +1103,22 @@ def handle_bollinger(parsed):
     signal_type = parsed["signal_type"]
     market = parsed.get("market", "ALL")
 
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
-
-    ticker_map = {}
-    for _, row in krx.iterrows():
-        code = row["Code"]
-        suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-        ticker_map[code + suffix] = row["Name"]
-
-    def get_bollinger_result(ticker):
-        try:
-            end_dt = datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)
-            df = yf.Ticker(ticker).history(start=(datetime.strptime(date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d"), end=end_dt.strftime("%Y-%m-%d"))
-            df.index = df.index.strftime("%Y-%m-%d")
-            if date not in df.index or len(df) < 20:
-                return None
-            df["middle"] = df["Close"].rolling(20).mean()
-            df["std"] = df["Close"].rolling(20).std()
-            df["upper"] = df["middle"] + 2 * df["std"]
-            df["lower"] = df["middle"] - 2 * df["std"]
-            row = df.loc[date]
-            if check_bollinger_touch(row, signal_type):
-                return {
-                    "name": ticker_map[ticker],
-                    "close": round(row["Close"]),
-                    "upper": round(row["upper"]),
-                    "lower": round(row["lower"])
-                }
-            return None
-        except:
-            return None
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
 
     print(f"⏳ 볼린저 밴드 '{signal_type}' 조건 탐색 중...")
+    frame = _load_indicator_frame(tickers, date)
+    bands = {"Close": frame["close"], "upper": frame["bb_upper"], "lower": frame["bb_lower"]}
+    mask = check_bollinger_touch(bands, signal_type)
+    matched = frame[mask] if isinstance(mask, pd.Series) else frame.iloc[0:0]
     results = []
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = executor.map(get_bollinger_result, list(ticker_map.keys()))
-        for r in futures:
-            if r:
-                results.append(r)
+    for ticker, row in matched.iterrows():
+        results.append({
+            "name": universe.name(ticker),
+            "close": round(row["close"]),
+            "upper": round(row["bb_upper"]),
+            "lower": round(row["bb_lower"])
+        })
 
     if not results:
         print("📭 조건을 만족하는 종목이 없습니다.")
@@ -1290,50 +1134,18 @@ def handle_rsi(parsed):
     direction = parsed["signal_type"]
     market = parsed.get("market", "ALL")
 
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
-
-    ticker_map = {}
-    for _, row in krx.iterrows():
-        code = row["Code"]
-        suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-        ticker_map[code + suffix] = row["Name"]
-
-    def check_rsi(ticker):
-        try:
-            end_dt = datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)
-            df = yf.Ticker(ticker).history(start=(datetime.strptime(date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d"), end=end_dt.strftime("%Y-%m-%d"))
-            df.index = df.index.strftime("%Y-%m-%d")
-            if date not in df.index or len(df) < 15:
-                return None
-            delta = df["Close"].diff()
-            gain = delta.clip(lower=0)
-            loss = -delta.clip(upper=0)
-            avg_gain = gain.rolling(14).mean()
-            avg_loss = loss.rolling(14).mean()
-            rs = avg_gain / avg_loss
-            df["rsi"] = 100 - (100 / (1 + rs))
-            rsi_today = df.loc[date]["rsi"]
-            if pd.isna(rsi_today):
-                return None
-            if direction == "above" and rsi_today >= threshold:
-                return {"name": ticker_map[ticker], "rsi": round(rsi_today, 1)}
-            elif direction == "below" and rsi_today <= threshold:
-                return {"name": ticker_map[ticker], "rsi": round(rsi_today, 1)}
-            return None
-        except:
-            return None
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
 
     print(f"⏳ RSI {direction} {threshold} 조건 탐색 중...")
-    results = []
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = executor.map(check_rsi, list(ticker_map.keys()))
-        for r in futures:
-            if r:
-                results.append(r)
+    frame = _load_indicator_frame(tickers, date)
+    if direction == "above":
+        mask = frame["rsi14"] >= threshold
+    elif direction == "below":
+        mask = frame["rsi14"] <= threshold
+    else:
+        mask = pd.Series(False, index=frame.index)
+    results = [{"name": universe.name(ticker), "rsi": round(value, 1)} for ticker, value in frame.loc[mask, "rsi14"].items()]
 
     if not results:
         print("📭 조건을 만족하는 종목이 없습니다.")
@@ -1354,20 +1166,26 @@ def handle_cross(parsed):
     target = parsed.get("target")
     market = parsed.get("market", "ALL")
 
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
+    if target:
+        target_ticker = universe.ticker(target)
+        tickers = [target_ticker] if target_ticker in tickers else []
 
     results = []
 
-    if target:
-        krx = krx[krx["Name"] == target]
+    # 시작일에 바로 교차를 판단할 수 있도록 MA20 계산과 전일 비교에 필요한 20거래일을 앞에 더 받음
+    fetch_start = get_trading_calendar().offset(start_date, -20) or start_date
 
-    def check_cross(code, name, suffix):
-        ticker = code + suffix
-        df = yf.Ticker(ticker).history(start=start_date, end=(datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d"))
+    def check_cross(ticker):
+        name = universe.name(ticker)
+        with span("data.daily_bars", ticker=ticker, start=fetch_start, end=end_date) as fetch_span:
+            try:
+                df = get_provider().daily_bars(ticker, fetch_start, end_date)
+            except Exception as e:
+                fetch_span.set(error=str(e))
+                return None
+            fetch_span.set(rows=len(df))
         if df.empty:
             return None
 
@@ -1378,8 +1196,8 @@ def handle_cross(parsed):
         counts = {"death_cross": 0, "golden_cross": 0}
         for i in range(1, len(df)):
             prev, curr = df.iloc[i - 1], df.iloc[i]
-            cross_date = curr.name.tz_localize(None) if curr.name.tzinfo else curr.name
-            if not (pd.to_datetime(start_date) <= cross_date <= pd.to_datetime(end_date)):
+            # 일봉 index는 'YYYY-MM-DD' 문자열
+            if not (start_date <= curr.name <= end_date):
                 continue
             if "death_cross" in signal_types and prev["ma_short"] > prev["ma_long"] and curr["ma_short"] <= curr["ma_long"]:
                 counts["death_cross"] += 1
@@ -1393,12 +1211,8 @@ def handle_cross(parsed):
 
     print(f"🔍 교차 조건 탐색 중... ({', '.join(signal_types)})")
     with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = []
-        for _, row in krx.iterrows():
-            code = row["Code"]
-            name = row["Name"]
-            suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-            futures.append(executor.submit(check_cross, code, name, suffix))
+        traced_check_cross = bind(check_cross)
+        futures = [executor.submit(traced_check_cross, ticker) for ticker in tickers]
 
         for f in futures:
             result = f.result()
@@ -1419,48 +1233,20 @@ def handle_ma_breakout(parsed):
     threshold = parsed["threshold"]
     market = parsed.get("market", "ALL")
 
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
-
-    ticker_map = {}
-    for _, row in krx.iterrows():
-        code = row["Code"]
-        suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-        ticker_map[code + suffix] = row["Name"]
-
-    def check_ma_breakout(ticker):
-        try:
-            end_dt = datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)
-            df = yf.Ticker(ticker).history(start=(datetime.strptime(date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d"), end=end_dt.strftime("%Y-%m-%d"))
-            df.index = df.index.strftime("%Y-%m-%d")
-            if date not in df.index or len(df) < 20:
-                return None
-            df["ma20"] = df["Close"].rolling(20).mean()
-            row = df.loc[date]
-            ma_val = row["ma20"]
-            if pd.isna(ma_val):
-                return None
-            if row["Close"] >= ma_val * (1 + threshold / 100):
-                return {
-                    "name": ticker_map[ticker],
-                    "close": round(row["Close"]),
-                    "ma20": round(ma_val),
-                    "gap": round((row["Close"] - ma_val) / ma_val * 100, 2)
-                }
-            return None
-        except:
-            return None
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
 
     print(f"⏳ MA20 대비 {threshold}% 이상 상승 종목 탐색 중...")
+    frame = _load_indicator_frame(tickers, date)
+    mask = frame["close"] >= frame["ma20"] * (1 + threshold / 100)
     results = []
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = executor.map(check_ma_breakout, list(ticker_map.keys()))
-        for r in futures:
-            if r:
-                results.append(r)
+    for ticker, row in frame[mask].iterrows():
+        results.append({
+            "name": universe.name(ticker),
+            "close": round(row["close"]),
+            "ma20": round(row["ma20"]),
+            "gap": round((row["close"] - row["ma20"]) / row["ma20"] * 100, 2)
+        })
 
     if not results:
         print("📭 조건을 만족하는 종목이 없습니다.")
@@ -1469,61 +1255,41 @@ def handle_ma_breakout(parsed):
     for r in results:
         print(f"📌 {r['name']} - 종가:{r['close']} / MA20:{r['ma20']} / 괴리율:{r['gap']}%")
     return [f"{r['name']}(종가:{r['close']} / MA20:{r['ma20']} / +{r['gap']}%)" for r in results]
-# ✅ 거래량 급등 핸들러
-# ✅ 거래량 급등 핸들러 수정본
-
-def handle_volume_ratio(parsed):
+# ✅ 거래량 급등 핸들러 (기술적 분석용)
+# - 조건검색용 handle_volume_ratio(전일 대비)와 이름이 겹쳐 덮어써지지 않도록 별도 이름 사용
+def handle_volume_ratio_signal(parsed):
     date = parsed["date"]
     threshold = parsed["threshold"]
     n = parsed.get("volume_avg_n_days", 20)
     market = parsed.get("market", "ALL")
 
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
-
-    ticker_map = {}
-    for _, row in krx.iterrows():
-        code = row["Code"]
-        suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-        ticker_map[code + suffix] = row["Name"]
-
-    def check_volume_ratio(ticker):
-        try:
-            end_dt = datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)
-            start_dt = datetime.strptime(date, "%Y-%m-%d") - timedelta(days=n * 2)
-            df = yf.Ticker(ticker).history(start=start_dt.strftime("%Y-%m-%d"), end=end_dt.strftime("%Y-%m-%d"))
-            df.index = df.index.strftime("%Y-%m-%d")
-            if date not in df.index or len(df) < n:
-                return None
-            avg_volume = df.loc[:date].iloc[:-1]["Volume"].tail(n).mean()
-            today_volume = df.loc[date]["Volume"]
-            if (
-                today_volume is None or avg_volume is None or
-                pd.isna(today_volume) or pd.isna(avg_volume) or
-                today_volume == 0 or avg_volume == 0
-            ):
-                return None
-            if today_volume >= avg_volume * (threshold / 100):
-                return {
-                    "name": ticker_map[ticker],
-                    "volume": int(today_volume),
-                    "avg": int(avg_volume),
-                    "ratio": round(today_volume / avg_volume * 100, 1)
-                }
-            return None
-        except:
-            return None
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
 
     print(f"⏳ 거래량 {n}일 평균 대비 {threshold}% 이상 종목 탐색 중...")
+    if n == 20:
+        # 20일 평균 거래량은 미리 계산된 지표 파티션에서 조회
+        frame = _load_indicator_frame(tickers, date)
+        today_volume, avg_volume = frame["volume"], frame["vol_avg20"]
+    else:
+        # 당일과 직전 n거래일
+        matrix = _load_price_matrix(tickers, date, sessions=n + 1)
+        col = matrix.column(date)
+        avg_matrix, _ = volume_ratio(matrix.volume, n)
+        index = matrix.tickers if col is not None else []
+        today_volume = pd.Series(matrix.volume[:, col] if col is not None else [], index=index, dtype="float64")
+        avg_volume = pd.Series(avg_matrix[:, col] if col is not None else [], index=index, dtype="float64")
+
+    valid = (today_volume > 0) & (avg_volume > 0)
+    ratio = (today_volume / avg_volume * 100).where(valid)
     results = []
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = executor.map(check_volume_ratio, list(ticker_map.keys()))
-        for r in futures:
-            if r:
-                results.append(r)
+    for ticker in ratio[ratio >= threshold].index:
+        results.append({
+            "name": universe.name(ticker),
+            "volume": int(today_volume[ticker]),
+            "avg": int(avg_volume[ticker]),
+            "ratio": round(ratio[ticker], 1)
+        })
 
     if not results:
         print("📭 조건을 만족하는 종목이 없습니다.")
@@ -1544,7 +1310,7 @@ def dispatch_technical(parsed):
     elif indicator == "cross":
         return handle_cross(parsed)
     elif indicator == "volume_ratio":
-        return handle_volume_ratio(parsed)
+        return handle_volume_ratio_signal(parsed)
     else:
         return ["❌ 지원하지 않는 기술적 분석 조건입니다."]
     
@@ -1553,70 +1319,55 @@ def handle_absolute_volume(p): return query_core(p, "absolute", p["volume_absolu
 def handle_price_change(p): return query_core(p, "price_change", p["price_change"].get("value"))
 def handle_price_range(p): return query_core(p, "price_range", (p["min_price"].get("value"), p["max_price"].get("value")))
 
+# 전일 대비 등락률 조건의 비교 연산자
+PRICE_CHANGE_OPERATORS = {">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt, "==": operator.eq}
+
 def query_core(parsed, mode: str, threshold):
     date = parsed["date"]
     market = parsed.get("market", "ALL")
-    krx = fdr.StockListing("KRX")
-    if market == "KOSPI":
-        krx = krx[krx["Market"] == "KOSPI"]
-    elif market == "KOSDAQ":
-        krx = krx[krx["Market"] == "KOSDAQ"]
-
-    ticker_map = {}
-    for _, row in krx.iterrows():
-        code = row["Code"]
-        suffix = ".KS" if row["Market"] == "KOSPI" else ".KQ"
-        ticker = code + suffix
-        ticker_map[ticker] = row["Name"]
-
-    tickers = list(ticker_map.keys())
+    universe = get_ticker_index()
+    tickers = universe.tickers(market)
     target_date = datetime.strptime(date, "%Y-%m-%d")
     date_str = target_date.strftime("%Y-%m-%d")
-    prev_str = (target_date - timedelta(days=1)).strftime("%Y-%m-%d")
-
-    def get_data(ticker):
-        try:
-            df = yf.Ticker(ticker).history(start=prev_str, end=(target_date + timedelta(days=1)).strftime("%Y-%m-%d"))
-            df.index = df.index.strftime("%Y-%m-%d")
-            if mode == "ratio" and prev_str in df.index and date_str in df.index:
-                vol_y = df.loc[prev_str]["Volume"]
-                vol_t = df.loc[date_str]["Volume"]
-                if vol_y > 0 and ((vol_t - vol_y) / vol_y) * 100 >= threshold:
-                    return ticker_map[ticker]
-            elif mode == "absolute" and date_str in df.index:
-                vol = df.loc[date_str]["Volume"]
-                if vol >= threshold:
-                    return ticker_map[ticker]
-            elif mode == "price_change" and prev_str in df.index and date_str in df.index:
-                close_y = df.loc[prev_str]["Close"]
-                close_t = df.loc[date_str]["Close"]
-                change = ((close_t - close_y) / close_y) * 100
-                op = parsed["price_change"]["operator"]
-                if close_y > 0:
-                    if op == ">=" and change >= threshold:
-                        return ticker_map[ticker]
-                    elif op == "<=" and change <= threshold:
-                        return ticker_map[ticker]
-                    elif op == ">" and change > threshold:
-                        return ticker_map[ticker]
-                    elif op == "<" and change < threshold:
-                        return ticker_map[ticker]
-                    elif op == "==" and change == threshold:
-                        return ticker_map[ticker]
-            elif mode == "price_range" and date_str in df.index:
-                close_t = df.loc[date_str]["Close"]
-                min_p, max_p = threshold
-                if min_p <= close_t <= max_p:
-                    return ticker_map[ticker]
-        except:
-            return None
+    # 전일 대비 조건은 달력상 전날이 아닌 이전 거래일과 비교 (월요일이면 금요일)
+    prev_str = get_trading_calendar().previous(date_str) or date_str
 
     print(f"⏳ {mode} 조건 계산 중...")
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        results = list(executor.map(get_data, tickers))
+    # 전 종목의 이전 거래일/당일 일봉을 한 번에 불러오고 (저장소에 없는 종목만 일괄 조회 후 한 번에 저장) 조건은 벡터 연산으로 계산
+    panel = _load_daily_panel(tickers, prev_str, date_str)
+    today = panel.get(date_str)
+    prev = panel.get(prev_str)
+    if today is None or today.empty or threshold is None:
+        return []
+    if prev is None:
+        prev = today.iloc[0:0]
+    prev = prev.reindex(today.index)
+
+    if mode == "ratio":
+        vol_y = prev["Volume"]
+        matched = (vol_y > 0) & ((today["Volume"] - vol_y) / vol_y * 100 >= threshold)
+    elif mode == "absolute":
+        matched = today["Volume"] >= threshold
+    elif mode == "price_change":
+        close_y = prev["Close"]
+        change = (today["Close"] - close_y) / close_y * 100
+        compare = PRICE_CHANGE_OPERATORS.get(parsed["price_change"]["operator"])
+        if compare is None:
+            return []
+        matched = (close_y > 0) & compare(change, threshold)
+    elif mode == "price_range":
+        min_p, max_p = threshold
+        if min_p is None or max_p is None:
+            return []
+        matched = (today["Close"] >= min_p) & (today["Close"] <= max_p)
+    else:
+        return []
 
+    # 결과 순서는 종목 인덱스 순서로 유지
+    matched_tickers = set(matched[matched].index)
+    results = [universe.name(ticker) for ticker in tickers if ticker in matched_tickers]
     print(results)
-    return [r for r in results if r]
+    return results
 
 def query_by_condition(**kwargs):
     question = kwargs.get('question')
@@ -1630,7 +1381,43 @@ def query_by_technical_signal(**kwargs):
     result = dispatch_technical(parsed)
     return result if result else "📭 조건을 만족하는 종목이 없습니다."
 
+# --- 장 마감 후 기술적 지표 일괄 계산 (materialize_indicators.py에서 실행) ---
+def materialize_indicators(start_date, end_date=None, market="ALL"):
+    '''
+    - [start_date, end_date] 구간의 모든 거래일에 대해 전 종목 지표를 계산하여 지표 파티션으로 저장
+    - 저장된 거래일 수를 반환
+    '''
+    end_date = end_date or start_date
+    tickers = get_ticker_index().tickers(market)
+    span_sessions = len(get_trading_calendar().sessions_between(start_date, end_date))
+
+    matrix = _load_price_matrix(tickers, end_date, sessions=span_sessions + INDICATOR_LOOKBACK_SESSIONS - 1)
+    indicators = compute_indicators(matrix)
+
+    written = 0
+    for date_str in matrix.dates:
+        if not (start_date <= date_str <= end_date):
+            continue
+        rows = indicator_rows(matrix, indicators, date_str)
+        INDICATOR_STORE.write_partition(date_str, _storable_indicator_rows(rows, date_str))
+        written += 1
+    return written
+
 # --- 사용 가능한 모든 스킬(Tool)들을 이름으로 찾아쓸 수 있도록 딕셔너리로 관리 ---
+def _observed_skill(name, handler):
+    # 함수 실행 시간을 지표로 기록 (예외가 발생하면 result="error")
+    @functools.wraps(handler)
+    def observed(**kwargs):
+        started = time.perf_counter()
+        result = "error"
+        try:
+            value = handler(**kwargs)
+            result = "ok"
+            return value
+        finally:
+            SKILL_DURATION.observe(time.perf_counter() - started, tool=name, result=result)
+    return observed
+
 SKILL_HANDLERS = {
     "get_stock_metric": get_stock_metric,
     "get_market_index": get_market_index,
@@ -1652,3 +1439,5 @@ SKILL_HANDLERS = {
     "query_by_condition": query_by_condition,
     "query_by_technical_signal" : query_by_technical_signal
 }
+# 모든 함수의 실행 시간을 지표로 기록
+SKILL_HANDLERS = {name: _observed_skill(name, handler) for name, handler in SKILL_HANDLERS.items()}
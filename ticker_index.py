@@ -0,0 +1,205 @@
+'''
+- 종목명 ↔ 티커 ↔ 시장 양방향 인덱스
+- KRX 상장 종목 목록을 한 번에 받아(bulk) 만들고, 상장 기준일(listing date)별 JSON 파일로 디스크에 저장
+- 이후 실행에서는 디스크의 인덱스를 수 ms 안에 읽어 종목명/티커 조회를 O(1) 딕셔너리 조회로 처리
+- 프로세스 안에서는 거래일마다 한 번만 갱신되는 공유 종목 유니버스 역할을 하며, 시장별 티커 배열을 미리 계산해 둠
+'''
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from providers import get_provider
+from tracing import span
+
+# 인덱스에 포함하는 시장과 yfinance 티커 접미사 (KOSDAQ GLOBAL은 KOSDAQ으로 취급)
+MARKET_SUFFIX = {"KOSPI": ".KS", "KOSDAQ": ".KQ"}
+MARKET_ALIASES = {"KOSPI": "KOSPI", "KOSDAQ": "KOSDAQ", "KOSDAQ GLOBAL": "KOSDAQ"}
+
+# 디스크에 남겨둘 이전 버전 인덱스 개수
+KEEP_VERSIONS = 5
+
+
+class TickerIndex:
+    '''
+    - 종목명 -> 티커, 티커 -> 종목명, 티커 -> 시장 조회를 모두 O(1)로 제공
+    - 티커는 yfinance 형식(예: 005930.KS)
+    '''
+    def __init__(self, entries, listing_date):
+        self.listing_date = listing_date
+        self._by_name = {}
+        self._by_ticker = {}
+        self._market = {}
+        for name, ticker, market in entries:
+            self._by_name.setdefault(name, ticker)
+            self._by_ticker[ticker] = name
+            self._market[ticker] = market
+
+        # 질문 속 종목명 탐색용 (공백 제거, 소문자) 종목명 맵
+        self._by_compact_name = {}
+        for name in self._by_name:
+            self._by_compact_name.setdefault(_compact(name), name)
+        self._max_name_length = max(map(len, self._by_compact_name), default=0)
+
+        # 조건 검색마다 시장 필터링을 반복하지 않도록 시장별 티커 배열을 미리 계산
+        self._tickers = {m: tuple(t for t, tm in self._market.items() if tm == m) for m in MARKET_SUFFIX}
+        self._tickers["ALL"] = tuple(self._by_ticker)
+
+    def __len__(self):
+        return len(self._by_ticker)
+
+    def ticker(self, name):
+        return self._by_name.get(name)
+
+    def name(self, ticker):
+        return self._by_ticker.get(ticker)
+
+    def market(self, ticker):
+        return self._market.get(ticker)
+
+    def tickers(self, market=None):
+        '''지정된 시장(KOSPI/KOSDAQ, 그 외에는 전체)의 티커 배열 (미리 계산된 tuple)'''
+        return self._tickers.get(market, self._tickers["ALL"])
+
+    def find_names(self, text, min_length=2):
+        '''
+        - 공백을 제거한 소문자 문자열 text에서 종목명을 왼쪽부터 가장 긴 것 우선으로 찾아 [(시작, 끝, 종목명)] 반환
+        '''
+        found = []
+        start = 0
+        while start < len(text):
+            for end in range(min(len(text), start + self._max_name_length), start + min_length - 1, -1):
+                name = self._by_compact_name.get(text[start:end])
+                if name is not None:
+                    found.append((start, end, name))
+                    start = end
+                    break
+            else:
+                start += 1
+        return found
+
+    def entries(self):
+        return [(name, ticker, self._market[ticker]) for ticker, name in self._by_ticker.items()]
+
+    @classmethod
+    def from_listing(cls, listing, listing_date):
+        '''
+        - FinanceDataReader KRX 상장 목록(Code, Name, Market 컬럼)으로 인덱스 생성
+        '''
+        entries = []
+        for code, name, market in zip(listing["Code"], listing["Name"], listing["Market"]):
+            market = MARKET_ALIASES.get(market)
+            if market is None:
+                continue
+            entries.append((name, f"{code}{MARKET_SUFFIX[market]}", market))
+        return cls(entries, listing_date)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"listing_date": self.listing_date, "entries": self.entries()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["entries"], data["listing_date"])
+
+
+def _compact(name):
+    return "".join(name.split()).lower()
+
+
+def _index_dir():
+    return os.path.join(Config.DATA_DIR, "ticker_index")
+
+
+def _latest_listing_date():
+    '''상장 목록 기준일: 오늘이 주말이면 직전 금요일'''
+    date = datetime.now()
+    while date.weekday() >= 5:
+        date -= timedelta(days=1)
+    return date.strftime("%Y-%m-%d")
+
+
+def _load_latest_from_disk():
+    index_dir = _index_dir()
+    if not os.path.isdir(index_dir):
+        return None
+    versions = sorted(f for f in os.listdir(index_dir) if f.endswith(".json"))
+    for filename in reversed(versions):
+        try:
+            return TickerIndex.load(os.path.join(index_dir, filename))
+        except Exception:
+            continue
+    return None
+
+
+def _prune_old_versions():
+    index_dir = _index_dir()
+    versions = sorted(f for f in os.listdir(index_dir) if f.endswith(".json"))
+    for filename in versions[:-KEEP_VERSIONS]:
+        os.remove(os.path.join(index_dir, filename))
+
+
+def build_ticker_index(listing_date=None):
+    '''
+    - KRX 상장 목록을 한 번에 받아 인덱스를 만들고 디스크에 저장
+    '''
+    listing_date = listing_date or _latest_listing_date()
+    with span("data.listing", listing_date=listing_date) as listing_span:
+        listing = get_provider().listing()
+        listing_span.set(rows=len(listing))
+    index = TickerIndex.from_listing(listing, listing_date)
+    index.save(os.path.join(_index_dir(), f"{listing_date}.json"))
+    _prune_old_versions()
+    return index
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+_LAST_BUILD_FAILURE = 0.0
+
+# 인덱스 갱신에 실패했을 때 다시 시도하기까지 기다리는 시간 (초)
+REBUILD_RETRY_SECONDS = 600
+
+
+def _is_usable(index, listing_date):
+    if index is None:
+        return False
+    return index.listing_date >= listing_date or time.time() - _LAST_BUILD_FAILURE < REBUILD_RETRY_SECONDS
+
+
+def get_ticker_index():
+    '''
+    - 프로세스 전체가 공유하는 인덱스(종목 유니버스)를 반환
+    - 디스크에 최신 기준일 인덱스가 있으면 그대로 읽고, 기준일이 지났으면 새로 만들어 저장
+    - 새로 만들기에 실패하면 디스크의 이전 버전을 사용하고, 일정 시간 뒤에 다시 시도
+    - 메모리의 인덱스도 기준일이 바뀌면(다음 거래일) 다시 갱신
+    '''
+    global _INDEX, _LAST_BUILD_FAILURE
+    listing_date = _latest_listing_date()
+    if _is_usable(_INDEX, listing_date):
+        return _INDEX
+
+    with _INDEX_LOCK:
+        if _is_usable(_INDEX, listing_date):
+            return _INDEX
+
+        index = _INDEX if _INDEX is not None else _load_latest_from_disk()
+        if index is None or index.listing_date < listing_date:
+            try:
+                index = build_ticker_index(listing_date)
+            except Exception as e:
+                _LAST_BUILD_FAILURE = time.time()
+                print(f"KRX 종목 인덱스 생성 오류: {e}")
+
+        if index is None:
+            # 다음 호출에서 다시 시도하도록 빈 인덱스는 공유하지 않음
+            return TickerIndex([], None)
+        _INDEX = index
+        return _INDEX
@@ -0,0 +1,165 @@
+'''
+- 함수(Tool) 실행 결과 캐시
+- (함수 이름, 정규화한 인자)를 키로 결과를 메모리(LRU)에 보관하여, 같은 질문이 반복되면 yfinance/pykrx를 전혀 호출하지 않고 바로 응답
+- 조회 날짜가 모두 장이 끝난 과거 거래일이면 만료되지 않고, 당일/미래 날짜나 날짜가 없는(상대 날짜를 쓰는) 호출은 live_ttl초 동안만 유지
+- 오류로 보이는 결과는 캐시하지 않아 일시적인 네트워크 오류가 굳어지지 않도록 함
+- "데이터가 없습니다" 류의 결과는 조회 실패가 None으로 바뀐 것일 수도 있으므로 과거 날짜라도 live_ttl초 동안만 유지
+'''
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+from ohlcv_store import is_closed_date
+
+# 조회 날짜로 보는 인자 이름
+DATE_ARGUMENTS = ("date", "start_date", "end_date")
+
+# 이 문구가 들어간 결과는 일시적인 실패일 수 있으므로 캐시하지 않음
+UNCACHEABLE_MARKERS = ("오류", "가져올 수 없습니다")
+
+# 이 문구가 들어간 결과는 날짜와 관계없이 live_ttl초 동안만 유지 (휴장일/없는 종목일 수도, 일시적인 조회 실패일 수도 있음)
+NO_DATA_MARKERS = ("데이터가 없습니다", "찾을 수 없습니다", "계산할 수 없습니다")
+
+
+class ToolResultCache:
+    '''
+    - 함수 실행 결과 LRU 캐시 (적중/실패 횟수 집계 포함)
+    - enabled가 False이면 조회/저장과 같은 호출끼리의 대기 없이 handler를 바로 실행 (부하 테스트에서 캐시 없는 상태 측정용)
+    '''
+    def __init__(self, max_entries=None, live_ttl=None):
+        self.max_entries = max_entries or Config.TOOL_CACHE_MAX_ENTRIES
+        self.live_ttl = live_ttl or Config.TOOL_CACHE_LIVE_TTL
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+    def call(self, name, handler, kwargs):
+        '''
+        - 캐시에 결과가 있으면 반환하고, 없으면 handler(**kwargs)를 실행하여 저장
+        - (결과, 캐시 적중 여부) 반환
+        '''
+        if not self.enabled:
+            with self._lock:
+                self.misses += 1
+            return handler(**kwargs), False
+
+        key = make_key(name, kwargs)
+        found, result = self._lookup(key)
+        if found:
+            return result, True
+
+        # 같은 호출이 동시에 들어와도 실제 실행은 한 번만 수행
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            found, result = self._lookup(key)
+            if found:
+                return result, True
+
+            with self._lock:
+                self.misses += 1
+            try:
+                result = handler(**kwargs)
+                if _is_cacheable(result):
+                    if _is_no_data(result):
+                        expires_at = time.time() + self.live_ttl
+                    else:
+                        expires_at = _expires_at(kwargs, self.live_ttl)
+                    self._store(key, result, expires_at)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return result, False
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at is None or time.time() <= expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, result
+                del self._entries[key]
+            return False, None
+
+    def _store(self, key, result, expires_at):
+        with self._lock:
+            self._entries[key] = (result, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name=None):
+        '''특정 함수(없으면 전체)의 캐시 항목을 삭제'''
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        '''적중/실패 횟수, 적중률, 현재 항목 수'''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(name, kwargs):
+    '''
+    - (함수 이름, 정규화한 인자 JSON) 캐시 키
+    - 인자 순서, 앞뒤 공백, 값이 None인 인자, 5와 5.0의 차이는 무시
+    '''
+    return name, json.dumps(_normalize(kwargs), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _expires_at(kwargs, live_ttl):
+    dates = [kwargs[arg] for arg in DATE_ARGUMENTS if isinstance(kwargs.get(arg), str)]
+    if dates and all(is_closed_date(date.strip()) for date in dates):
+        return None
+    return time.time() + live_ttl
+
+
+def _is_cacheable(result):
+    if result is None:
+        return False
+    text = result if isinstance(result, str) else str(result)
+    return not any(marker in text for marker in UNCACHEABLE_MARKERS)
+
+
+def _is_no_data(result):
+    text = result if isinstance(result, str) else str(result)
+    return any(marker in text for marker in NO_DATA_MARKERS)
+
+
+# 모든 턴(사용자)이 공유하는 기본 캐시
+TOOL_CACHE = ToolResultCache()
@@ -0,0 +1,83 @@
+'''
+- 첫 번째 LLM 호출에 보낼 함수(Tool) 명세를 질문에 맞게 고르는 로컬 선택기
+- 질문 하나에 필요한 함수는 보통 한두 개이므로, 18개 명세를 모두 보내지 않고 관련 있는 상위 k개만 보내 프롬프트 토큰을 줄임
+- 함수별 키워드 사전으로 점수를 매기고, 같은 점수는 질문과 함수 설명(description)의 글자 2-gram 겹침 비율로 정렬
+- 어떤 키워드도 맞지 않으면 None을 반환하여 전체 명세를 보냄 (정확도 손실 방지)
+- 되묻기 함수(ask_for_clarification)는 모호한 질문 처리를 위해 항상 포함
+'''
+import unicodedata
+
+from config import Config
+from function_caller import TOOLS
+
+# 항상 함께 보내는 함수
+ALWAYS_INCLUDED = ("ask_for_clarification",)
+
+# 함수 이름 → 관련 키워드 (공백을 제거한 질문에서 찾으므로 키워드도 공백 없이 작성)
+TOOL_KEYWORDS = {
+    "get_stock_metric": ("시가", "고가", "저가", "종가", "거래량", "등락률", "주가", "가격", "얼마"),
+    "get_market_index": ("지수", "코스피", "코스닥", "kospi", "kosdaq"),
+    "get_top_stocks_by_metric": ("상위", "top", "가장", "많이오른", "많이내린", "상승률", "하락률", "비싼", "개만", "개종목"),
+    "get_market_statistics": ("상승종목", "하락종목", "오른종목수", "내린종목수", "종목수", "몇개", "몇종목", "거래대금", "거래된"),
+    "get_all_market_volume_ranking": ("전체시장", "거래량상위", "거래량순위", "거래량이많은", "많이거래"),
+    "get_top_volume_stock_with_count": ("거래량1위", "거래량이가장", "가장많이거래", "거래량최대"),
+    "get_recent_rising_stocks": ("최근", "요즘", "요새", "급등", "많이오른", "오른주식", "오른종목"),
+    "get_stocks_down_from_high": ("고점", "52주", "떨어진", "빠진", "하락한"),
+    "compare_stocks": ("중", "비교", "더높", "더낮", "보다", "어디가", "어느"),
+    "compare_market_indices": ("코스피와코스닥", "코스닥과코스피", "kospi와kosdaq", "두지수", "지수중"),
+    "calculate_market_average_change": ("평균등락률", "평균상승률", "시장평균", "평균"),
+    "compare_stock_to_market": ("시장평균", "평균보다", "시장보다"),
+    "calculate_stock_volume_share": ("비율", "비중", "%", "퍼센트", "차지"),
+    "get_stock_volume_rank": ("거래량순위", "몇위", "순위"),
+    "calculate_market_cap": ("시가총액", "시총"),
+    "compare_market_caps": ("시가총액", "시총"),
+    "query_by_technical_signal": ("볼린저", "rsi", "골든", "데드", "크로스", "이동평균", "이평", "돌파", "과매수", "과매도", "시그널", "신호", "밴드"),
+}
+
+
+def _compact(text):
+    return "".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+# 함수 설명의 글자 2-gram (모듈 로드 시 한 번만 계산)
+_DESCRIPTION_BIGRAMS = {
+    tool["function"]["name"]: _bigrams(_compact(tool["function"]["description"])) for tool in TOOLS
+}
+
+
+def score_tools(query):
+    '''
+    - 함수 이름 → (키워드 적중 수, 설명 2-gram 겹침 비율) 반환 (키워드가 하나도 맞지 않은 함수는 제외)
+    '''
+    text = _compact(query)
+    query_bigrams = _bigrams(text)
+    scores = {}
+    for name, keywords in TOOL_KEYWORDS.items():
+        hits = sum(1 for keyword in keywords if keyword in text)
+        if hits:
+            description = _DESCRIPTION_BIGRAMS.get(name, set())
+            overlap = len(query_bigrams & description) / len(query_bigrams) if query_bigrams else 0.0
+            scores[name] = (hits, overlap)
+    return scores
+
+
+def select_tools(query, previous_tools=None, top_k=None):
+    '''
+    - 첫 번째 LLM 호출에 보낼 함수 이름 목록을 반환 (None이면 전체 명세를 보냄)
+    - previous_tools(직전 턴에서 호출한 함수 이름, ChatHistory.last_tool_names())는 "그럼 SK하이닉스는?" 같은 후속 질문을 위해 함께 보냄
+    '''
+    if not Config.TOOL_SELECTION or not query:
+        return None
+    top_k = top_k or Config.TOOL_SELECTION_TOP_K
+
+    scores = score_tools(query)
+    if not scores:
+        return None
+
+    ranked = sorted(scores, key=lambda name: scores[name], reverse=True)[:top_k]
+    selected = list(dict.fromkeys(ranked + list(previous_tools or []) + list(ALWAYS_INCLUDED)))
+    return [name for name in selected if name in _DESCRIPTION_BIGRAMS]
@@ -0,0 +1,231 @@
+'''
+- 질문 한 턴의 처리 과정을 구간(span) 단위로 기록하는 추적(tracing) 도구
+- start_trace로 추적을 시작하면, 그 안에서 열린 span(LLM 호출, 함수 실행, 시세 조회 등)이 부모-자식 관계와 속성(종목 수, 행 수, 캐시 적중 등)과 함께 기록됨
+- 추적 중이 아닐 때 span은 아무것도 기록하지 않으므로 평소 실행에는 영향이 거의 없음
+- 현재 span은 contextvars로 전달하므로 asyncio 태스크에는 그대로 이어지고, 스레드 풀에서 실행하는 함수는 bind로 감싸서 전달
+- 기록한 추적은 JSON(구간 목록)과 Chrome trace event 파일(chrome://tracing, Perfetto에서 열기)로 저장
+'''
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_CURRENT_SPAN = contextvars.ContextVar("current_span", default=None)
+_SPAN_IDS = itertools.count(1)
+
+
+class Span:
+    '''구간 하나 (이름, 시작/종료 시각, 실행 스레드, 속성, 오류)'''
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "end", "thread_id", "thread_name", "error")
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.span_id = next(_SPAN_IDS)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.perf_counter()
+        self.end = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.error = None
+
+    def set(self, **attributes):
+        '''속성 추가 (구간 안에서 결과를 보고 행 수, 캐시 적중 여부 등을 기록)'''
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start - self.trace.start, 6),
+            "duration": round(self.duration, 6),
+            "thread": self.thread_name,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    # 추적 중이 아닐 때 돌려주는 span (속성 기록을 무시)
+    duration = 0.0
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    '''
+    - 추적 하나에 속한 구간 목록 (여러 스레드에서 끝난 구간을 모음)
+    - root: start_trace가 연 최상위 구간
+    '''
+    def __init__(self, name, attributes=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+        self.root = Span(self, name, attributes=attributes)
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "spans": [span.to_dict() for span in spans],
+        }
+
+    def to_chrome_trace(self):
+        '''Chrome trace event 형식 (구간마다 "X" 이벤트, 스레드마다 이름 메타데이터)'''
+        pid = os.getpid()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        events = []
+        threads = {}
+        for span in spans:
+            threads.setdefault(span.thread_id, span.thread_name)
+            args = dict(span.attributes)
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": round((span.start - self.start) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id, "name": self.name}}
+
+    def summary(self):
+        '''구간 이름별 {count, total, max} (전체 시간 순으로 정렬)'''
+        stats = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = stats.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        return dict(sorted(stats.items(), key=lambda item: -item[1]["total"]))
+
+    def write(self, directory):
+        '''directory에 <trace_id>.json과 <trace_id>.trace.json(Chrome trace)을 저장하고 두 경로를 반환'''
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{self.trace_id}.json")
+        chrome_path = os.path.join(directory, f"{self.trace_id}.trace.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, default=str, indent=2)
+        with open(chrome_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        return json_path, chrome_path
+
+
+def current_span():
+    '''현재 구간 (추적 중이 아니면 None)'''
+    return _CURRENT_SPAN.get()
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    '''새 추적을 시작하고 Trace를 반환 (with 블록이 끝나면 최상위 구간도 끝남)'''
+    trace = Trace(name, attributes)
+    token = _CURRENT_SPAN.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        trace.root.end = time.perf_counter()
+        trace._finish(trace.root)
+
+
+@contextmanager
+def span(name, **attributes):
+    '''
+    - 현재 구간의 자식 구간을 열고 Span을 반환 (추적 중이 아니면 기록하지 않는 빈 span)
+    - 블록 안에서 발생한 예외는 구간의 error에 남기고 그대로 전달
+    '''
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(parent.trace, name, parent.span_id, attributes)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        current.end = time.perf_counter()
+        parent.trace._finish(current)
+
+
+def bind(function):
+    '''
+    - 현재 구간을 부모로 이어 받아 실행하도록 함수를 감쌈 (스레드 풀에 넘기는 함수용)
+    - 여러 스레드에서 동시에 호출해도 됨
+    '''
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        return function
+
+    def bound(*args, **kwargs):
+        token = _CURRENT_SPAN.set(parent)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _CURRENT_SPAN.reset(token)
+    return bound
+
+
+async def bind_coroutine(coro, parent):
+    '''다른 이벤트 루프(스레드)에서 실행할 코루틴이 parent 구간을 부모로 이어 받도록 감쌈'''
+    token = _CURRENT_SPAN.set(parent)
+    try:
+        return await coro
+    finally:
+        _CURRENT_SPAN.reset(token)
+
+
+def result_rows(result):
+    '''조회 결과의 행 수 (DataFrame/목록은 길이, {키: DataFrame}은 행 수 합계, 그 외는 None)'''
+    if isinstance(result, dict):
+        return sum(len(value) for value in result.values() if hasattr(value, "__len__"))
+    if hasattr(result, "__len__") and not isinstance(result, str):
+        return len(result)
+    return None
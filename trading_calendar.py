@@ -0,0 +1,205 @@
+'''
+- KRX 거래일(영업일) 달력
+- pykrx에서 과거 영업일 목록을 한 번에 받아 디스크에 저장하고, 이후에는 하루에 한 번 새로 지난 구간만 이어 받음
+- 모든 날짜에 대해 "그 날짜 이하의 가장 최근 거래일" 위치를 미리 계산해 두어 이전/다음/n번째 거래일 조회가 O(1)
+- 아직 확정되지 않은 오늘 이후 날짜는 평일을 거래일로 가정 (휴장일 정보가 없으면 주말만 제외)
+'''
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from providers import get_provider
+from tracing import span
+
+# 달력이 다루는 가장 이른 날짜와, 확정 구간 이후 평일로 채워 두는 기간
+CALENDAR_START = "2010-01-01"
+PROJECTION_DAYS = 400
+
+
+class TradingCalendar:
+    '''
+    - 정렬된 거래일 목록과 날짜 -> 거래일 위치 맵으로 구성된 달력
+    - known_until까지는 실제 영업일, 그 이후는 평일로 추정한 거래일
+    '''
+    def __init__(self, sessions, known_until):
+        self.known_until = known_until
+        sessions = sorted(set(sessions))
+
+        # 확정 구간 이후는 평일을 거래일로 추정
+        projected_start = _parse(known_until) + timedelta(days=1) if known_until else _parse(CALENDAR_START)
+        projected_end = max(projected_start, datetime.now()) + timedelta(days=PROJECTION_DAYS)
+        for day in _days(projected_start, projected_end):
+            if day.weekday() < 5:
+                sessions.append(day.strftime("%Y-%m-%d"))
+        self._sessions = sessions
+        self._session_pos = {d: i for i, d in enumerate(sessions)}
+
+        # 달력의 모든 날짜 -> 그 날짜 이하 가장 최근 거래일의 위치
+        self._floor_pos = {}
+        pos = -1
+        for day in _days(_parse(sessions[0]), _parse(sessions[-1])):
+            date_str = day.strftime("%Y-%m-%d")
+            if date_str in self._session_pos:
+                pos = self._session_pos[date_str]
+            self._floor_pos[date_str] = pos
+
+    @property
+    def sessions(self):
+        return self._sessions
+
+    def is_session(self, date_str):
+        return date_str in self._session_pos
+
+    def latest(self, date_str=None):
+        '''date_str(기본값: 오늘) 이하의 가장 최근 거래일'''
+        date_str = date_str or datetime.now().strftime("%Y-%m-%d")
+        return self._at(self._floor(date_str))
+
+    def previous(self, date_str, n=1):
+        '''date_str보다 앞선 n번째 거래일'''
+        pos = self._floor(date_str)
+        if not self.is_session(date_str):
+            # 휴장일의 "이전 거래일"은 그 날짜 이하의 가장 최근 거래일
+            pos += 1
+        return self._at(pos - n)
+
+    def next(self, date_str, n=1):
+        '''date_str보다 뒤의 n번째 거래일'''
+        return self._at(self._floor(date_str) + n)
+
+    def offset(self, date_str, n):
+        '''date_str 이하 가장 최근 거래일에서 n거래일 이동한 거래일 (n < 0이면 과거)'''
+        return self._at(self._floor(date_str) + n)
+
+    def sessions_between(self, start_str, end_str):
+        '''[start_str, end_str] 구간의 거래일 목록'''
+        start_pos = self._floor(start_str)
+        if not self.is_session(start_str):
+            start_pos += 1
+        end_pos = self._floor(end_str)
+        return self._sessions[max(start_pos, 0):end_pos + 1]
+
+    def _floor(self, date_str):
+        pos = self._floor_pos.get(date_str)
+        if pos is not None:
+            return pos
+        # 달력 범위 밖의 날짜
+        return -1 if date_str < self._sessions[0] else len(self._sessions) - 1
+
+    def _at(self, pos):
+        if 0 <= pos < len(self._sessions):
+            return self._sessions[pos]
+        return None
+
+    def to_dict(self):
+        known = [d for d in self._sessions if self.known_until and d <= self.known_until]
+        return {"known_until": self.known_until, "sessions": known}
+
+
+def _parse(date_str):
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+def _days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _calendar_path():
+    return os.path.join(Config.DATA_DIR, "trading_calendar.json")
+
+
+def _fetch_sessions(start_str, end_str):
+    '''데이터 공급자(pykrx)로 [start_str, end_str] 구간의 실제 영업일 목록을 조회 (1년 단위로 나누어 요청)'''
+    sessions = []
+    chunk_start = _parse(start_str)
+    end = _parse(end_str)
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=365), end)
+        with span("data.business_days", start=f"{chunk_start:%Y-%m-%d}", end=f"{chunk_end:%Y-%m-%d}") as fetch_span:
+            days = get_provider().business_days(chunk_start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d"))
+            fetch_span.set(rows=len(days))
+        # pykrx는 조회 실패 시에도 빈 결과를 돌려주므로, 평일이 일주일 넘게 있는 구간이 비어 있으면 실패로 간주
+        if not days and (chunk_end - chunk_start).days >= 7:
+            raise ValueError(f"{chunk_start:%Y-%m-%d}~{chunk_end:%Y-%m-%d} 영업일 정보를 받지 못했습니다.")
+        sessions.extend(days)
+        chunk_start = chunk_end + timedelta(days=1)
+    return sessions
+
+
+def _load_from_disk():
+    path = _calendar_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return TradingCalendar(data["sessions"], data["known_until"])
+    except Exception:
+        return None
+
+
+def _save_to_disk(calendar):
+    path = _calendar_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(calendar.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+_CALENDAR = None
+_CALENDAR_LOCK = threading.Lock()
+_LAST_REFRESH_FAILURE = 0.0
+
+# 달력 갱신에 실패했을 때 다시 시도하기까지 기다리는 시간 (초)
+REFRESH_RETRY_SECONDS = 600
+
+
+def _target_known_until():
+    '''확정된 영업일 정보가 있어야 하는 마지막 날짜 (어제)'''
+    return (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _is_usable(calendar, target):
+    if calendar is None:
+        return False
+    return (calendar.known_until or "") >= target or time.time() - _LAST_REFRESH_FAILURE < REFRESH_RETRY_SECONDS
+
+
+def get_trading_calendar():
+    '''
+    - 프로세스 전체가 공유하는 거래일 달력을 반환
+    - 디스크에 저장된 달력이 어제까지의 정보를 갖고 있지 않으면 빠진 구간만 이어 받아 저장
+    - pykrx 조회에 실패하면 가진 정보(없으면 평일 달력)로 동작하고, 일정 시간 뒤에 다시 시도
+    '''
+    global _CALENDAR, _LAST_REFRESH_FAILURE
+    target = _target_known_until()
+    if _is_usable(_CALENDAR, target):
+        return _CALENDAR
+
+    with _CALENDAR_LOCK:
+        if _is_usable(_CALENDAR, target):
+            return _CALENDAR
+
+        calendar = _CALENDAR if _CALENDAR is not None else _load_from_disk()
+        if calendar is None or (calendar.known_until or "") < target:
+            known = calendar.to_dict()["sessions"] if calendar is not None else []
+            fetch_start = (_parse(calendar.known_until) + timedelta(days=1)).strftime("%Y-%m-%d") \
+                if calendar is not None and calendar.known_until else CALENDAR_START
+            try:
+                calendar = TradingCalendar(known + _fetch_sessions(fetch_start, target), target)
+                _save_to_disk(calendar)
+            except Exception as e:
+                _LAST_REFRESH_FAILURE = time.time()
+                print(f"KRX 거래일 달력 갱신 오류: {e}")
+                if calendar is None:
+                    calendar = TradingCalendar([], None)
+
+        _CALENDAR = calendar
+        return _CALENDAR